@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""
+Benchmark Common - helpers shared by the keeper benchmarks
+- percentile(), ms(), fmt(): result numbers and table cells
+- ScriptedBackend: simulated devices without random drift - the harness
+  makes every external change
+- install_backend(): puts a benchmark backend into a keeper
+- write_results(): result file with a meta block (time, Python, options)
+"""
+
+import json
+import os
+import platform
+import sys
+import time
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src')
+sys.path.insert(0, os.path.abspath(SRC_DIR))
+
+from audio_backends import SimulatedAudioBackend  # noqa: E402
+from metrics import percentile  # noqa: E402,F401
+
+
+class ScriptedBackend(SimulatedAudioBackend):
+    """Simulation without random drift - the benchmark makes every change"""
+
+    def start_drift(self, reference, mean_interval=5.0):
+        pass
+
+
+def ms(seconds):
+    """Seconds -> milliseconds (None stays None)"""
+    return None if seconds is None else seconds * 1000
+
+
+def fmt(value, width, digits=1):
+    """Right-aligned number, '-' for None"""
+    return f"{'-':>{width}}" if value is None else f"{value:{width}.{digits}f}"
+
+
+def install_backend(keeper, backend):
+    """Replaces the keeper's backend (before start_monitoring)"""
+    keeper.backend.close()
+    keeper.backend = backend
+    keeper.audio_method = backend.name
+    keeper.device_registry.invalidate("benchmark backend")
+
+
+def write_results(path, options, results):
+    """Writes results plus a meta block as JSON (--compare reads it back)"""
+    output = {
+        'meta': {
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'options': {key: value for key, value in vars(options).items() if key != 'compare'},
+        },
+        'results': results,
+    }
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(output, f, indent=2)
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Icon Benchmark - cost of tray icon updates over a simulated hour
+Replays one hour of monitor ticks (state published every check_interval,
+occasional corrections and start/stop) and compares redrawing the icon on
+every update with the cached variants used by the keeper. Setting the icon
+is approximated by encoding it as ICO, which is what pystray does on Windows.
+
+    python benchmarks/icon_benchmark.py --interval 0.5 --json icons.json
+"""
+
+import argparse
+import io
+import json
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from tray_icons import IconCache, render_icon  # noqa: E402
+
+
+def simulated_hour(interval, correction_interval, toggles, seed):
+    """Icon keys of one hour of published states"""
+    rng = random.Random(seed)
+    ticks = int(3600 / interval)
+    toggle_ticks = set(rng.sample(range(ticks), toggles))
+
+    running, corrections = True, 0
+    keys = []
+    for tick in range(ticks):
+        if tick in toggle_ticks:
+            running = not running
+        if running and rng.random() < interval / correction_interval:
+            corrections += 1
+        keys.append((running, "active", running and corrections > 0))
+    return keys
+
+
+def set_icon(image):
+    """Stand-in for pystray's icon setter"""
+    buffer = io.BytesIO()
+    image.save(buffer, format='ICO')
+    return buffer.getbuffer().nbytes
+
+
+def redraw_every_update(keys):
+    """Old behaviour: new image and icon set per update"""
+    for key in keys:
+        set_icon(render_icon(*key))
+    return {'renders': len(keys), 'icon_sets': len(keys)}
+
+
+def cached(keys):
+    """Keeper behaviour: cached variants, icon set only when the key changes"""
+    cache = IconCache()
+    current, sets = None, 0
+    for key in keys:
+        if key == current:
+            continue
+        set_icon(cache.get(key))
+        current = key
+        sets += 1
+    return {'renders': cache.render_count, 'icon_sets': sets}
+
+
+def main(argv=None):
+    """Runs both strategies and prints the cost per simulated hour"""
+    parser = argparse.ArgumentParser(description="Tray icon update cost")
+    parser.add_argument('--interval', type=float, default=0.5, help="seconds between published states")
+    parser.add_argument('--correction-interval', type=float, default=5.0, help="mean seconds between corrections")
+    parser.add_argument('--toggles', type=int, default=4, help="start/stop switches in the hour")
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--json', help="write the results to this file")
+    options = parser.parse_args(argv)
+
+    try:
+        import PIL  # noqa: F401
+    except ImportError:
+        print("Pillow is not installed - nothing to measure")
+        return
+
+    keys = simulated_hour(options.interval, options.correction_interval, options.toggles, options.seed)
+    print(f"{len(keys)} state updates in one simulated hour")
+
+    results = {}
+    for name, strategy in (('redraw', redraw_every_update), ('cached', cached)):
+        started = time.perf_counter()
+        result = strategy(keys)
+        result['seconds'] = time.perf_counter() - started
+        results[name] = result
+        print(f"{name:<7} {result['seconds'] * 1000:9.1f} ms   renders {result['renders']:6}   "
+              f"icon sets {result['icon_sets']:6}")
+
+    if results['cached']['seconds'] > 0:
+        print(f"cached is {results['redraw']['seconds'] / results['cached']['seconds']:.0f}x cheaper")
+
+    if options.json:
+        with open(options.json, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,222 @@
+#!/usr/bin/env python3
+"""
+Monitor Benchmark - the keeper's monitoring loop against scripted drift
+Runs MicrophoneVolumeKeeperAdvanced on a seeded simulated backend and
+replays drift scenarios:
+- steady     one external change every 2s, alternating devices
+- bursty     bursts of 5 changes 20ms apart every 3s
+- fighting   another application pulls a device to 50% every 250ms
+- hotplug    a USB microphone is unplugged and comes back at 30%
+
+Reports time-to-correction percentiles, backend calls and CPU per hour,
+and allocations per tick (gen-0 GC collections, optional tracemalloc).
+
+    python benchmarks/monitor_benchmark.py --duration 10 --latency 0.005 --json after.json
+    python benchmarks/monitor_benchmark.py --compare before.json after.json
+"""
+
+import argparse
+import gc
+import json
+import os
+import random
+import tempfile
+import time
+import tracemalloc
+
+from bench_common import ScriptedBackend, fmt, install_backend, ms, percentile, write_results
+
+DEVICE_NAMES = ("Built-in Microphone", "USB Microphone")
+TARGET_VOLUME = 100
+
+# gc generation 0 runs after this many net container allocations (gc.get_threshold()[0])
+GEN0_THRESHOLD = gc.get_threshold()[0]
+
+
+def steady(duration, rng, backend):
+    """One external change every 2s"""
+    steps = []
+    at, index = 1.0, 0
+    while at < duration:
+        device_id = backend.devices[index % len(backend.devices)]['id']
+        steps.append((at, lambda device_id=device_id: backend.apply_external_change(80, device_id)))
+        at += 2.0
+        index += 1
+    return steps
+
+
+def bursty(duration, rng, backend):
+    """Bursts of 5 quick changes"""
+    steps = []
+    at = 1.0
+    while at < duration:
+        for burst in range(5):
+            device_id = rng.choice(backend.devices)['id']
+            volume = rng.randint(40, 90)
+            steps.append((at + burst * 0.02,
+                          lambda device_id=device_id, volume=volume: backend.apply_external_change(volume, device_id)))
+        at += 3.0
+    return steps
+
+
+def fighting(duration, rng, backend):
+    """Another application keeps setting one device to 50%"""
+    device_id = backend.devices[0]['id']
+    steps = []
+    at = 0.5
+    while at < duration:
+        steps.append((at, lambda: backend.apply_external_change(50, device_id)))
+        at += 0.25
+    return steps
+
+
+def hotplug(duration, rng, backend):
+    """The USB microphone disappears for a second and comes back with a low volume"""
+    device = dict(backend.devices[1])
+    steps = []
+    at = 1.0
+    while at + 1.0 < duration:
+        steps.append((at, lambda: backend.unplug(device['id'])))
+        steps.append((at + 1.0, lambda: backend.plug(device['id'], device['name'], 30)))
+        at += 4.0
+    return steps
+
+
+SCENARIOS = {'steady': steady, 'bursty': bursty, 'fighting': fighting, 'hotplug': hotplug}
+
+
+def run_scenario(name, mode, options, workdir):
+    """Runs one scenario in one mode and returns its measurements"""
+    from microphone_volume_keeper import MicrophoneVolumeKeeperAdvanced
+
+    settings_path = os.path.join(workdir, f"{name}-{mode}.json")
+    with open(settings_path, 'w', encoding='utf-8') as f:
+        json.dump({'audio_backend': 'Simulation', 'event_journal': False,
+                   'event_driven': mode == 'events', 'engine': options.engine,
+                   'check_interval': options.check_interval, 'target_volume': TARGET_VOLUME,
+                   'devices': [{'device': device, 'target_volume': TARGET_VOLUME, 'tolerance': 2}
+                               for device in DEVICE_NAMES]}, f)
+
+    keeper = MicrophoneVolumeKeeperAdvanced(settings_path=settings_path)
+    backend = ScriptedBackend(volume=TARGET_VOLUME, seed=options.seed,
+                              device_names=DEVICE_NAMES, latency=options.latency)
+    install_backend(keeper, backend)
+
+    steps = SCENARIOS[name](options.duration, random.Random(options.seed), backend)
+
+    if options.tracemalloc:
+        tracemalloc.start()
+    gen0_before = gc.get_stats()[0]['collections']
+    cpu_before = time.process_time()
+    started = time.perf_counter()
+
+    keeper.start_monitoring()
+    for at, step in steps:
+        delay = started + at - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+        step()
+    remaining = started + options.duration - time.perf_counter()
+    if remaining > 0:
+        time.sleep(remaining)
+    keeper.stop_monitoring()
+    keeper.device_registry.stop_refresher()
+
+    elapsed = time.perf_counter() - started
+    cpu_time = time.process_time() - cpu_before
+    gen0 = gc.get_stats()[0]['collections'] - gen0_before
+    traced = tracemalloc.get_traced_memory() if options.tracemalloc else None
+    if options.tracemalloc:
+        tracemalloc.stop()
+
+    ticks = keeper.metrics.snapshot()['counters'].get('ticks_total', 0)
+    latencies = list(backend.correction_latencies)
+    result = {
+        'elapsed': elapsed,
+        'external_changes': len(steps),
+        'corrections': len(latencies),
+        'uncorrected': len(backend.external_changes),
+        'ttc_p50_ms': ms(percentile(latencies, 0.5)),
+        'ttc_p95_ms': ms(percentile(latencies, 0.95)),
+        'ttc_p99_ms': ms(percentile(latencies, 0.99)),
+        'ticks': ticks,
+        'backend_calls_per_hour': backend.call_count / elapsed * 3600,
+        'cpu_seconds_per_hour': cpu_time / elapsed * 3600,
+        'cpu_ms_per_tick': cpu_time / ticks * 1000 if ticks else None,
+        'allocations_per_tick': gen0 * GEN0_THRESHOLD / ticks if ticks else None,
+    }
+    if traced:
+        result['traced_peak_kb'] = traced[1] / 1024
+    keeper.backend.close()
+    return result
+
+
+def print_result(key, result):
+    """One table row"""
+    print(f"{key:<18} p50 {fmt(result['ttc_p50_ms'], 7)} ms  p95 {fmt(result['ttc_p95_ms'], 7)} ms  "
+          f"p99 {fmt(result['ttc_p99_ms'], 7)} ms  uncorrected {result['uncorrected']:3}  "
+          f"calls/h {result['backend_calls_per_hour']:8.0f}  CPU/h {result['cpu_seconds_per_hour']:6.1f}s  "
+          f"alloc/tick {fmt(result['allocations_per_tick'], 6, 0)}")
+
+
+def compare(before_path, after_path):
+    """Prints the relative change of the key metrics between two result files"""
+    with open(before_path, encoding='utf-8') as f:
+        before = json.load(f)['results']
+    with open(after_path, encoding='utf-8') as f:
+        after = json.load(f)['results']
+
+    metrics = ('ttc_p50_ms', 'ttc_p95_ms', 'backend_calls_per_hour', 'cpu_seconds_per_hour',
+               'allocations_per_tick')
+    print(f"{'':<18}" + "".join(f"{metric:>24}" for metric in metrics))
+    for key in sorted(set(before) & set(after)):
+        cells = []
+        for metric in metrics:
+            old, new = before[key].get(metric), after[key].get(metric)
+            if not old or new is None:
+                cells.append(f"{'-':>24}")
+            else:
+                cells.append(f"{(new - old) / old * 100:+23.1f}%")
+        print(f"{key:<18}" + "".join(cells))
+
+
+def main(argv=None):
+    """Runs the selected scenarios and modes"""
+    parser = argparse.ArgumentParser(description="Monitoring loop benchmark")
+    parser.add_argument('--scenario', action='append', choices=sorted(SCENARIOS),
+                        help="scenario to run (repeatable, default: all)")
+    parser.add_argument('--mode', choices=('events', 'polling', 'both'), default='both')
+    parser.add_argument('--engine', choices=('thread', 'asyncio'), default='thread')
+    parser.add_argument('--duration', type=float, default=10.0, help="seconds per scenario")
+    parser.add_argument('--latency', type=float, default=0.0, help="injected seconds per backend call")
+    parser.add_argument('--check-interval', type=float, default=0.5)
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--tracemalloc', action='store_true', help="also trace memory (slower)")
+    parser.add_argument('--json', help="write the results to this file")
+    parser.add_argument('--compare', nargs=2, metavar=('BEFORE', 'AFTER'),
+                        help="compare two result files instead of running")
+    options = parser.parse_args(argv)
+
+    if options.compare:
+        compare(*options.compare)
+        return
+
+    # The keeper writes its log file into the working directory
+    json_path = os.path.abspath(options.json) if options.json else None
+    workdir = tempfile.mkdtemp(prefix='mvk_bench_')
+    os.chdir(workdir)
+
+    modes = ('events', 'polling') if options.mode == 'both' else (options.mode,)
+    results = {}
+    for name in options.scenario or SCENARIOS:
+        for mode in modes:
+            key = f"{name}/{mode}"
+            results[key] = run_scenario(name, mode, options, workdir)
+            print_result(key, results[key])
+
+    if json_path:
+        write_results(json_path, options, results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""
+Scale Benchmark - the keeper with hundreds of simulated endpoints
+Registers N virtual microphones (default 10, 100, 1000) on the simulated
+backend, enforces all of them and drifts random endpoints at a fixed rate
+across the whole fleet. Compares the classic loop (one interval for every
+endpoint) with scale mode (one priority queue, a due time per endpoint).
+
+Reports per N: CPU per tick and per endpoint check, memory per endpoint
+(tracemalloc), time-to-correction percentiles and backend calls per hour.
+
+    python benchmarks/scale_benchmark.py --endpoints 10 100 1000 --duration 10
+    python benchmarks/scale_benchmark.py --loop scale --mode events --json scale.json
+"""
+
+import argparse
+import json
+import os
+import random
+import tempfile
+import threading
+import time
+import tracemalloc
+
+from bench_common import ScriptedBackend, fmt, install_backend, ms, percentile, write_results
+
+TARGET_VOLUME = 100
+
+
+def run(endpoints, loop, mode, options, workdir):
+    """One keeper with `endpoints` devices, returns its measurements"""
+    from microphone_volume_keeper import MicrophoneVolumeKeeperAdvanced
+
+    names = [f"Capture {index:04d}" for index in range(endpoints)]
+    settings_path = os.path.join(workdir, f"{loop}-{mode}-{endpoints}.json")
+    with open(settings_path, 'w', encoding='utf-8') as f:
+        json.dump({'audio_backend': 'Simulation', 'event_journal': False, 'control_api': False,
+                   'scale_mode': loop == 'scale', 'event_driven': mode == 'events',
+                   'check_interval': options.check_interval, 'max_interval': options.max_interval,
+                   'target_volume': TARGET_VOLUME,
+                   'devices': [{'device': name, 'target_volume': TARGET_VOLUME, 'tolerance': 2}
+                               for name in names]}, f)
+
+    tracemalloc.start()
+    baseline = tracemalloc.get_traced_memory()[0]
+    keeper = MicrophoneVolumeKeeperAdvanced(settings_path=settings_path)
+    # The harness drifts the fleet
+    backend = ScriptedBackend(volume=TARGET_VOLUME, device_names=names, latency=options.latency)
+    install_backend(keeper, backend)
+
+    rng = random.Random(options.seed)
+    stop = threading.Event()
+
+    def drift():
+        """Poisson drift across the fleet at options.rate changes per second"""
+        while not stop.wait(rng.expovariate(options.rate)):
+            device = rng.choice(backend.devices)
+            backend.apply_external_change(rng.randint(30, 90), device['id'])
+
+    cpu_before = time.process_time()
+    started = time.perf_counter()
+    keeper.start_monitoring()
+    # Warm-up: every endpoint checked once, then measure the steady state
+    time.sleep(min(1.0, options.duration / 4))
+    memory = tracemalloc.get_traced_memory()[0] - baseline
+    tracemalloc.stop()
+
+    ticks_before = keeper.metrics.snapshot()['counters'].get('ticks_total', 0)
+    calls_before = backend.call_count
+    reads_before = backend.read_count
+    cpu_warm = time.process_time()
+    warm = time.perf_counter()
+    drifter = threading.Thread(target=drift, daemon=True)
+    drifter.start()
+    time.sleep(options.duration)
+    stop.set()
+    drifter.join()
+    # Let the last changes be corrected before stopping
+    time.sleep(options.max_interval if mode == 'polling' else 0.2)
+    elapsed = time.perf_counter() - warm
+    cpu_time = time.process_time() - cpu_warm
+    keeper.stop_monitoring()
+    keeper.device_registry.stop_refresher()
+
+    ticks = keeper.metrics.snapshot()['counters'].get('ticks_total', 0) - ticks_before
+    calls = backend.call_count - calls_before
+    reads = backend.read_count - reads_before
+    latencies = list(backend.correction_latencies)
+    backend.close()
+    return {
+        'endpoints': endpoints,
+        'setup_seconds': warm - started,
+        'corrections': len(latencies),
+        'uncorrected': len(backend.external_changes),
+        'ttc_p50_ms': ms(percentile(latencies, 0.5)),
+        'ttc_p95_ms': ms(percentile(latencies, 0.95)),
+        'ttc_p99_ms': ms(percentile(latencies, 0.99)),
+        'ticks': ticks,
+        'cpu_ms_per_tick': cpu_time / ticks * 1000 if ticks else None,
+        'cpu_seconds_per_hour': cpu_time / elapsed * 3600,
+        'backend_calls_per_hour': calls / elapsed * 3600,
+        'endpoint_reads_per_hour': reads / elapsed * 3600,
+        'memory_kb_per_endpoint': memory / endpoints / 1024,
+    }
+
+
+def print_result(key, result):
+    """One table row"""
+    print(f"{key:<22} p50 {fmt(result['ttc_p50_ms'], 7)} ms  p99 {fmt(result['ttc_p99_ms'], 7)} ms  "
+          f"open {result['uncorrected']:4}  CPU/tick {fmt(result['cpu_ms_per_tick'], 6, 2)} ms  "
+          f"CPU/h {result['cpu_seconds_per_hour']:7.1f}s  calls/h {result['backend_calls_per_hour']:6.0f}  "
+          f"reads/h {result['endpoint_reads_per_hour']:9.0f}  "
+          f"mem/endpoint {result['memory_kb_per_endpoint']:5.1f} KB")
+
+
+def main(argv=None):
+    """Runs every loop/mode for every fleet size"""
+    parser = argparse.ArgumentParser(description="Keeper scalability benchmark")
+    parser.add_argument('--endpoints', type=int, nargs='+', default=[10, 100, 1000])
+    parser.add_argument('--loop', choices=('classic', 'scale', 'both'), default='both')
+    parser.add_argument('--mode', choices=('events', 'polling', 'both'), default='both')
+    parser.add_argument('--duration', type=float, default=10.0, help="measured seconds per run")
+    parser.add_argument('--rate', type=float, default=5.0, help="external changes per second (whole fleet)")
+    parser.add_argument('--latency', type=float, default=0.0, help="injected seconds per backend call")
+    parser.add_argument('--check-interval', type=float, default=0.5)
+    parser.add_argument('--max-interval', type=float, default=5.0)
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--json', help="write the results to this file")
+    options = parser.parse_args(argv)
+
+    # The keeper writes its log file next to the settings files
+    json_path = os.path.abspath(options.json) if options.json else None
+    workdir = tempfile.mkdtemp(prefix='mvk_scale_')
+    os.chdir(workdir)
+
+    loops = ('classic', 'scale') if options.loop == 'both' else (options.loop,)
+    modes = ('events', 'polling') if options.mode == 'both' else (options.mode,)
+    results = {}
+    for endpoints in options.endpoints:
+        for loop in loops:
+            for mode in modes:
+                key = f"{endpoints}/{loop}/{mode}"
+                results[key] = run(endpoints, loop, mode, options, workdir)
+                print_result(key, results[key])
+
+    if json_path:
+        write_results(json_path, options, results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+Startup Benchmark - headless vs. tray import cost
+Starts fresh interpreters that import the keeper module either alone
+(headless mode) or together with the GUI stack the tray needs
+(tkinter, pystray, PIL) and reports import time and resident memory.
+
+    python benchmarks/startup_benchmark.py --runs 10
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src')
+
+# Executed in the child interpreter - prints one JSON line
+CHILD_SCRIPT = r'''
+import json, os, sys, time
+
+def rss_bytes():
+    """Resident set size of this process"""
+    if sys.platform == 'win32':
+        import ctypes
+        from ctypes import wintypes
+
+        class PROCESS_MEMORY_COUNTERS(ctypes.Structure):
+            _fields_ = [('cb', wintypes.DWORD), ('PageFaultCount', wintypes.DWORD),
+                        ('PeakWorkingSetSize', ctypes.c_size_t), ('WorkingSetSize', ctypes.c_size_t),
+                        ('QuotaPeakPagedPoolUsage', ctypes.c_size_t), ('QuotaPagedPoolUsage', ctypes.c_size_t),
+                        ('QuotaPeakNonPagedPoolUsage', ctypes.c_size_t), ('QuotaNonPagedPoolUsage', ctypes.c_size_t),
+                        ('PagefileUsage', ctypes.c_size_t), ('PeakPagefileUsage', ctypes.c_size_t)]
+
+        counters = PROCESS_MEMORY_COUNTERS()
+        counters.cb = ctypes.sizeof(counters)
+        ctypes.windll.psapi.GetProcessMemoryInfo(
+            ctypes.windll.kernel32.GetCurrentProcess(), ctypes.byref(counters), counters.cb)
+        return counters.WorkingSetSize
+    with open('/proc/self/statm') as f:
+        return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+
+mode = sys.argv[1]
+sys.path.insert(0, sys.argv[2])
+os.chdir(sys.argv[3])
+
+rss_before = rss_bytes()
+started = time.perf_counter()
+import microphone_volume_keeper
+if mode == 'tray':
+    import tkinter, tkinter.ttk, tkinter.messagebox
+    import pystray
+    from PIL import Image, ImageDraw
+    import settings_dialog
+elapsed = time.perf_counter() - started
+
+print(json.dumps({'import_time': elapsed, 'rss': rss_bytes(), 'rss_delta': rss_bytes() - rss_before,
+                  'gui_loaded': 'tkinter' in sys.modules}))
+'''
+
+
+def measure(mode, runs, workdir):
+    """Runs the child script several times, returns the samples"""
+    samples = []
+    for _ in range(runs):
+        result = subprocess.run(
+            [sys.executable, '-c', CHILD_SCRIPT, mode, os.path.abspath(SRC_DIR), workdir],
+            capture_output=True, text=True, timeout=60)
+        if result.returncode != 0:
+            return None, result.stderr.strip().splitlines()[-1] if result.stderr.strip() else "failed"
+        samples.append(json.loads(result.stdout.strip().splitlines()[-1]))
+    return samples, None
+
+
+def summarize(samples):
+    """Median import time and RSS"""
+    return {
+        'import_time_ms': statistics.median(s['import_time'] for s in samples) * 1000,
+        'rss_mb': statistics.median(s['rss'] for s in samples) / (1024 * 1024),
+        'gui_loaded': samples[0]['gui_loaded'],
+    }
+
+
+def main(argv=None):
+    """Measures both modes and prints the difference"""
+    parser = argparse.ArgumentParser(description="Headless vs. tray startup cost")
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--json', help="write the results to this file")
+    options = parser.parse_args(argv)
+
+    # Run in a scratch directory so the keeper's log file does not land in the repo
+    workdir = tempfile.mkdtemp(prefix='mvk_startup_')
+
+    results = {}
+    for mode in ('headless', 'tray'):
+        samples, error = measure(mode, options.runs, workdir)
+        if samples is None:
+            print(f"{mode:<9} unavailable: {error}")
+            continue
+        results[mode] = summarize(samples)
+        r = results[mode]
+        print(f"{mode:<9} import {r['import_time_ms']:7.1f} ms   RSS {r['rss_mb']:6.1f} MB   "
+              f"GUI loaded: {r['gui_loaded']}")
+
+    if 'headless' in results and 'tray' in results:
+        saved_ms = results['tray']['import_time_ms'] - results['headless']['import_time_ms']
+        saved_mb = results['tray']['rss_mb'] - results['headless']['rss_mb']
+        print(f"headless saves {saved_ms:.1f} ms and {saved_mb:.1f} MB")
+
+    if options.json:
+        with open(options.json, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
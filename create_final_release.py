@@ -2,78 +2,468 @@
 """
 Creates final release packages for Microphone Volume Keeper
 Uses the current, corrected EXE and creates all deployment packages
+- Source ZIP members are compressed in a process pool (raw deflate) and
+  written by a small ZIP writer, large files are streamed in chunks
+- Every artifact is hashed while it is written: releases/SHA256SUMS and
+  releases/MANIFEST.json (sizes, member hashes, build time per artifact)
+- Artifacts are written to a temp file and replaced, releases/ is never
+  wiped - a failed build leaves the previous release intact
+- Incremental: each artifact is keyed on the hashes of its inputs
+  (.release_cache.json), unchanged ones are skipped
+- Reproducible ZIPs: sorted entries, fixed timestamps and permissions
+  (SOURCE_DATE_EPOCH if set) - same inputs, same bytes
+
+    python create_final_release.py [--dry-run] [--force]
 """
 
+import argparse
+import hashlib
+import json
 import os
 import shutil
-import zipfile
-from datetime import datetime
-
-def create_final_release():
-    """Creates the final release packages"""
+import struct
+import time
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+
+RELEASES_DIR = "releases"
+BUILD_CACHE = ".release_cache.json"
+# Bump when the artifact layout changes - invalidates every cached artifact
+BUILD_FORMAT = 1
+SOURCE_ZIP = "MicrophoneVolumeKeeper_Source_v2.0.0.zip"
+CHUNK_SIZE = 1024 * 1024
+# Members at least this big are streamed in chunks instead of compressed in the pool
+STREAM_THRESHOLD = 4 * 1024 * 1024
+# Below this much small-member data the pool costs more than it saves
+POOL_THRESHOLD = 512 * 1024
+
+SOURCE_FILES = [
+    "src/microphone_volume_keeper.py",
+    "src/powershell_worker.py",
+    "src/device_registry.py",
+    "src/audio_backends.py",
+    "src/scheduling.py",
+    "src/settings_dialog.py",
+    "src/metrics.py",
+    "src/tray_state.py",
+    "src/tray_icons.py",
+    "src/tray_menu.py",
+    "src/async_engine.py",
+    "src/settings_store.py",
+    "src/event_journal.py",
+    "src/logging_setup.py",
+    "src/backend_trace.py",
+    "src/control_api.py",
+    "src/keeper_ctl.py",
+    "src/drift_patterns.py",
+    "src/circuit_breaker.py",
+    "benchmarks/",
+    "tests/",
+    "src/fake_powershell.py",
+    "build/",
+    "docs/",
+    "README.md",
+    "requirements.txt",
+    ".gitignore",
+    "start_silent.pyw"
+]
+
+
+class HashingWriter:
+    """Write-only file wrapper that hashes everything passing through"""
+
+    def __init__(self, f):
+        self.f = f
+        self.sha256 = hashlib.sha256()
+        self.size = 0
+
+    def write(self, data):
+        self.sha256.update(data)
+        self.size += len(data)
+        return self.f.write(data)
+
+    def tell(self):
+        return self.size
+
+
+class ZipWriter:
+    """Minimal ZIP writer for members deflated elsewhere (PKWARE APPNOTE, no ZIP64)
+
+    zipfile has no public way to add data that is already compressed, so the
+    raw deflate streams from the pool get their headers here. Every entry has
+    the same timestamp, permissions and host system (reproducible).
+    """
+
+    def __init__(self, f, date_time):
+        self.f = f
+        year, month, day, hour, minute, second = date_time
+        self.dos_time = hour << 11 | minute << 5 | second // 2
+        self.dos_date = (year - 1980) << 9 | month << 5 | day
+        self.entries = []
+
+    def add_compressed(self, arcname, compressed, crc, size):
+        """Appends a member whose CRC and sizes are known up front"""
+        name, flags = self._name(arcname)
+        offset = self._offset()
+        self._check(len(compressed), size)
+        self.f.write(self._local_header(name, flags, crc, len(compressed), size))
+        self.f.write(compressed)
+        self.entries.append((name, flags, crc, len(compressed), size, offset))
+
+    def add_stream(self, arcname, path):
+        """Compresses a large file chunk by chunk (sizes in a data descriptor), returns its sha256"""
+        name, flags = self._name(arcname)
+        flags |= 0x08
+        offset = self._offset()
+        self.f.write(self._local_header(name, flags, 0, 0, 0))
+        compressor = zlib.compressobj(zlib.Z_DEFAULT_COMPRESSION, zlib.DEFLATED, -15)
+        sha256 = hashlib.sha256()
+        crc = size = compressed_size = 0
+        with open(path, 'rb') as source:
+            for chunk in iter(lambda: source.read(CHUNK_SIZE), b''):
+                sha256.update(chunk)
+                crc = zlib.crc32(chunk, crc)
+                size += len(chunk)
+                data = compressor.compress(chunk)
+                compressed_size += len(data)
+                self.f.write(data)
+        data = compressor.flush()
+        compressed_size += len(data)
+        self.f.write(data)
+        self._check(compressed_size, size)
+        self.f.write(struct.pack('<4I', 0x08074b50, crc, compressed_size, size))
+        self.entries.append((name, flags, crc, compressed_size, size, offset))
+        return sha256.hexdigest()
+
+    def close(self):
+        """Writes the central directory"""
+        start = self._offset()
+        for name, flags, crc, compressed_size, size, offset in self.entries:
+            self.f.write(struct.pack('<IHHHHHHIIIHHHHHII', 0x02014b50, 3 << 8 | 20, 20, flags,
+                                     zlib.DEFLATED, self.dos_time, self.dos_date, crc, compressed_size,
+                                     size, len(name), 0, 0, 0, 0, 0o100644 << 16, offset))
+            self.f.write(name)
+        end = self._offset()
+        if len(self.entries) > 0xFFFF:
+            raise ValueError(f"{len(self.entries)} members need ZIP64")
+        self.f.write(struct.pack('<IHHHHIIH', 0x06054b50, 0, 0, len(self.entries), len(self.entries),
+                                 end - start, start, 0))
+
+    def _local_header(self, name, flags, crc, compressed_size, size):
+        return struct.pack('<IHHHHHIIIHH', 0x04034b50, 20, flags, zlib.DEFLATED, self.dos_time,
+                           self.dos_date, crc, compressed_size, size, len(name), 0) + name
+
+    def _name(self, arcname):
+        """Encoded name and flags (bit 11: UTF-8 name)"""
+        try:
+            return arcname.encode('ascii'), 0
+        except UnicodeEncodeError:
+            return arcname.encode('utf-8'), 0x800
+
+    def _offset(self):
+        offset = self.f.tell()
+        self._check(offset)
+        return offset
+
+    @staticmethod
+    def _check(*values):
+        if any(value >= 0xFFFFFFFF for value in values):
+            raise ValueError("archive too large without ZIP64")
+
+
+def source_date():
+    """Build timestamp: SOURCE_DATE_EPOCH if set (reproducible), else now"""
+    epoch = os.environ.get('SOURCE_DATE_EPOCH')
+    return datetime.fromtimestamp(int(epoch), tz=timezone.utc) if epoch else datetime.now()
+
+
+def zip_date_time():
+    """Timestamp of every ZIP entry - ZIP cannot store dates before 1980"""
+    if not os.environ.get('SOURCE_DATE_EPOCH'):
+        return (1980, 1, 1, 0, 0, 0)
+    return max(source_date().timetuple()[:6], (1980, 1, 1, 0, 0, 0))
+
+
+def file_sha256(path):
+    """sha256 of a file, read in chunks"""
+    sha256 = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b''):
+            sha256.update(chunk)
+    return sha256.hexdigest()
+
+
+class BuildCache:
+    """Inputs and outputs of the last build per artifact
+
+    File hashes are reused while size and mtime stay the same, so an
+    unchanged 25 MB EXE is not read again just to find out it is unchanged.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.files = {}
+        self.artifacts = {}
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get('format') == BUILD_FORMAT:
+                self.files = data.get('files', {})
+                self.artifacts = data.get('artifacts', {})
+        except (OSError, ValueError):
+            pass
+
+    def file_hash(self, path):
+        """Content hash of an input file"""
+        st = os.stat(path)
+        cached = self.files.get(path)
+        if cached and cached[0] == st.st_size and cached[1] == st.st_mtime_ns:
+            return cached[2]
+        digest = file_sha256(path)
+        self.files[path] = [st.st_size, st.st_mtime_ns, digest]
+        return digest
+
+    def stale_reason(self, name, target, inputs):
+        """Why an artifact has to be rebuilt, None if it is up to date"""
+        entry = self.artifacts.get(name)
+        if entry is None:
+            return "not built yet"
+        if not os.path.isfile(target):
+            return "output missing"
+        st = os.stat(target)
+        if [st.st_size, st.st_mtime_ns] != entry.get('output'):
+            return "output modified"
+        previous = entry.get('inputs', {})
+        if previous == inputs:
+            return None
+        changed = sorted(key for key in inputs if key in previous and previous[key] != inputs[key])
+        added = sorted(key for key in inputs if key not in previous)
+        removed = sorted(key for key in previous if key not in inputs)
+        parts = []
+        for label, keys in (("changed", changed), ("added", added), ("removed", removed)):
+            if keys:
+                more = f" (+{len(keys) - 3} more)" if len(keys) > 3 else ""
+                parts.append(f"{label}: {', '.join(keys[:3])}{more}")
+        return "; ".join(parts)
+
+    def store(self, name, target, inputs, entry):
+        """Records a finished build"""
+        st = os.stat(target)
+        self.artifacts[name] = dict(entry, inputs=inputs, output=[st.st_size, st.st_mtime_ns])
+
+    def save(self, names):
+        """Writes the cache, forgetting artifacts and files no longer built"""
+        self.artifacts = {name: entry for name, entry in self.artifacts.items() if name in names}
+        used = {path for entry in self.artifacts.values() for path in entry.get('paths', ())}
+        self.files = {path: value for path, value in self.files.items() if path in used}
+        temp_path = self.path + '.tmp'
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump({'format': BUILD_FORMAT, 'files': self.files, 'artifacts': self.artifacts}, f)
+        os.replace(temp_path, self.path)
+
+
+def compress_member(path):
+    """Pool worker: (raw deflate data, crc32, size, sha256) of one small file"""
+    with open(path, 'rb') as f:
+        data = f.read()
+    compressor = zlib.compressobj(zlib.Z_DEFAULT_COMPRESSION, zlib.DEFLATED, -15)
+    compressed = compressor.compress(data) + compressor.flush()
+    return compressed, zlib.crc32(data), len(data), hashlib.sha256(data).hexdigest()
+
+
+def collect_files(items):
+    """(path, arcname) of every file in the list (directories walked), sorted by arcname"""
+    files = []
+    for item in items:
+        if os.path.isfile(item):
+            files.append((item, item))
+        elif os.path.isdir(item):
+            for root, dirs, names in os.walk(item):
+                dirs[:] = [name for name in dirs if name != '__pycache__']
+                for name in names:
+                    file_path = os.path.join(root, name)
+                    files.append((file_path, os.path.relpath(file_path, ".").replace(os.sep, '/')))
+    return sorted(files, key=lambda file: file[1])
+
+
+def build_zip(target, files):
+    """Writes a ZIP of files (small ones deflated in parallel), returns (sha256, size, member hashes)"""
+    small = [path for path, _ in files if os.path.getsize(path) < STREAM_THRESHOLD]
+    small_bytes = sum(os.path.getsize(path) for path in small)
+
+    if small_bytes >= POOL_THRESHOLD and (os.cpu_count() or 1) > 1:
+        with ProcessPoolExecutor() as pool:
+            compressed = dict(zip(small, pool.map(compress_member, small, chunksize=4)))
+    else:
+        compressed = {path: compress_member(path) for path in small}
+
+    members = {}
+    temp_path = target + '.tmp'
+    with open(temp_path, 'wb') as f:
+        writer = HashingWriter(f)
+        zipf = ZipWriter(writer, zip_date_time())
+        for path, arcname in files:
+            if path in compressed:
+                data, crc, size, members[arcname] = compressed.pop(path)
+                zipf.add_compressed(arcname, data, crc, size)
+            else:
+                members[arcname] = zipf.add_stream(arcname, path)
+        zipf.close()
+    os.replace(temp_path, target)
+    return writer.sha256.hexdigest(), writer.size, members
+
+
+def copy_artifact(target, source):
+    """Streams a file into releases/ in chunks, returns (sha256, size)"""
+    sha256 = hashlib.sha256()
+    size = 0
+    temp_path = target + '.tmp'
+    with open(source, 'rb') as src, open(temp_path, 'wb') as dst:
+        for chunk in iter(lambda: src.read(CHUNK_SIZE), b''):
+            sha256.update(chunk)
+            size += len(chunk)
+            dst.write(chunk)
+    shutil.copystat(source, temp_path)
+    os.replace(temp_path, target)
+    return sha256.hexdigest(), size
+
+
+def write_artifact(target, text):
+    """Writes a text artifact, returns (sha256, size)"""
+    data = text.encode('utf-8')
+    temp_path = target + '.tmp'
+    with open(temp_path, 'wb') as f:
+        f.write(data)
+    os.replace(temp_path, target)
+    return hashlib.sha256(data).hexdigest(), len(data)
+
+
+def write_manifest(releases_dir, artifacts):
+    """SHA256SUMS (sha256sum -c) and MANIFEST.json"""
+    lines = "".join(f"{entry['sha256']}  {name}\n" for name, entry in sorted(artifacts.items()))
+    write_artifact(os.path.join(releases_dir, "SHA256SUMS"), lines)
+    manifest = {'version': '2.0.0', 'created': source_date().isoformat(timespec='seconds'),
+                'artifacts': artifacts}
+    write_artifact(os.path.join(releases_dir, "MANIFEST.json"), json.dumps(manifest, indent=2) + "\n")
+
+
+def stale_files(releases_dir, names):
+    """Files in releases/ no build step produces (older builds, temp files)"""
+    keep = set(names) | {"SHA256SUMS", "MANIFEST.json"}
+    return sorted(name for name in os.listdir(releases_dir)
+                  if name not in keep and os.path.isfile(os.path.join(releases_dir, name)))
+
+
+class ReleaseBuild:
+    """One run: unchanged artifacts are kept, stale ones rebuilt (or only listed with dry_run)"""
+
+    def __init__(self, releases_dir, cache, dry_run=False, force=False):
+        self.releases_dir = releases_dir
+        self.cache = cache
+        self.dry_run = dry_run
+        self.force = force
+        self.artifacts = {}
+        self.rebuilt = []
+
+    def artifact(self, name, inputs, paths, build, *args):
+        """Builds releases/name with build(target, *args) unless its inputs are unchanged
+
+        inputs: {input: content hash} - the cache key, paths: input files
+        """
+        target = os.path.join(self.releases_dir, name)
+        reason = "forced" if self.force else self.cache.stale_reason(name, target, inputs)
+        if reason is None:
+            entry = self.cache.artifacts[name]
+            self.artifacts[name] = {key: entry[key] for key in ('sha256', 'size', 'seconds', 'members')
+                                    if key in entry}
+            print(f"⏭️  {name:<50} unchanged")
+            return
+        self.rebuilt.append(name)
+        if self.dry_run:
+            print(f"🔨 {name:<50} would be rebuilt: {reason}")
+            return
+
+        started = time.perf_counter()
+        result = build(target, *args)
+        seconds = time.perf_counter() - started
+        entry = {'sha256': result[0], 'size': result[1], 'seconds': round(seconds, 3)}
+        if len(result) > 2:
+            entry['members'] = result[2]
+        self.artifacts[name] = entry
+        self.cache.store(name, target, inputs, dict(entry, paths=paths))
+        print(f"✅ {name:<50} {result[1] / (1024 * 1024):7.1f} MB  {seconds:6.2f}s  ({reason})")
+
+    def copy(self, name, source):
+        """Artifact copied unchanged from source"""
+        self.artifact(name, {source: self.cache.file_hash(source)}, [source], copy_artifact, source)
+
+    def zip(self, name, files):
+        """Reproducible ZIP of (path, arcname) files"""
+        inputs = {arcname: self.cache.file_hash(path) for path, arcname in files}
+        inputs['@date_time'] = list(zip_date_time())
+        self.artifact(name, inputs, [path for path, _ in files], build_zip, files)
+
+    def text(self, name, text):
+        """Generated text file"""
+        inputs = {'@text': hashlib.sha256(text.encode('utf-8')).hexdigest()}
+        self.artifact(name, inputs, [], write_artifact, text)
+
+    def finish(self):
+        """Checksums, cleanup of stale files and the cache - nothing written with dry_run"""
+        names = list(self.artifacts) + [name for name in self.rebuilt if name not in self.artifacts]
+        stale = stale_files(self.releases_dir, names)
+        if self.dry_run:
+            for name in stale:
+                print(f"🗑️  {name:<50} would be removed")
+            print(f"\n🔍 Dry run: {len(self.rebuilt)} of {len(names)} artifacts would be rebuilt")
+            return
+        for name in stale:
+            os.remove(os.path.join(self.releases_dir, name))
+        manifest_missing = not all(os.path.isfile(os.path.join(self.releases_dir, name))
+                                   for name in ("SHA256SUMS", "MANIFEST.json"))
+        if self.rebuilt or stale or manifest_missing:
+            write_manifest(self.releases_dir, self.artifacts)
+            print("✅ SHA256SUMS and MANIFEST.json written")
+        self.cache.save(set(self.artifacts))
+
+
+def create_final_release(dry_run=False, force=False):
+    """Creates the final release packages (only those whose inputs changed)"""
     
     print("🚀 Creating Final Release Packages for Microphone Volume Keeper v2.0.0")
     print("=" * 80)
     
-    # Create releases directory
-    releases_dir = "releases"
-    if os.path.exists(releases_dir):
-        shutil.rmtree(releases_dir)
-    os.makedirs(releases_dir)
-    
+    started = time.perf_counter()
+    releases_dir = RELEASES_DIR
+    os.makedirs(releases_dir, exist_ok=True)
+    release = ReleaseBuild(releases_dir, BuildCache(BUILD_CACHE), dry_run=dry_run, force=force)
+
     # Check if current EXE exists
     if not os.path.exists("dist/MicrophoneVolumeKeeper.exe"):
         print("❌ Current EXE not found! Please build first.")
         return
-    
+
     print("✅ Found current EXE: dist/MicrophoneVolumeKeeper.exe")
-    
-    # 1. Copy standalone EXE
-    shutil.copy("dist/MicrophoneVolumeKeeper.exe", f"{releases_dir}/MicrophoneVolumeKeeper.exe")
-    print("✅ Standalone EXE copied to releases/")
-    
-    # 2. Copy Professional Package (if exists)
+
+    # 1. Standalone EXE (streamed in chunks, hashed on the way)
+    release.copy("MicrophoneVolumeKeeper.exe", "dist/MicrophoneVolumeKeeper.exe")
+
+    # 2. Professional Package (if exists)
     if os.path.exists("MicrophoneVolumeKeeper_Professional_v2.0.zip"):
-        shutil.copy("MicrophoneVolumeKeeper_Professional_v2.0.zip", 
-                   f"{releases_dir}/MicrophoneVolumeKeeper_Professional_v2.0.zip")
-        print("✅ Professional Package copied to releases/")
-    
-    # 3. Copy Portable Package (if exists)
+        release.copy("MicrophoneVolumeKeeper_Professional_v2.0.zip", "MicrophoneVolumeKeeper_Professional_v2.0.zip")
+
+    # 3. Portable Package (if exists)
     if os.path.exists("MicrophoneVolumeKeeper_Portable.zip"):
-        shutil.copy("MicrophoneVolumeKeeper_Portable.zip", 
-                   f"{releases_dir}/MicrophoneVolumeKeeper_Portable.zip")
-        print("✅ Portable Package copied to releases/")
-    
-    # 4. Create Source Code ZIP
-    print("📦 Creating source code package...")
-    source_files = [
-        "src/microphone_volume_keeper.py",
-        "build/",
-        "docs/",
-        "README.md",
-        "requirements.txt",
-        ".gitignore",
-        "start_silent.pyw"
-    ]
-    
-    with zipfile.ZipFile(f"{releases_dir}/MicrophoneVolumeKeeper_Source_v2.0.0.zip", 'w', zipfile.ZIP_DEFLATED) as zipf:
-        for item in source_files:
-            if os.path.exists(item):
-                if os.path.isfile(item):
-                    zipf.write(item, item)
-                else:
-                    for root, dirs, files in os.walk(item):
-                        for file in files:
-                            file_path = os.path.join(root, file)
-                            arc_name = os.path.relpath(file_path, ".")
-                            zipf.write(file_path, arc_name)
-    
-    print("✅ Source code package created")
-    
+        release.copy("MicrophoneVolumeKeeper_Portable.zip", "MicrophoneVolumeKeeper_Portable.zip")
+
+    # 4. Source Code ZIP
+    release.zip(SOURCE_ZIP, collect_files(SOURCE_FILES))
+
     # 5. Create Release Notes
     release_notes = f"""# 🎤 Microphone Volume Keeper v2.0.0 - Professional Edition
 
-**Release Date:** {datetime.now().strftime("%Y-%m-%d")}
+**Release Date:** {source_date().strftime("%Y-%m-%d")}
 
 ## 📦 Download Options
 
@@ -109,7 +499,7 @@ def create_final_release():
 
 ### 🎛️ Advanced Configuration
 - **Audio Device Selection** - Choose specific microphones (Elgato Wave:3, Blue Yeti, etc.)
-- **Adjustable Target Volume** - Set any volume from 1% to 100%
+- **Adjustable Target Volume** - Set any volume from 0% to 100%
 - **Configurable Sampling Rate** - 0.1s to 5.0s response time
 - **Persistent Settings** - Automatic save/load of all configurations
 
@@ -158,10 +548,7 @@ Install-Module AudioDeviceCmdlets -Force
 *If this tool helps you, please ⭐ star the repository!*
 """
     
-    with open(f"{releases_dir}/RELEASE_NOTES.md", "w", encoding="utf-8") as f:
-        f.write(release_notes)
-    
-    print("✅ Release notes created")
+    release.text("RELEASE_NOTES.md", release_notes)
     
     # 6. Create installation instructions
     install_instructions = """# 📥 Installation Instructions
@@ -246,20 +633,22 @@ Install-Module AudioDeviceCmdlets -Force
 - **Documentation:** See README.md for complete guide
 """
     
-    with open(f"{releases_dir}/INSTALLATION.md", "w", encoding="utf-8") as f:
-        f.write(install_instructions)
-    
-    print("✅ Installation instructions created")
+    release.text("INSTALLATION.md", install_instructions)
+
+    # 7. Checksums of everything above, cleanup, build cache
+    release.finish()
+    if dry_run:
+        return
     
     # Summary
     print("\n" + "=" * 80)
     print("🎉 FINAL RELEASE PACKAGES CREATED!")
     print("=" * 80)
-    print(f"📁 All files in: {releases_dir}/")
+    print(f"📁 All files in: {releases_dir}/ ({time.perf_counter() - started:.2f}s)")
     print()
     
     # List all files
-    for file in os.listdir(releases_dir):
+    for file in sorted(os.listdir(releases_dir)):
         file_path = os.path.join(releases_dir, file)
         if os.path.isfile(file_path):
             size = os.path.getsize(file_path)
@@ -270,4 +659,8 @@ Install-Module AudioDeviceCmdlets -Force
     print("📋 Upload all files from releases/ folder to GitHub")
 
 if __name__ == "__main__":
-    create_final_release()
+    parser = argparse.ArgumentParser(description="Create the release packages in releases/")
+    parser.add_argument('--dry-run', action='store_true', help="only show what would be rebuilt and why")
+    parser.add_argument('--force', action='store_true', help="rebuild every artifact, ignoring the cache")
+    options = parser.parse_args()
+    create_final_release(dry_run=options.dry_run, force=options.force)
@@ -0,0 +1,428 @@
+#!/usr/bin/env python3
+"""
+Async Engine - optional asyncio monitoring loop (setting "engine": "asyncio")
+- AsyncPowerShellWorker: the worker protocol on asyncio.create_subprocess_exec,
+  a timed-out or cancelled request kills the child process
+- AsyncCmdletsDriver / AsyncExecutorDriver: awaitable ensure_volumes() for the
+  PowerShell backend and for blocking in-process backends (thread pool,
+  all devices concurrently)
+- AsyncMonitorEngine: the monitoring loop of the keeper on its own event loop;
+  stop and settings changes wake it at once, a stop during a hung backend call
+  cancels that call
+The threaded loop in microphone_volume_keeper.py stays the default.
+"""
+
+import asyncio
+import concurrent.futures
+import functools
+import itertools
+import json
+import logging
+import subprocess
+import threading
+import time
+
+from audio_backends import AudioDeviceCmdletsBackend, BackendTimeoutError
+from circuit_breaker import HALF_OPEN
+from powershell_worker import (CREATE_NO_WINDOW, PowerShellCommandError, PowerShellWorkerError,
+                               PowerShellWorkerTimeout, build_powershell_command)
+
+
+class AsyncPowerShellWorker:
+    """PowerShellWorker counterpart for asyncio - requests can be pipelined and cancelled"""
+
+    def __init__(self, command=None, timeout=10.0, start_timeout=15.0):
+        self.command = command or build_powershell_command()
+        self.timeout = timeout
+        self.start_timeout = start_timeout
+
+        self.process = None
+        self.module_loaded = False
+        self.respawn_count = 0
+        self.spawn_count = 0
+
+        self._ids = itertools.count(1)
+        self._pending = {}
+        self._reader = None
+        self._start_lock = None
+
+    def is_alive(self):
+        """True while the shell process is running"""
+        return self.process is not None and self.process.returncode is None
+
+    async def start(self):
+        """Starts the shell process (no-op if already running)"""
+        await self._ensure_started()
+        return self.module_loaded
+
+    async def close(self):
+        """Stops the shell process"""
+        process = self.process
+        self.kill()
+        if process is not None:
+            # Reaps the child - its pipes are closed before the event loop goes away
+            await process.wait()
+        if self._reader:
+            await asyncio.gather(self._reader, return_exceptions=True)
+            self._reader = None
+
+    async def request(self, op, timeout=None, **args):
+        """Sends one request and returns its result"""
+        timeout = self.timeout if timeout is None else timeout
+        try:
+            return await self._roundtrip(op, args, timeout)
+        except (PowerShellWorkerTimeout, PowerShellCommandError):
+            raise
+        except PowerShellWorkerError as e:
+            # Shell crashed mid-request - respawn once and retry
+            logging.warning(f"PowerShell worker lost ({e}), respawning")
+            return await self._roundtrip(op, args, timeout)
+
+    def kill(self):
+        """Kills the shell and fails every request still waiting for it"""
+        process, self.process = self.process, None
+        if process is not None:
+            try:
+                process.kill()
+            except ProcessLookupError:
+                pass
+        for future in self._pending.values():
+            if not future.done():
+                future.set_result(None)
+
+    async def _roundtrip(self, op, args, timeout):
+        """Writes one frame and waits for the matching response"""
+        await self._ensure_started()
+
+        request_id = next(self._ids)
+        future = asyncio.get_running_loop().create_future()
+        self._pending[request_id] = future
+        try:
+            frame = json.dumps({'id': request_id, 'op': op, 'args': args})
+            try:
+                self.process.stdin.write((frame + '\n').encode('utf-8'))
+                await self.process.stdin.drain()
+            except (OSError, AttributeError) as e:
+                self.kill()
+                raise PowerShellWorkerError(f"write failed: {e}")
+
+            try:
+                response = await asyncio.wait_for(future, timeout)
+            except asyncio.TimeoutError:
+                self.kill()
+                raise PowerShellWorkerTimeout(f"'{op}' timed out after {timeout}s")
+            except asyncio.CancelledError:
+                # Caller gave up (stop, outer timeout) - the shell may still be stuck in the call
+                self.kill()
+                raise
+        finally:
+            self._pending.pop(request_id, None)
+
+        if response is None:
+            raise PowerShellWorkerError("process exited")
+        if not response.get('ok'):
+            raise PowerShellCommandError(response.get('error') or f"'{op}' failed")
+        return response.get('result')
+
+    async def _ensure_started(self):
+        """Spawns the shell if it is not running"""
+        if self.is_alive():
+            return
+        if self._start_lock is None:
+            self._start_lock = asyncio.Lock()
+
+        async with self._start_lock:
+            if self.is_alive():
+                return
+            if self.spawn_count:
+                self.respawn_count += 1
+            self.kill()
+
+            self.process = await asyncio.create_subprocess_exec(
+                *self.command,
+                stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+                creationflags=CREATE_NO_WINDOW, limit=2 ** 20)
+            self.spawn_count += 1
+
+            ready = asyncio.get_running_loop().create_future()
+            self._reader = asyncio.create_task(self._read_frames(self.process, ready))
+
+            # First frame announces whether AudioDeviceCmdlets could be imported
+            try:
+                frame = await asyncio.wait_for(ready, self.start_timeout)
+            except asyncio.TimeoutError:
+                frame = None
+            if not frame or not frame.get('ready'):
+                self.kill()
+                raise PowerShellWorkerError("worker did not become ready")
+
+            self.module_loaded = bool(frame.get('module'))
+            logging.info(f"Async PowerShell worker started (pid {self.process.pid}, "
+                         f"module loaded: {self.module_loaded})")
+
+    async def _read_frames(self, process, ready):
+        """Reader task - resolves the futures of the matching requests"""
+        try:
+            while True:
+                line = await process.stdout.readline()
+                if not line:
+                    break
+                line = line.decode('utf-8', 'replace').strip()
+                if not line:
+                    continue
+                try:
+                    frame = json.loads(line)
+                except ValueError:
+                    # Stray host output (warnings, banners) is not part of the protocol
+                    logging.debug(f"PowerShell worker: ignoring '{line[:100]}'")
+                    continue
+                if not isinstance(frame, dict) or 'id' not in frame:
+                    # Ready frame; volume events are taken from the backend's own worker
+                    if frame and isinstance(frame, dict) and frame.get('ready') and not ready.done():
+                        ready.set_result(frame)
+                    continue
+                future = self._pending.get(frame.get('id'))
+                if future and not future.done():
+                    future.set_result(frame)
+        except (OSError, ValueError):
+            pass
+
+        if not ready.done():
+            ready.set_result(None)
+        if self.process is process:
+            self.kill()
+
+
+class AsyncCmdletsDriver:
+    """ensure op through an AsyncPowerShellWorker"""
+
+    def __init__(self, worker):
+        self.worker = worker
+
+    async def ensure_volumes(self, requests):
+        """Read-compare-set for all endpoints in a single worker round-trip"""
+        items = [{'device_id': device_id, 'target': int(target_volume), 'tolerance': tolerance}
+                 for device_id, target_volume, tolerance in requests]
+        try:
+            outcomes = await self.worker.request('ensure', items=items) or []
+        except PowerShellWorkerError as e:
+            raise AudioDeviceCmdletsBackend.backend_error(e)
+        return [(outcome['before'], outcome['after']) if outcome else None
+                for outcome in outcomes]
+
+    async def close(self):
+        """Stops the async shell"""
+        await self.worker.close()
+
+
+class AsyncExecutorDriver:
+    """Blocking backends on a thread pool - one call per device, all concurrently"""
+
+    def __init__(self, backend, executor):
+        self.backend = backend
+        self.executor = executor
+
+    async def ensure_volumes(self, requests):
+        """Read-compare-set per device, None for devices that failed"""
+        loop = asyncio.get_running_loop()
+        results = await asyncio.gather(
+            *(loop.run_in_executor(self.executor, self.backend.ensure_volumes, [request])
+              for request in requests),
+            return_exceptions=True)
+
+        errors = [result for result in results if isinstance(result, Exception)]
+        if errors and len(errors) == len(results):
+            raise errors[0]
+        for error in errors:
+            logging.error(f"{self.backend.name} error: {error}")
+        return [None if isinstance(result, Exception) else result[0] for result in results]
+
+    async def close(self):
+        """The backend itself is closed by the keeper"""
+
+
+def make_async_driver(backend, executor, timeout=10.0):
+    """Driver for the keeper's backend"""
+    if isinstance(backend, AudioDeviceCmdletsBackend):
+        # Second shell with the same command - the backend's own worker keeps
+        # serving device lists and volume events
+        return AsyncCmdletsDriver(AsyncPowerShellWorker(command=backend.worker.command, timeout=timeout))
+    return AsyncExecutorDriver(backend, executor)
+
+
+class AsyncMonitorEngine:
+    """Monitoring loop of a MicrophoneVolumeKeeperAdvanced on an asyncio event loop"""
+
+    def __init__(self, keeper, call_timeout=10.0, stop_grace=0.5):
+        self.keeper = keeper
+        self.call_timeout = call_timeout
+        self.stop_grace = stop_grace
+
+        self.loop = None
+        self.thread = None
+        self.driver = None
+        self._task = None
+        self._wake = None
+        self._started = threading.Event()
+        self._executor = None
+
+    def start(self):
+        """Starts the event loop thread"""
+        self._started.clear()
+        self.thread = threading.Thread(target=asyncio.run, args=(self._main(),), daemon=True)
+        self.thread.start()
+        self._started.wait(timeout=2)
+
+    def wake(self):
+        """Ends the current wait right away (thread-safe)"""
+        loop = self.loop
+        if loop is None:
+            return
+        try:
+            loop.call_soon_threadsafe(self._wake.set)
+        except RuntimeError:
+            # Loop already closed
+            pass
+
+    def stop(self):
+        """Lets the loop finish, cancels a backend call that does not return in time"""
+        if not self.thread:
+            return
+        self.wake()
+        self.thread.join(timeout=self.stop_grace)
+        if self.thread.is_alive():
+            logging.info("Cancelling pending backend call")
+            try:
+                self.loop.call_soon_threadsafe(self._task.cancel)
+            except RuntimeError:
+                pass
+            self.thread.join(timeout=2)
+
+    async def _main(self):
+        """Event loop entry point"""
+        self.loop = asyncio.get_running_loop()
+        self._task = asyncio.current_task()
+        self._wake = asyncio.Event()
+        self._executor = concurrent.futures.ThreadPoolExecutor(max_workers=4, thread_name_prefix='mvk-backend')
+        self.driver = make_async_driver(self.keeper.backend, self._executor, self.call_timeout)
+        self._started.set()
+
+        try:
+            await self._monitor()
+        except asyncio.CancelledError:
+            logging.info("Async monitoring cancelled")
+        except Exception as e:
+            logging.error(f"Error in async monitoring loop: {e}")
+        finally:
+            await self.driver.close()
+            # Unsubscribing talks to the backend - do not wait for a hung one
+            self._executor.submit(self.keeper.unsubscribe_volume_events)
+            self._executor.shutdown(wait=False)
+            self.loop = None
+
+    async def _in_thread(self, function, *args):
+        """Runs blocking keeper/backend code on the thread pool"""
+        return await self.loop.run_in_executor(self._executor, functools.partial(function, *args))
+
+    async def _wait(self, timeout):
+        """Sleeps until the timeout or a wake()"""
+        try:
+            await asyncio.wait_for(self._wake.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+        self._wake.clear()
+
+    async def _monitor(self):
+        """Same flow as monitor_volume(), backend calls are awaited"""
+        keeper = self.keeper
+        targets = keeper.active_targets()
+        event_driven = await self._in_thread(keeper.subscribe_volume_events, targets)
+        mode = "events" if event_driven else "polling"
+        devices = ", ".join(target['device'] for target in targets)
+        logging.info(f"Volume monitoring started (Engine: asyncio, Methode: {keeper.audio_method}, "
+                     f"Device: {devices}, Mode: {mode})")
+
+        # Check once right away instead of waiting for the first event
+        if event_driven:
+            self._wake.set()
+        keeper.poll_interval.reset_stats()
+        if keeper.drift_patterns:
+            keeper.drift_patterns.reset_stats()
+        last_check_at = time.perf_counter()
+
+        while keeper.running:
+            try:
+                tick_started = time.thread_time()
+
+                # External edits of the settings file (amortized stat)
+                keeper.check_settings_file()
+
+                current_targets = keeper.active_targets()
+                devices_changed, keeper.devices_changed = keeper.devices_changed, False
+                check_now = False
+                if devices_changed or [t['device'] for t in current_targets] != [t['device'] for t in targets]:
+                    # Devices changed in the settings or were (re)plugged - follow them
+                    # with the subscriptions and check right away
+                    await self._in_thread(keeper.unsubscribe_volume_events)
+                    event_driven = await self._in_thread(keeper.subscribe_volume_events, current_targets)
+                    check_now = True
+                targets = current_targets
+
+                # Backend keeps failing - wait for the breaker instead of calling it every interval
+                if not keeper.backend_breaker.allow():
+                    await self._wait(keeper.backend_breaker.retry_in())
+                    continue
+
+                # After a breaker backoff the probe runs right away instead of
+                # idling until the fallback poll
+                if event_driven and keeper.backend_breaker.state != HALF_OPEN and not check_now:
+                    await self._wait(keeper.event_fallback_interval)
+                    if not keeper.running:
+                        break
+
+                # Every check is one read-compare-set round-trip, events only wake the loop
+                events, keeper.pending_event_volumes = keeper.pending_event_volumes, {}
+                check_started = time.perf_counter()
+                detected_at = keeper.first_event_at if events else last_check_at
+                keeper.first_event_at = None
+
+                activity = await self._check(targets, detected_at)
+
+                last_check_at = time.perf_counter()
+                keeper.metrics.observe('tick_seconds', last_check_at - check_started)
+                keeper.metrics.inc('ticks_total')
+                keeper.publish_state()
+
+                if not event_driven:
+                    interval = keeper.next_poll_interval(activity, targets)
+                    keeper.poll_interval.record_tick(interval, time.thread_time() - tick_started)
+
+                    # Stop and settings changes wake the loop early
+                    await self._wait(interval)
+
+            except Exception as e:
+                logging.error(f"Error in async monitoring loop: {e}")
+                await self._wait(keeper.check_interval)
+
+        if not event_driven:
+            keeper.log_polling_stats()
+
+    async def _check(self, targets, detected_at):
+        """One ensure call for all targets, bounded by call_timeout"""
+        keeper = self.keeper
+        targets, requests = await self._in_thread(keeper.ensure_requests, targets)
+        if not requests:
+            return False
+        try:
+            with keeper.metrics.histogram('backend_ensure_seconds').time():
+                outcomes = await asyncio.wait_for(self.driver.ensure_volumes(requests), self.call_timeout)
+        except asyncio.TimeoutError:
+            error = BackendTimeoutError(f"ensure timed out after {self.call_timeout}s")
+            logging.error(f"{keeper.audio_method} error: {error}")
+            keeper.record_backend_failure(error)
+            return False
+        except Exception as e:
+            logging.error(f"{keeper.audio_method} error: {e}")
+            keeper.record_backend_failure(e)
+            return False
+        return keeper.apply_ensure_outcomes(targets, requests, outcomes, detected_at)
@@ -0,0 +1,668 @@
+#!/usr/bin/env python3
+"""
+Audio Backends - volume access used by the keeper
+Every backend implements the same small protocol (AudioBackend):
+get_volume, set_volume, list_devices and subscribe. The BackendRegistry
+probes the registered backends in order, measures what a volume read costs
+and picks the cheapest one that works:
+- CoreAudio: in-process endpoint volume via pycaw/comtypes (fast path)
+- AudioDeviceCmdlets: persistent PowerShell worker
+- Simulation: in-memory device (fallback, demo mode, benchmarks, Linux)
+"""
+
+import collections
+import logging
+import random
+import statistics
+import threading
+import time
+
+from powershell_worker import (PowerShellCommandError, PowerShellWorker, PowerShellWorkerTimeout,
+                               parse_volume_output)
+
+
+class AudioBackendError(Exception):
+    """Raised when a backend cannot read or write a volume"""
+
+
+class DeviceUnavailableError(AudioBackendError):
+    """Raised when the addressed endpoint does not exist (anymore)"""
+
+
+class BackendTimeoutError(AudioBackendError):
+    """Raised when the backend did not answer in time"""
+
+
+class AudioBackend:
+    """Protocol for volume backends - subclasses override what they support"""
+
+    # Name shown in the tray menu/logs and used in the settings
+    name = None
+    # Tray icon colour while this backend is active ("active" or "simulation")
+    icon_status = "active"
+    # True if subscribe() delivers volume-change callbacks
+    supports_events = False
+
+    @property
+    def respawn_count(self):
+        """How often a helper process had to be restarted"""
+        return 0
+
+    def probe(self):
+        """True if the backend works on this machine"""
+        return True
+
+    def get_volume(self, device_id=None):
+        """Returns the volume (0-100) of an endpoint, None = default device"""
+        raise NotImplementedError
+
+    def set_volume(self, volume, device_id=None):
+        """Sets the volume (0-100) of an endpoint, None = default device"""
+        raise NotImplementedError
+
+    def get_volumes(self, device_ids):
+        """Reads several endpoints at once, None for endpoints that failed
+
+        Backends with a per-call overhead override this with one round-trip.
+        """
+        volumes = []
+        for device_id in device_ids:
+            try:
+                volumes.append(self.get_volume(device_id))
+            except AudioBackendError as e:
+                logging.warning(f"{self.name}: could not read {device_id or 'default device'}: {e}")
+                volumes.append(None)
+        return volumes
+
+    def ensure_volumes(self, requests):
+        """Reads, compares and corrects several endpoints at once
+
+        requests is a list of (device_id, target_volume, tolerance). Returns a
+        list of (before, after) per request - after is None if the set failed,
+        the whole entry is None if the endpoint could not be read. Backends
+        with a per-call overhead override this with one round-trip.
+        """
+        requests = list(requests)
+        outcomes = []
+        for (device_id, target_volume, tolerance), before in zip(
+                requests, self.get_volumes([request[0] for request in requests])):
+            if before is None:
+                outcomes.append(None)
+                continue
+            after = before
+            if abs(before - target_volume) > tolerance:
+                try:
+                    after = target_volume if self.set_volume(target_volume, device_id) else None
+                except AudioBackendError as e:
+                    logging.warning(f"{self.name}: could not set {device_id or 'default device'}: {e}")
+                    after = None
+            outcomes.append((before, after))
+        return outcomes
+
+    def ensure_volume(self, target_volume, tolerance, device_id=None):
+        """Single-endpoint ensure_volumes(), returns (before, after) or None"""
+        return self.ensure_volumes([(device_id, target_volume, tolerance)])[0]
+
+    def list_devices(self):
+        """Returns the recording devices as [{'id', 'name', 'default'}, ...]"""
+        return []
+
+    def subscribe(self, callback, device_id=None):
+        """Registers callback(device_id, volume) for volume changes, returns unsubscribe()"""
+        raise NotImplementedError(f"{self.name} does not support volume events")
+
+    def subscribe_device_changes(self, callback):
+        """Registers callback() for devices being added or removed, returns unsubscribe()
+
+        None if the backend cannot tell - the device registry then only notices
+        changes when it enumerates (TTL, failed lookups, missing watched devices).
+        """
+        return None
+
+    def close(self):
+        """Releases processes/handles held by the backend"""
+
+
+class SimulatedAudioBackend(AudioBackend):
+    """Simulated recording devices for demo mode, benchmarks and Linux"""
+
+    name = "Simulation"
+    icon_status = "simulation"
+    supports_events = True
+
+    def __init__(self, volume=100, drift_fractions=(0.8, 0.75, 0.9, 1.0),
+                 seed=None, clock=time.monotonic, device_names=("Simulated Microphone",),
+                 latency=0.0):
+        self.drift_fractions = drift_fractions
+        self.random = random.Random(seed)
+        self.clock = clock
+        # Injected per-call delay (benchmarks: a slow real backend)
+        self.latency = latency
+
+        # The first device is the default recording device
+        self.devices = [{'id': f"simulation-{index}", 'name': name, 'default': index == 0}
+                        for index, name in enumerate(device_names)]
+        self.volumes = {device['id']: volume for device in self.devices}
+
+        self._lock = threading.Lock()
+        # device_id -> [callback], callbacks under None get every device
+        self._subscribers = {}
+        self._device_subscribers = []
+        self._drift_thread = None
+        self._drift_stop = threading.Event()
+
+        # Latency from an external change until the volume was set back
+        self.external_changes = {}
+        self.correction_latencies = collections.deque(maxlen=1000)
+        self.get_count = 0
+        self.set_count = 0
+        self.ensure_count = 0
+        # Backend round-trips of any kind (a real backend pays per call)
+        self.call_count = 0
+        # Endpoints read by get/get_volumes/ensure_volumes (work per call)
+        self.read_count = 0
+
+    @property
+    def volume(self):
+        """Volume of the default device"""
+        return self.volumes[self.devices[0]['id']]
+
+    def get_volume(self, device_id=None):
+        """Returns the current volume"""
+        self._delay()
+        with self._lock:
+            self.get_count += 1
+            self.call_count += 1
+            self.read_count += 1
+            return self.volumes[self._resolve(device_id)]
+
+    def get_volumes(self, device_ids):
+        """Reads several devices in one call"""
+        self._delay()
+        with self._lock:
+            self.get_count += 1
+            self.call_count += 1
+            self.read_count += len(device_ids)
+            return [self.volumes.get(self._resolve(device_id, strict=False))
+                    for device_id in device_ids]
+
+    def set_volume(self, volume, device_id=None):
+        """Sets the volume (like Windows this notifies all subscribers)"""
+        self._delay()
+        with self._lock:
+            self.set_count += 1
+            self.call_count += 1
+            device_id = self._store(self._resolve(device_id), volume)
+        self._notify(device_id, int(volume))
+        return True
+
+    def ensure_volumes(self, requests):
+        """Read-compare-set for all requests in one call"""
+        self._delay()
+        outcomes = []
+        changed = []
+        with self._lock:
+            self.ensure_count += 1
+            self.call_count += 1
+            self.read_count += len(requests)
+            for device_id, target_volume, tolerance in requests:
+                device_id = self._resolve(device_id, strict=False)
+                before = self.volumes.get(device_id)
+                if before is None:
+                    outcomes.append(None)
+                    continue
+                after = before
+                if abs(before - target_volume) > tolerance:
+                    after = int(target_volume)
+                    self._store(device_id, after)
+                    changed.append((device_id, after))
+                outcomes.append((before, after))
+        for device_id, volume in changed:
+            self._notify(device_id, volume)
+        return outcomes
+
+    def list_devices(self):
+        """The simulated microphones"""
+        self._delay()
+        with self._lock:
+            return [dict(device) for device in self.devices]
+
+    def subscribe(self, callback, device_id=None):
+        """Registers callback(device_id, volume) for changes of one device (None: all devices)"""
+        with self._lock:
+            self._subscribers.setdefault(device_id, []).append(callback)
+
+        def unsubscribe():
+            with self._lock:
+                callbacks = self._subscribers.get(device_id, [])
+                if callback in callbacks:
+                    callbacks.remove(callback)
+        return unsubscribe
+
+    def subscribe_device_changes(self, callback):
+        """Registers callback() for unplug()/plug()"""
+        with self._lock:
+            self._device_subscribers.append(callback)
+
+        def unsubscribe():
+            with self._lock:
+                if callback in self._device_subscribers:
+                    self._device_subscribers.remove(callback)
+        return unsubscribe
+
+    def close(self):
+        """Stops the drift thread"""
+        self.stop_drift()
+
+    def apply_external_change(self, volume, device_id=None):
+        """Changes the volume like another application would"""
+        with self._lock:
+            device_id = self._resolve(device_id)
+            self.volumes[device_id] = int(volume)
+            self.external_changes.setdefault(device_id, self.clock())
+        self._notify(device_id, int(volume))
+
+    def unplug(self, device_id):
+        """Removes a device like pulling its USB cable"""
+        with self._lock:
+            self.devices = [device for device in self.devices if device['id'] != device_id]
+            self.volumes.pop(device_id, None)
+            self.external_changes.pop(device_id, None)
+        self._notify_devices()
+
+    def plug(self, device_id, name, volume):
+        """(Re-)adds a device - its volume counts as an external change"""
+        with self._lock:
+            self.devices.append({'id': device_id, 'name': name, 'default': False})
+            self.volumes[device_id] = int(volume)
+            self.external_changes.setdefault(device_id, self.clock())
+        self._notify_devices()
+
+    def start_drift(self, reference, mean_interval=5.0):
+        """Starts random external changes around reference() (e.g. the target volume)"""
+        if self._drift_thread and self._drift_thread.is_alive() and not self._drift_stop.is_set():
+            return
+        self._drift_stop = threading.Event()
+        self._drift_thread = threading.Thread(
+            target=self._drift_loop, args=(reference, mean_interval, self._drift_stop),
+            daemon=True)
+        self._drift_thread.start()
+
+    def stop_drift(self):
+        """Stops the random external changes"""
+        self._drift_stop.set()
+
+    def _drift_loop(self, reference, mean_interval, stop):
+        """Drift thread - waits exponentially distributed intervals"""
+        while not stop.wait(self.random.expovariate(1.0 / mean_interval)):
+            target = reference()
+            device_id = self.random.choice(self.devices)['id']
+            self.apply_external_change(
+                int(target * self.random.choice(self.drift_fractions)), device_id)
+
+    def _store(self, device_id, volume):
+        """Stores a volume set by the keeper and records the correction latency"""
+        self.volumes[device_id] = int(volume)
+        changed_at = self.external_changes.pop(device_id, None)
+        if changed_at is not None:
+            self.correction_latencies.append(self.clock() - changed_at)
+        return device_id
+
+    def _delay(self):
+        """Injected backend latency"""
+        if self.latency:
+            time.sleep(self.latency)
+
+    def _resolve(self, device_id, strict=True):
+        """Device ID or the default device"""
+        if device_id is None:
+            return self.devices[0]['id']
+        if device_id not in self.volumes and strict:
+            raise DeviceUnavailableError(f"No simulated device with ID {device_id}")
+        return device_id
+
+    def _notify(self, device_id, volume):
+        """Calls all subscribers outside the lock"""
+        with self._lock:
+            subscribers = self._subscribers.get(device_id, []) + self._subscribers.get(None, [])
+        for callback in subscribers:
+            try:
+                callback(device_id, volume)
+            except Exception as e:
+                logging.error(f"Volume event callback failed: {e}")
+
+    def _notify_devices(self):
+        """Calls all device change subscribers outside the lock"""
+        with self._lock:
+            subscribers = list(self._device_subscribers)
+        for callback in subscribers:
+            try:
+                callback()
+            except Exception as e:
+                logging.error(f"Device change callback failed: {e}")
+
+
+class AudioDeviceCmdletsBackend(AudioBackend):
+    """AudioDeviceCmdlets through one persistent PowerShell worker"""
+
+    name = "AudioDeviceCmdlets"
+    supports_events = True
+
+    def __init__(self, worker=None):
+        self.worker = worker or PowerShellWorker()
+        # endpoint ID -> [callback], one worker subscription per endpoint
+        self._subscribers = {}
+        self._lock = threading.Lock()
+        self.worker.event_handler = self._dispatch_event
+
+    @property
+    def respawn_count(self):
+        """Restarts of the PowerShell worker"""
+        return self.worker.respawn_count
+
+    def probe(self):
+        """Starting the worker imports the module once and reports the result"""
+        try:
+            if self.worker.start():
+                return True
+        except Exception as e:
+            logging.info(f"PowerShell worker not available: {e}")
+        self.worker.stop()
+        return False
+
+    def get_volume(self, device_id=None):
+        """Reads the endpoint volume (cached endpoint in the worker)"""
+        output = self._request('get', device_id=device_id)
+        volume = parse_volume_output(output)
+        if volume is None:
+            raise AudioBackendError(f"Could not extract volume from output: '{str(output)[:100]}...'")
+        return volume
+
+    def set_volume(self, volume, device_id=None):
+        """Writes the endpoint volume"""
+        return bool(self._request('set', volume=int(volume), device_id=device_id))
+
+    def get_volumes(self, device_ids):
+        """Reads all endpoints in a single worker round-trip"""
+        outputs = self._request('get_many', device_ids=list(device_ids)) or []
+        return [parse_volume_output(output) for output in outputs]
+
+    def ensure_volumes(self, requests):
+        """Read-compare-set for all endpoints in a single worker round-trip"""
+        items = [{'device_id': device_id, 'target': int(target_volume), 'tolerance': tolerance}
+                 for device_id, target_volume, tolerance in requests]
+        outcomes = self._request('ensure', items=items) or []
+        return [(outcome['before'], outcome['after']) if outcome else None
+                for outcome in outcomes]
+
+    def list_devices(self):
+        """Recording devices as reported by Get-AudioDevice -List"""
+        return self._request('list') or []
+
+    def subscribe(self, callback, device_id=None):
+        """Forwards OnVolumeNotification events of the endpoint, unsubscribe() drops only this callback"""
+        endpoint_id = self.worker.subscribe(device_id)
+        with self._lock:
+            self._subscribers.setdefault(endpoint_id, []).append(callback)
+
+        def unsubscribe():
+            with self._lock:
+                callbacks = self._subscribers.get(endpoint_id, [])
+                if callback not in callbacks:
+                    return
+                callbacks.remove(callback)
+                last = not callbacks
+                if last:
+                    del self._subscribers[endpoint_id]
+            # The endpoint's shell subscription ends with its last callback
+            if last:
+                self.worker.unsubscribe(endpoint_id)
+        return unsubscribe
+
+    def close(self):
+        """Stops the PowerShell worker"""
+        self.worker.stop()
+
+    def _dispatch_event(self, device_id, volume):
+        """Worker event -> callbacks subscribed to that endpoint"""
+        with self._lock:
+            callbacks = list(self._subscribers.get(device_id, []))
+        for callback in callbacks:
+            try:
+                callback(device_id, volume)
+            except Exception as e:
+                logging.error(f"Volume event callback failed: {e}")
+
+    def _request(self, op, **args):
+        """Worker request with backend exceptions"""
+        try:
+            return self.worker.request(op, **args)
+        except Exception as e:
+            raise self.backend_error(e, args.get('device_id'))
+
+    @staticmethod
+    def backend_error(error, device_id=None):
+        """Maps a worker exception to the matching backend exception"""
+        if isinstance(error, PowerShellCommandError):
+            if device_id:
+                return DeviceUnavailableError(str(error))
+            return AudioBackendError(str(error))
+        if isinstance(error, PowerShellWorkerTimeout):
+            return BackendTimeoutError(str(error))
+        return AudioBackendError(str(error))
+
+
+class CoreAudioBackend(AudioBackend):
+    """In-process IAudioEndpointVolume access via pycaw/comtypes (optional)"""
+
+    name = "CoreAudio"
+
+    def __init__(self):
+        # COM interface pointers must not cross threads - cache per thread
+        self._local = threading.local()
+        self._api = None
+
+    def probe(self):
+        """True if pycaw is installed and a capture endpoint can be opened"""
+        try:
+            self._load_api()
+            self.get_volume()
+            return True
+        except Exception as e:
+            logging.info(f"CoreAudio backend not available: {e}")
+            return False
+
+    def get_volume(self, device_id=None):
+        """Reads MasterVolumeLevelScalar of the endpoint"""
+        try:
+            return int(round(self._endpoint(device_id).GetMasterVolumeLevelScalar() * 100))
+        except Exception as e:
+            self._forget(device_id)
+            raise self._error(e, device_id)
+
+    def set_volume(self, volume, device_id=None):
+        """Writes MasterVolumeLevelScalar of the endpoint"""
+        try:
+            self._endpoint(device_id).SetMasterVolumeLevelScalar(int(volume) / 100.0, None)
+            return True
+        except Exception as e:
+            self._forget(device_id)
+            raise self._error(e, device_id)
+
+    def list_devices(self):
+        """Active capture endpoints"""
+        api = self._load_api()
+        self._init_com()
+        enumerator = api['AudioUtilities'].GetDeviceEnumerator()
+        default = api['AudioUtilities'].GetMicrophone()
+        default_id = default.GetId() if default else None
+
+        collection = enumerator.EnumAudioEndpoints(
+            api['EDataFlow'].eCapture.value, api['DEVICE_STATE'].ACTIVE.value)
+        devices = []
+        for index in range(collection.GetCount()):
+            device = api['AudioUtilities'].CreateDevice(collection.Item(index))
+            devices.append({'id': device.id, 'name': device.FriendlyName,
+                            'default': device.id == default_id})
+        return devices
+
+    def _load_api(self):
+        """Imports pycaw lazily - it is an optional dependency"""
+        if self._api is None:
+            from ctypes import POINTER, cast
+            from comtypes import CLSCTX_ALL
+            from pycaw.constants import DEVICE_STATE, EDataFlow
+            from pycaw.pycaw import AudioUtilities, IAudioEndpointVolume
+            self._api = {
+                'POINTER': POINTER, 'cast': cast, 'CLSCTX_ALL': CLSCTX_ALL,
+                'DEVICE_STATE': DEVICE_STATE, 'EDataFlow': EDataFlow,
+                'AudioUtilities': AudioUtilities, 'IAudioEndpointVolume': IAudioEndpointVolume,
+            }
+        return self._api
+
+    def _init_com(self):
+        """COM has to be initialized once in every calling thread"""
+        if getattr(self._local, 'com_ready', False):
+            return
+        import comtypes
+        try:
+            comtypes.CoInitialize()
+        except OSError:
+            # Already initialized with another apartment model - usable anyway
+            pass
+        self._local.com_ready = True
+        self._local.endpoints = {}
+
+    def _endpoint(self, device_id):
+        """IAudioEndpointVolume for an endpoint ID (None = default capture device)"""
+        api = self._load_api()
+        self._init_com()
+        endpoints = self._local.endpoints
+        if device_id not in endpoints:
+            if device_id:
+                device = api['AudioUtilities'].GetDeviceEnumerator().GetDevice(device_id)
+            else:
+                device = api['AudioUtilities'].GetMicrophone()
+            if device is None:
+                raise DeviceUnavailableError("No capture endpoint available")
+            interface = device.Activate(api['IAudioEndpointVolume']._iid_, api['CLSCTX_ALL'], None)
+            endpoints[device_id] = api['cast'](interface, api['POINTER'](api['IAudioEndpointVolume']))
+        return endpoints[device_id]
+
+    def _forget(self, device_id):
+        """Drops a cached endpoint after an error"""
+        getattr(self._local, 'endpoints', {}).pop(device_id, None)
+
+    @staticmethod
+    def _error(error, device_id):
+        """Maps COM errors to backend exceptions"""
+        if isinstance(error, AudioBackendError):
+            return error
+        if device_id:
+            return DeviceUnavailableError(str(error))
+        return AudioBackendError(str(error))
+
+
+class BackendRegistry:
+    """Ordered list of backend factories with cost-based selection"""
+
+    def __init__(self):
+        self._entries = []
+
+    def register(self, name, factory, priority=100, fallback=False):
+        """Registers factory() -> AudioBackend; lower priority is probed first"""
+        self._entries = [entry for entry in self._entries if entry['name'] != name]
+        self._entries.append({'name': name, 'factory': factory,
+                              'priority': priority, 'fallback': fallback})
+        self._entries.sort(key=lambda entry: entry['priority'])
+
+    def names(self):
+        """Registered backend names in probing order"""
+        return [entry['name'] for entry in self._entries]
+
+    def create(self, name):
+        """Creates one backend by name"""
+        for entry in self._entries:
+            if entry['name'] == name:
+                return entry['factory']()
+        raise KeyError(f"Unknown audio backend: {name}")
+
+    def select(self, preferred=None, samples=3):
+        """Probes the backends and returns (backend, probe_results)
+
+        A preferred backend that works is used directly. Otherwise every
+        regular backend is probed and the one with the cheapest volume read
+        wins; fallback backends are only probed when none of them works.
+        """
+        results = []
+        candidates = []
+
+        if preferred and preferred != 'auto':
+            for entry in self._entries:
+                if entry['name'] == preferred:
+                    result, backend = self._probe(entry, samples)
+                    results.append(result)
+                    if backend:
+                        return backend, results
+            logging.warning(f"Preferred audio backend {preferred} not available")
+
+        for fallback in (False, True):
+            for entry in self._entries:
+                if entry['fallback'] != fallback or entry['name'] == preferred:
+                    continue
+                result, backend = self._probe(entry, samples)
+                results.append(result)
+                if backend:
+                    candidates.append((result['read_cost'], len(candidates), backend))
+            if candidates:
+                break
+
+        if not candidates:
+            raise AudioBackendError("No audio backend available")
+
+        candidates.sort()
+        for _, _, backend in candidates[1:]:
+            backend.close()
+
+        logging.info("Audio backend probes: " + ", ".join(
+            f"{r['name']}=" + (f"ok (probe {r['probe_cost'] * 1000:.1f}ms, "
+                               f"read {r['read_cost'] * 1000:.2f}ms)" if r['ok'] else "failed")
+            for r in results))
+        return candidates[0][2], results
+
+    @staticmethod
+    def _probe(entry, samples):
+        """Creates and probes one backend, returns (result, backend or None)"""
+        result = {'name': entry['name'], 'ok': False, 'fallback': entry['fallback'],
+                  'probe_cost': None, 'read_cost': None}
+        backend = None
+        started = time.perf_counter()
+        try:
+            backend = entry['factory']()
+            if not backend.probe():
+                backend.close()
+                return result, None
+            result['probe_cost'] = time.perf_counter() - started
+
+            timings = []
+            for _ in range(samples):
+                read_started = time.perf_counter()
+                backend.get_volume()
+                timings.append(time.perf_counter() - read_started)
+            result['read_cost'] = statistics.median(timings)
+            result['ok'] = True
+            return result, backend
+        except Exception as e:
+            logging.info(f"Audio backend {entry['name']} failed its probe: {e}")
+            if backend is not None:
+                backend.close()
+            return result, None
+
+
+def default_registry():
+    """Registry with the built-in backends in probing order"""
+    registry = BackendRegistry()
+    registry.register(CoreAudioBackend.name, CoreAudioBackend, priority=10)
+    registry.register(AudioDeviceCmdletsBackend.name, AudioDeviceCmdletsBackend, priority=20)
+    registry.register(SimulatedAudioBackend.name, SimulatedAudioBackend, priority=1000, fallback=True)
+    return registry
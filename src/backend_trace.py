@@ -0,0 +1,440 @@
+#!/usr/bin/env python3
+"""
+Backend Trace - record, replay and analyze what a user's device did
+- RecordingBackend: wraps the active backend and writes every call (op,
+  arguments, result, latency, error) and every volume event to a gzip
+  JSONL trace, sync-flushed every second so a crash loses at most the
+  last second (load_trace() reads an unfinished trace up to that point)
+- ReplayBackend: plays the external volume changes of a trace back through
+  the monitoring loop, faster than real time
+- analyze(): estimates correction latency and backend calls for other
+  check_interval/tolerance settings on the same trace
+
+    python src/microphone_volume_keeper.py --record-trace mic.trace.gz
+    python src/microphone_volume_keeper.py --headless --replay-trace mic.trace.gz --replay-speed 20
+    python src/backend_trace.py mic.trace.gz --interval 0.25 0.5 1 2 --tolerance 0 2 5
+"""
+
+import argparse
+import gzip
+import json
+import statistics
+import threading
+import time
+
+from audio_backends import AudioBackend, SimulatedAudioBackend
+from metrics import percentile
+
+TRACE_VERSION = 1
+
+# Seconds between Z_SYNC_FLUSHes of the trace - everything before one survives a crash
+FLUSH_INTERVAL = 1.0
+
+
+class RecordingBackend(AudioBackend):
+    """Transparent wrapper that writes a trace of every backend call"""
+
+    def __init__(self, backend, path, meta=None, clock=time.perf_counter, flush_interval=FLUSH_INTERVAL):
+        self.backend = backend
+        self.path = path
+        self.clock = clock
+        self.flush_interval = flush_interval
+        self.name = backend.name
+        self.icon_status = backend.icon_status
+        self.supports_events = backend.supports_events
+        self.record_count = 0
+
+        self._started = clock()
+        self._lock = threading.Lock()
+        self._file = gzip.open(path, 'wt', encoding='utf-8')
+        header = {'trace': TRACE_VERSION, 'backend': backend.name, 'started': time.time()}
+        header.update(meta or {})
+        self._file.write(json.dumps(header) + '\n')
+        self._file.flush()
+        self._flushed_at = self._started
+
+    @property
+    def respawn_count(self):
+        """Respawns of the wrapped backend"""
+        return self.backend.respawn_count
+
+    def probe(self):
+        """Probes the wrapped backend"""
+        return self.backend.probe()
+
+    def get_volume(self, device_id=None):
+        """Recorded get_volume()"""
+        return self._call('get', self.backend.get_volume, device_id)
+
+    def set_volume(self, volume, device_id=None):
+        """Recorded set_volume()"""
+        return self._call('set', self.backend.set_volume, volume, device_id)
+
+    def get_volumes(self, device_ids):
+        """Recorded get_volumes()"""
+        return self._call('get_many', self.backend.get_volumes, list(device_ids))
+
+    def ensure_volumes(self, requests):
+        """Recorded ensure_volumes()"""
+        return self._call('ensure', self.backend.ensure_volumes, [list(request) for request in requests])
+
+    def list_devices(self):
+        """Recorded list_devices()"""
+        return self._call('list', self.backend.list_devices)
+
+    def subscribe(self, callback, device_id=None):
+        """Subscribes through the wrapped backend, events are recorded too"""
+        def recorded_callback(event_device_id, volume):
+            self._record({'t': self.clock() - self._started, 'op': 'event',
+                          'a': [event_device_id], 'r': volume})
+            callback(event_device_id, volume)
+        return self.backend.subscribe(recorded_callback, device_id)
+
+    def subscribe_device_changes(self, callback):
+        """Device change notifications of the wrapped backend"""
+        return self.backend.subscribe_device_changes(callback)
+
+    def __getattr__(self, name):
+        """Anything else (start_drift, plug, ...) goes to the wrapped backend, unrecorded"""
+        if name == 'backend':
+            raise AttributeError(name)
+        return getattr(self.backend, name)
+
+    def close(self):
+        """Closes the trace and the wrapped backend"""
+        with self._lock:
+            if self._file:
+                self._file.close()
+                self._file = None
+        self.backend.close()
+
+    def _call(self, op, function, *args):
+        """Calls the wrapped backend and records the outcome"""
+        started = self.clock()
+        entry = {'t': started - self._started, 'op': op, 'a': list(args)}
+        try:
+            result = function(*args)
+            entry['r'] = result
+            return result
+        except Exception as e:
+            entry['e'] = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            entry['l'] = self.clock() - started
+            self._record(entry)
+
+    def _record(self, entry):
+        """Appends one trace line"""
+        with self._lock:
+            if self._file:
+                self._file.write(json.dumps(entry, separators=(',', ':')) + '\n')
+                self.record_count += 1
+                now = self.clock()
+                if now - self._flushed_at >= self.flush_interval:
+                    # GzipFile.flush() is a Z_SYNC_FLUSH - readable up to here without the trailer
+                    self._file.flush()
+                    self._flushed_at = now
+
+
+def load_trace(path):
+    """(header, entries sorted by start time)
+
+    A trace that was never closed (crash) is read up to its last flush,
+    a line cut off in the middle is skipped.
+    """
+    lines = []
+    with gzip.open(path, 'rt', encoding='utf-8') as f:
+        try:
+            for line in f:
+                if line.strip():
+                    try:
+                        lines.append(json.loads(line))
+                    except ValueError:
+                        continue
+        except EOFError:
+            # No gzip trailer - the recording keeper did not get to close() it
+            pass
+    if not lines or lines[0].get('trace') != TRACE_VERSION:
+        raise ValueError(f"{path} is not a backend trace")
+    return lines[0], sorted(lines[1:], key=lambda entry: entry['t'])
+
+
+def listed_default(devices):
+    """Endpoint ID of the default device in a list() result, None if there is none"""
+    return next((device['id'] for device in devices or [] if device.get('default')), None)
+
+
+def first_default(entries):
+    """Default endpoint ID of the first successful list() in the trace"""
+    for entry in entries:
+        if entry['op'] == 'list' and 'e' not in entry and listed_default(entry.get('r')):
+            return listed_default(entry['r'])
+    return None
+
+
+def external_changes(entries):
+    """Volume changes the keeper did not make: [(t, device_id, volume), ...]
+
+    Events carry the exact time. A change only seen by a read happened
+    somewhere since the previous read of that device - it is dated to the
+    middle of that gap. Calls address the default device as None, events
+    name its endpoint ID - both count as the listed default endpoint.
+    """
+    expected = {}
+    seen_at = {}
+    changes = []
+    default_id = first_default(entries)
+
+    def key(device_id):
+        return default_id if device_id is None and default_id is not None else device_id
+
+    def observe(t, device_id, volume, exact=False):
+        if volume is None:
+            return
+        device_id = key(device_id)
+        if device_id in expected and expected[device_id] != volume:
+            changed_at = t if exact else (seen_at.get(device_id, t) + t) / 2
+            changes.append((changed_at, device_id, volume))
+        expected[device_id] = volume
+        seen_at[device_id] = t
+
+    for entry in entries:
+        op, args, result = entry['op'], entry.get('a') or [], entry.get('r')
+        if 'e' in entry:
+            continue
+        if op == 'get':
+            observe(entry['t'], args[0], result)
+        elif op == 'get_many':
+            for device_id, volume in zip(args[0], result or []):
+                observe(entry['t'], device_id, volume)
+        elif op == 'ensure':
+            for (device_id, _, _), outcome in zip(args[0], result or []):
+                if outcome:
+                    observe(entry['t'], device_id, outcome[0])
+                    if outcome[1] is not None:
+                        expected[key(device_id)] = outcome[1]
+        elif op == 'set' and result:
+            expected[key(args[1])] = int(args[0])
+        elif op == 'event':
+            observe(entry['t'], args[0], result, exact=True)
+        elif op == 'list':
+            default_id = listed_default(result) or default_id
+    return sorted(changes, key=lambda change: change[0])
+
+
+def initial_volumes(entries):
+    """First volume seen per device (the default device under its listed ID)"""
+    volumes = {}
+    default_id = first_default(entries)
+    for entry in entries:
+        op, args, result = entry['op'], entry.get('a') or [], entry.get('r')
+        if 'e' in entry:
+            continue
+        if op == 'get':
+            volumes.setdefault(args[0] if args[0] is not None else default_id, result)
+        elif op == 'get_many':
+            for device_id, volume in zip(args[0], result or []):
+                volumes.setdefault(device_id if device_id is not None else default_id, volume)
+        elif op == 'ensure':
+            for (device_id, _, _), outcome in zip(args[0], result or []):
+                if outcome:
+                    volumes.setdefault(device_id if device_id is not None else default_id, outcome[0])
+        elif op == 'list':
+            default_id = listed_default(result) or default_id
+    return volumes
+
+
+def recorded_targets(entries):
+    """{device_id: target_volume} of the ensure calls (the default device under its listed ID)"""
+    targets = {}
+    default_id = first_default(entries)
+    for entry in entries:
+        if entry['op'] == 'ensure':
+            for device_id, target_volume, _ in entry['a'][0]:
+                targets[device_id if device_id is not None else default_id] = target_volume
+        elif entry['op'] == 'list' and 'e' not in entry:
+            default_id = listed_default(entry.get('r')) or default_id
+    return targets
+
+
+class ReplayBackend(SimulatedAudioBackend):
+    """Simulated devices whose external changes come from a recorded trace"""
+
+    name = "Replay"
+
+    def __init__(self, path, speed=10.0, on_finished=None, linger=0.0):
+        self.header, self.entries = load_trace(path)
+        self.speed = speed
+        self.on_finished = on_finished
+        # Seconds after the last change before on_finished (time for the last correction)
+        self.linger = linger
+        self.changes = external_changes(self.entries)
+        self.finished = threading.Event()
+
+        # Devices as the trace listed them; device_id None is the default device
+        listed = next((entry['r'] for entry in self.entries
+                       if entry['op'] == 'list' and 'e' not in entry and entry.get('r')), [])
+        names = [device['name'] for device in listed] or ["Recorded Microphone"]
+        super().__init__(volume=100, device_names=names)
+        if listed:
+            self.devices = [dict(device) for device in listed]
+            self.devices.sort(key=lambda device: not device.get('default'))
+        self.volumes = {device['id']: 100 for device in self.devices}
+        for device_id, volume in initial_volumes(self.entries).items():
+            if device_id is not None and device_id not in self.volumes:
+                # Read by ID but never listed - keep it addressable under that ID
+                self.devices.append({'id': device_id, 'name': device_id, 'default': False})
+            if volume is not None:
+                self.volumes[self._resolve(device_id, strict=False)] = int(volume)
+
+        # Recorded backend cost, compressed like the timeline
+        latencies = [entry['l'] for entry in self.entries if 'l' in entry]
+        self.latency = (statistics.median(latencies) / speed) if latencies else 0.0
+
+    def start_drift(self, reference, mean_interval=5.0):
+        """Starts playing the recorded changes instead of random drift"""
+        if self._drift_thread and self._drift_thread.is_alive() and not self._drift_stop.is_set():
+            return
+        self._drift_stop = threading.Event()
+        self._drift_thread = threading.Thread(target=self._replay, args=(self._drift_stop,), daemon=True)
+        self._drift_thread.start()
+
+    def summary(self):
+        """One log line with the replayed corrections"""
+        latencies = list(self.correction_latencies)
+        if not latencies:
+            return f"Replay: {len(self.changes)} external changes, no corrections"
+        return (f"Replay: {len(self.changes)} external changes, {len(latencies)} corrections, "
+                f"p50 {percentile(latencies, 0.5) * self.speed * 1000:.1f} ms, "
+                f"p95 {percentile(latencies, 0.95) * self.speed * 1000:.1f} ms (trace time), "
+                f"{self.call_count} backend calls")
+
+    def _replay(self, stop):
+        """Applies the changes at trace time / speed"""
+        started = time.monotonic()
+        for t, device_id, volume in self.changes:
+            delay = started + t / self.speed - time.monotonic()
+            if delay > 0 and stop.wait(delay):
+                return
+            device_id = self._resolve(device_id, strict=False)
+            if device_id in self.volumes:
+                self.apply_external_change(volume, device_id)
+        if stop.wait(self.linger):
+            return
+        self.finished.set()
+        if self.on_finished:
+            self.on_finished()
+
+
+def analyze(changes, targets, duration, check_interval, tolerance, call_latency=0.0,
+            event_driven=False, adaptive=False, max_interval=5.0, fallback_interval=10.0,
+            initial=None, default_target=100, phases=4):
+    """Replays changes offline against one setting, returns latency and call estimates
+
+    One check reads (and if needed corrects) all devices in one call. Without
+    events a change waits for the next check; the check grid is shifted
+    `phases` times so the result does not hinge on one lucky alignment.
+    """
+    ordered = sorted(changes, key=lambda change: change[0])
+
+    def deviates(device_id, volume):
+        return abs(volume - targets.get(device_id, default_target)) > tolerance
+
+    latencies = []
+    calls = uncorrected = 0
+    if event_driven:
+        # Every change wakes the loop right away (one ensure call), plus the safety-net poll
+        for t, device_id, volume in ordered:
+            calls += 1
+            if deviates(device_id, volume):
+                latencies.append(call_latency)
+        calls += int(duration / fallback_interval)
+        runs = 1
+    else:
+        runs = phases
+        for phase in range(phases):
+            deviating_since = {device_id: 0.0 for device_id, volume in (initial or {}).items()
+                               if volume is not None and deviates(device_id, volume)}
+            t, interval, index = check_interval * phase / phases, check_interval, 0
+            while t <= duration:
+                activity = False
+                while index < len(ordered) and ordered[index][0] <= t:
+                    changed_at, device_id, volume = ordered[index]
+                    index += 1
+                    activity = True
+                    if deviates(device_id, volume):
+                        deviating_since.setdefault(device_id, changed_at)
+                    else:
+                        deviating_since.pop(device_id, None)
+                calls += 1
+                for since in deviating_since.values():
+                    latencies.append(t - since + call_latency)
+                deviating_since.clear()
+                # Like AdaptiveInterval: back off while stable, snap back on activity
+                interval = min(interval * 2, max_interval) if adaptive and not activity else check_interval
+                t += interval
+            uncorrected += len(deviating_since) + len(ordered) - index
+
+    hours = (duration / 3600 if duration else 1.0) * runs
+    return {
+        'corrections': len(latencies) // runs,
+        'uncorrected': uncorrected // runs,
+        'p50_ms': percentile(latencies, 0.5) * 1000 if latencies else None,
+        'p95_ms': percentile(latencies, 0.95) * 1000 if latencies else None,
+        'max_ms': max(latencies) * 1000 if latencies else None,
+        'calls_per_hour': calls / hours,
+    }
+
+
+def main(argv=None):
+    """Offline what-if analysis of a recorded trace"""
+    parser = argparse.ArgumentParser(description="Analyze a recorded backend trace")
+    parser.add_argument('trace')
+    parser.add_argument('--interval', type=float, nargs='+', default=[0.25, 0.5, 1.0, 2.0])
+    parser.add_argument('--tolerance', type=int, nargs='+', default=[0, 2, 5])
+    parser.add_argument('--adaptive', action='store_true', help="model the adaptive polling backoff")
+    parser.add_argument('--max-interval', type=float, default=5.0)
+    parser.add_argument('--json', action='store_true', help="print the results as JSON")
+    options = parser.parse_args(argv)
+
+    header, entries = load_trace(options.trace)
+    changes = external_changes(entries)
+    targets = recorded_targets(entries)
+    default_target = header.get('target_volume', 100)
+    initial = initial_volumes(entries)
+    duration = entries[-1]['t'] if entries else 0.0
+    latencies = [entry['l'] for entry in entries if 'l' in entry]
+    call_latency = statistics.median(latencies) if latencies else 0.0
+
+    rows = []
+    for tolerance in options.tolerance:
+        rows.append(('events', None, tolerance, analyze(
+            changes, targets, duration, 0, tolerance, call_latency, event_driven=True,
+            fallback_interval=header.get('event_fallback_interval', 10.0),
+            initial=initial, default_target=default_target)))
+        for interval in options.interval:
+            rows.append(('polling', interval, tolerance, analyze(
+                changes, targets, duration, interval, tolerance, call_latency,
+                adaptive=options.adaptive, max_interval=options.max_interval,
+                initial=initial, default_target=default_target)))
+
+    if options.json:
+        print(json.dumps([{'mode': mode, 'check_interval': interval, 'tolerance': tolerance, **result}
+                          for mode, interval, tolerance, result in rows], indent=2))
+        return
+
+    recorded_calls = sum(1 for entry in entries if entry['op'] != 'event')
+    print(f"Trace: {header.get('backend')}, {duration:.0f}s, {len(changes)} external changes, "
+          f"{recorded_calls} backend calls, median call {call_latency * 1000:.2f} ms")
+    print(f"{'mode':<8} {'interval':>8} {'tol':>4} {'corr':>5} {'open':>5} {'p50 ms':>9} {'p95 ms':>9} "
+          f"{'max ms':>9} {'calls/h':>9}")
+    for mode, interval, tolerance, result in rows:
+        def fmt(value):
+            return f"{'-':>9}" if value is None else f"{value:9.1f}"
+        print(f"{mode:<8} {'-' if interval is None else interval:>8} {tolerance:>4} "
+              f"{result['corrections']:>5} {result['uncorrected']:>5} {fmt(result['p50_ms'])} {fmt(result['p95_ms'])} "
+              f"{fmt(result['max_ms'])} {result['calls_per_hour']:9.0f}")
+
+
+if __name__ == "__main__":
+    main()
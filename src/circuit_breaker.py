@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+Circuit Breaker - stops hammering a backend that keeps failing
+- closed: calls go through, consecutive failures are counted
+- open: after failure_threshold failures in a row the monitor skips its
+  checks for a backoff delay (doubling per trip, with jitter, capped)
+- half_open: when the delay is over one probe call decides - success
+  closes the breaker, failure opens it again with a longer delay
+probe_now() skips the rest of the delay when there is a sign of life
+(device list changed, volume event) so recovery is noticed right away.
+"""
+
+import logging
+import random
+import threading
+import time
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+# Gauge values of the states (metrics)
+STATE_VALUES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+
+class CircuitBreaker:
+    """closed/open/half-open breaker with exponential backoff and jitter"""
+
+    def __init__(self, failure_threshold=3, base_delay=1.0, max_delay=30.0, factor=2.0,
+                 jitter=0.2, on_change=None, clock=time.monotonic, rng=random.random):
+        self.failure_threshold = failure_threshold
+        self.base_delay = base_delay
+        self.max_delay = max(max_delay, base_delay)
+        self.factor = factor
+        # Delay varies by ±jitter (fraction) - keepers started together do not probe in lockstep
+        self.jitter = jitter
+        # on_change(old_state, new_state), called outside the lock
+        self.on_change = on_change
+        self.clock = clock
+        self.rng = rng
+
+        self.state = CLOSED
+        self.failures = 0
+        self.open_until = 0.0
+        self.delay = 0.0
+        self._lock = threading.Lock()
+
+        # Statistics
+        self.trips = 0
+        self.rejected = 0
+
+    def allow(self):
+        """True if a backend call may be made now (moves open -> half_open when due)"""
+        with self._lock:
+            if self.state == CLOSED:
+                return True
+            if self.state == OPEN and self.clock() >= self.open_until:
+                changed = self._set_state(HALF_OPEN)
+            elif self.state == HALF_OPEN:
+                return True
+            else:
+                self.rejected += 1
+                return False
+        self._changed(changed)
+        return True
+
+    def retry_in(self):
+        """Seconds until the next probe (0 unless open)"""
+        with self._lock:
+            if self.state != OPEN:
+                return 0.0
+            return max(self.open_until - self.clock(), 0.0)
+
+    def record_success(self):
+        """A backend call worked - closes the breaker"""
+        with self._lock:
+            self.failures = 0
+            self.delay = 0.0
+            changed = self._set_state(CLOSED)
+        self._changed(changed)
+
+    def record_failure(self):
+        """A backend call failed - opens the breaker after enough failures in a row"""
+        with self._lock:
+            self.failures += 1
+            if self.state == HALF_OPEN or (self.state == CLOSED and self.failures >= self.failure_threshold):
+                if self.state == HALF_OPEN:
+                    self.delay = min(self.delay * self.factor, self.max_delay)
+                else:
+                    self.delay = self.base_delay
+                spread = 1.0 + self.jitter * (2.0 * self.rng() - 1.0)
+                self.open_until = self.clock() + self.delay * spread
+                self.trips += 1
+                changed = self._set_state(OPEN)
+            else:
+                changed = None
+        self._changed(changed)
+
+    def probe_now(self):
+        """Ends the backoff early (sign that the backend or device is back)"""
+        with self._lock:
+            if self.state == OPEN:
+                self.open_until = self.clock()
+
+    def stats(self):
+        """State and counters as a plain dict"""
+        return {
+            'state': self.state,
+            'consecutive_failures': self.failures,
+            'retry_in': self.retry_in(),
+            'trips': self.trips,
+            'rejected': self.rejected,
+        }
+
+    def _set_state(self, state):
+        """Switches the state, (old, new) if it changed (caller holds the lock)"""
+        if state == self.state:
+            return None
+        old, self.state = self.state, state
+        return old, state
+
+    def _changed(self, changed):
+        """Logs a state change and tells on_change"""
+        if changed is None:
+            return
+        old, new = changed
+        if new == OPEN:
+            logging.warning(f"Backend circuit open after {self.failures} failures - "
+                            f"next try in {self.open_until - self.clock():.1f}s")
+        elif new == CLOSED:
+            logging.info("Backend circuit closed - backend is responding again")
+        if self.on_change:
+            self.on_change(old, new)
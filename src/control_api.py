@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+"""
+Control API - query and steer a running keeper from scripts
+- ControlServer: local endpoint (Unix socket, named pipe on Windows)
+  speaking a tiny JSON-RPC 2.0 dialect, one JSON object per request
+- call(): client side, imports nothing but the standard library
+Methods: status, metrics, devices, set_target, pause, resume. Answers
+come from the keeper's published state and caches - no backend call.
+
+    python src/keeper_ctl.py status
+"""
+
+import json
+import logging
+import os
+import socket
+import threading
+import zlib
+
+# JSON-RPC error codes
+PARSE_ERROR = -32700
+METHOD_NOT_FOUND = -32601
+INVALID_PARAMS = -32602
+INTERNAL_ERROR = -32603
+
+# Longest path most systems accept for a Unix socket (sun_path)
+MAX_SOCKET_PATH = 100
+
+
+class ControlError(Exception):
+    """Error answer of the control API (code as in JSON-RPC)"""
+
+    def __init__(self, message, code=INVALID_PARAMS):
+        super().__init__(message)
+        self.code = code
+
+
+def control_address(settings_path):
+    """Endpoint of the keeper using settings_path (one keeper per settings file)"""
+    settings_path = os.path.abspath(settings_path)
+    digest = f"{zlib.crc32(settings_path.encode('utf-8')):08x}"
+    if not hasattr(socket, 'AF_UNIX'):
+        return rf"\\.\pipe\microphone_volume_keeper-{digest}"
+    path = os.path.join(os.path.dirname(settings_path), "microphone_keeper.sock")
+    if len(path) > MAX_SOCKET_PATH:
+        import tempfile
+        path = os.path.join(tempfile.gettempdir(), f"mvk-{digest}.sock")
+    return path
+
+
+def handle_request(methods, line):
+    """One JSON-RPC request line -> response dict (None for notifications)"""
+    try:
+        request = json.loads(line)
+        method = request.get('method')
+        request_id = request.get('id')
+    except (ValueError, AttributeError):
+        return {'jsonrpc': '2.0', 'id': None, 'error': {'code': PARSE_ERROR, 'message': "Invalid JSON"}}
+
+    handler = methods.get(method)
+    try:
+        if handler is None:
+            raise ControlError(f"Unknown method: {method}", METHOD_NOT_FOUND)
+        params = request.get('params') or {}
+        if not isinstance(params, dict):
+            raise ControlError("params must be an object")
+        response = {'result': handler(**params)}
+    except ControlError as e:
+        response = {'error': {'code': e.code, 'message': str(e)}}
+    except TypeError as e:
+        response = {'error': {'code': INVALID_PARAMS, 'message': str(e)}}
+    except Exception as e:
+        logging.error(f"Control API: {method} failed: {e}")
+        response = {'error': {'code': INTERNAL_ERROR, 'message': str(e)}}
+
+    if 'id' not in request:
+        return None
+    response.update(jsonrpc='2.0', id=request_id)
+    return response
+
+
+class ControlServer:
+    """Serves the control methods on a local socket/pipe in daemon threads"""
+
+    def __init__(self, methods, address):
+        # methods: {name: callable(**params) -> JSON-serialisable result}
+        self.methods = methods
+        self.address = address
+        self.server = None
+        self.listener = None
+        self.thread = None
+        self.request_count = 0
+
+    def start(self):
+        """Starts listening, OSError if another keeper owns the address"""
+        if hasattr(socket, 'AF_UNIX'):
+            self._start_unix()
+        else:
+            self._start_pipe()
+        logging.info(f"Control API: {self.address}")
+
+    def stop(self):
+        """Stops listening and removes the socket file"""
+        if self.server:
+            self.server.shutdown()
+            self.server.server_close()
+            self.server = None
+            try:
+                os.unlink(self.address)
+            except OSError:
+                pass
+        if self.listener:
+            listener, self.listener = self.listener, None
+            listener.close()
+
+    def respond(self, line):
+        """Answer for one request line (JSON text, None for notifications)"""
+        self.request_count += 1
+        response = handle_request(self.methods, line)
+        return None if response is None else json.dumps(response, ensure_ascii=False)
+
+    def _start_unix(self):
+        """ThreadingUnixStreamServer, newline-delimited JSON"""
+        # Server-only import keeps the client start-up short
+        import socketserver
+
+        if os.path.exists(self.address):
+            # A socket file nobody answers on is left over from a crash
+            probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            try:
+                probe.connect(self.address)
+                raise OSError(f"another keeper is listening on {self.address}")
+            except (ConnectionRefusedError, FileNotFoundError):
+                os.unlink(self.address)
+            finally:
+                probe.close()
+
+        control = self
+
+        class Handler(socketserver.StreamRequestHandler):
+            def handle(self):
+                for line in self.rfile:
+                    if not line.strip():
+                        continue
+                    answer = control.respond(line)
+                    if answer is not None:
+                        self.wfile.write(answer.encode('utf-8') + b'\n')
+                        self.wfile.flush()
+
+        class Server(socketserver.ThreadingUnixStreamServer):
+            daemon_threads = True
+
+        old_umask = os.umask(0o177)
+        try:
+            # Only the current user may connect
+            self.server = Server(self.address, Handler)
+        finally:
+            os.umask(old_umask)
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+
+    def _start_pipe(self):
+        """Named pipe through multiprocessing.connection, one message per request"""
+        from multiprocessing.connection import Listener
+        self.listener = Listener(self.address, family='AF_PIPE')
+        self.thread = threading.Thread(target=self._accept_pipe, daemon=True)
+        self.thread.start()
+
+    def _accept_pipe(self):
+        """Accept loop of the named pipe"""
+        while self.listener:
+            try:
+                connection = self.listener.accept()
+            except OSError:
+                return
+            threading.Thread(target=self._serve_pipe, args=(connection,), daemon=True).start()
+
+    def _serve_pipe(self, connection):
+        """Answers requests of one pipe client until it disconnects"""
+        with connection:
+            while True:
+                try:
+                    line = connection.recv_bytes()
+                except (EOFError, OSError):
+                    return
+                answer = self.respond(line)
+                if answer is not None:
+                    connection.send_bytes(answer.encode('utf-8'))
+
+
+def call(address, method, timeout=2.0, **params):
+    """Calls one control method, returns its result or raises ControlError/OSError"""
+    request = json.dumps({'jsonrpc': '2.0', 'id': 1, 'method': method, 'params': params}).encode('utf-8')
+    if hasattr(socket, 'AF_UNIX'):
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.settimeout(timeout)
+            sock.connect(address)
+            sock.sendall(request + b'\n')
+            with sock.makefile('rb') as reader:
+                line = reader.readline()
+    else:
+        from multiprocessing.connection import Client
+        with Client(address, family='AF_PIPE') as connection:
+            connection.send_bytes(request)
+            if not connection.poll(timeout):
+                raise TimeoutError(f"no answer from {address}")
+            line = connection.recv_bytes()
+
+    if not line:
+        raise ConnectionError(f"{address} closed the connection")
+    response = json.loads(line)
+    if 'error' in response:
+        raise ControlError(response['error']['message'], response['error']['code'])
+    return response['result']
@@ -0,0 +1,226 @@
+#!/usr/bin/env python3
+"""
+Device Registry - cached recording device lookups
+Maps device names to endpoint IDs once instead of running
+Get-AudioDevice -List on every monitoring tick. The cache is only
+refreshed after invalidate() (device-change signal) or when the TTL expired.
+Enumerating runs outside the cache lock and the previous list stays visible
+until the new one is swapped in, so readers never wait for the backend.
+With start_refresher() a daemon thread does that refresh in the background,
+so the list is warm before anyone asks (settings dialog, control API) and
+subscribers see new or removed devices as soon as they are enumerated.
+"""
+
+import logging
+import threading
+import time
+
+# While a watched device is missing the refresher looks for it this often (doubling up to the max)
+MISSING_RETRY = 1.0
+MISSING_RETRY_MAX = 30.0
+
+
+class DeviceRegistry:
+    """Caches the recording device list and name -> ID lookups"""
+
+    def __init__(self, list_devices, ttl=300.0, clock=time.monotonic):
+        # list_devices() returns [{'id': ..., 'name': ..., 'default': ...}, ...]
+        self.list_devices = list_devices
+        self.ttl = ttl
+        self.clock = clock
+
+        self._devices = None
+        self._by_name = {}
+        self._loaded_at = 0.0
+        # invalidate() marks the list stale but keeps it visible until the refresh
+        self._invalidated = False
+        self._invalidations = 0
+        self._lock = threading.Lock()
+        # Only one enumeration at a time - a second caller waits and uses its result
+        self._refresh_lock = threading.Lock()
+
+        # Background refresh (start_refresher) and change notifications
+        self._listeners = []
+        self._pending_notify = None
+        # Last successfully loaded list - survives invalidate() to detect real changes
+        self._previous_devices = None
+        self._refresher = None
+        self._wake = threading.Event()
+        self._stopping = False
+        # Names expected in the list (watch) and the current retry delay while one is missing
+        self._watched = set()
+        self._missing_delay = MISSING_RETRY
+        self._force_refresh = False
+
+        # Statistics
+        self.refresh_count = 0
+        self.hits = 0
+        self.misses = 0
+
+    def is_stale(self):
+        """True if the cache has to be (re)loaded"""
+        if self._devices is None or self._invalidated:
+            return True
+        return self.ttl is not None and self.ttl > 0 and \
+            (self.clock() - self._loaded_at) > self.ttl
+
+    def invalidate(self, reason=None):
+        """Marks the cache stale - next lookup enumerates the devices again"""
+        with self._lock:
+            if self._devices is not None and not self._invalidated:
+                logging.info(f"Device cache invalidated{f' ({reason})' if reason else ''}")
+            self._invalidated = True
+            self._invalidations += 1
+        # The refresher enumerates right away instead of the next lookup
+        self._wake.set()
+
+    def devices(self):
+        """Returns the cached device list (refreshing it if needed)"""
+        self._refresh_if_needed()
+        with self._lock:
+            devices = list(self._devices or [])
+        self._notify()
+        return devices
+
+    def cached_devices(self):
+        """The device list as last loaded, also while stale or refreshing - never
+        enumerates ([] before the first load)"""
+        with self._lock:
+            return list(self._devices or [])
+
+    def resolve(self, name):
+        """Returns the endpoint ID for a device name, None if unknown"""
+        refreshed = self._refresh_if_needed()
+        with self._lock:
+            if not refreshed:
+                self.hits += 1
+            device = self._by_name.get(name)
+            if device is None:
+                self.misses += 1
+        self._notify()
+        return None if device is None else device['id']
+
+    def subscribe(self, callback):
+        """Calls callback(devices) after a refresh changed the list, returns unsubscribe()
+
+        Runs on whichever thread refreshed - GUI callers hand it over to their own loop.
+        """
+        with self._lock:
+            self._listeners.append(callback)
+
+        def unsubscribe():
+            with self._lock:
+                if callback in self._listeners:
+                    self._listeners.remove(callback)
+        return unsubscribe
+
+    def watch(self, names):
+        """Device names that should be present - while one is missing the refresher
+        re-enumerates every few seconds so its return is noticed (and notified)"""
+        with self._lock:
+            self._watched = set(names)
+            self._missing_delay = MISSING_RETRY
+        # The refresher recomputes its wait (a plain wake does not enumerate)
+        self._wake.set()
+
+    def missing(self):
+        """Watched names absent from the last loaded list"""
+        with self._lock:
+            if self._previous_devices is None:
+                return set()
+            return self._watched - {device['name'] for device in self._previous_devices}
+
+    def start_refresher(self):
+        """Loads the list now and keeps it fresh in a daemon thread (TTL, invalidate())"""
+        if self._refresher is not None:
+            return
+        self._stopping = False
+        self._wake.set()
+        self._refresher = threading.Thread(target=self._refresh_loop, name="device-refresher", daemon=True)
+        self._refresher.start()
+
+    def stop_refresher(self):
+        """Ends the background refresh"""
+        refresher, self._refresher = self._refresher, None
+        if refresher is not None:
+            self._stopping = True
+            self._wake.set()
+            refresher.join(timeout=2.0)
+
+    def _refresh_loop(self):
+        """Refreshes when woken (invalidate), when the TTL runs out or to look for missing devices"""
+        while True:
+            timeout = self._time_to_stale()
+            looking = bool(self.missing())
+            if looking:
+                timeout = self._missing_delay if timeout is None else min(timeout, self._missing_delay)
+            else:
+                self._missing_delay = MISSING_RETRY
+            woken = self._wake.wait(timeout)
+            if self._stopping:
+                return
+            self._wake.clear()
+            if looking and not woken:
+                self._missing_delay = min(self._missing_delay * 2, MISSING_RETRY_MAX)
+                self._force_refresh = True
+            self.devices()
+
+    def _time_to_stale(self):
+        """Seconds until the cached list expires, None without a TTL"""
+        if self.ttl is None or self.ttl <= 0:
+            return None
+        # Slightly past the TTL so is_stale() agrees
+        return max(self.ttl - (self.clock() - self._loaded_at), 0.0) + 0.05
+
+    def _notify(self):
+        """Hands a changed device list to the subscribers (outside the lock)"""
+        with self._lock:
+            devices, self._pending_notify = self._pending_notify, None
+            listeners = list(self._listeners)
+        if devices is None:
+            return
+        for callback in listeners:
+            try:
+                callback(list(devices))
+            except Exception as e:
+                logging.warning(f"Device list subscriber failed: {e}")
+
+    def _refresh_if_needed(self):
+        """Reloads the device list when stale, True if it was reloaded
+
+        Enumerates without holding _lock and swaps the result in under it.
+        """
+        if not (self._force_refresh or self.is_stale()):
+            return False
+        with self._refresh_lock:
+            with self._lock:
+                # Another caller may have refreshed while we waited for _refresh_lock
+                if not (self._force_refresh or self.is_stale()):
+                    return False
+                self._force_refresh = False
+                invalidations = self._invalidations
+
+            try:
+                devices = list(self.list_devices() or [])
+            except Exception as e:
+                logging.warning(f"Could not enumerate audio devices: {e}")
+                # Do not hammer the backend - keep what we have and retry after the TTL
+                with self._lock:
+                    if self._devices is None:
+                        self._devices = []
+                    self._invalidated = self._invalidations != invalidations
+                    self._loaded_at = self.clock()
+                return True
+
+            with self._lock:
+                if devices != self._previous_devices:
+                    self._pending_notify = devices
+                    self._previous_devices = devices
+                self._devices = devices
+                self._by_name = {device['name']: device for device in devices}
+                # An invalidate() during the enumeration keeps the new list stale
+                self._invalidated = self._invalidations != invalidations
+                self._loaded_at = self.clock()
+                self.refresh_count += 1
+            logging.info(f"Device cache refreshed: {len(devices)} recording devices")
+            return True
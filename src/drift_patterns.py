@@ -0,0 +1,208 @@
+#!/usr/bin/env python3
+"""
+Drift Patterns - learns when a device's volume gets reset
+- Per device two small decaying histograms of corrections:
+  by time of day (15 minute slots) and by time since the previous
+  correction (log-spaced buckets, catches "every 30 minutes" patterns)
+- hot(): True when a correction is likely soon - the polling loop then
+  stays at check_interval, elsewhere it may back off to max_interval
+- Savings: polls actually made vs. a fixed interval with the same
+  correction latency
+Saved as compact JSON next to the settings file, survives restarts.
+"""
+
+import bisect
+import json
+import logging
+import os
+import time
+
+# Upper bounds (seconds) of the "since last correction" buckets, the last bucket is open
+SINCE_EDGES = (2, 5, 10, 30, 60, 120, 300, 600, 1200, 1800, 3600, 7200, 14400, 43200, 86400)
+
+
+class DevicePattern:
+    """Decaying correction histograms of one device"""
+
+    __slots__ = ('tod', 'since', 'total', 'last', 'updated')
+
+    def __init__(self, slots, tod=None, since=None, total=0.0, last=None, updated=None):
+        self.tod = tod or [0.0] * slots
+        self.since = since or [0.0] * (len(SINCE_EDGES) + 1)
+        self.total = total
+        self.last = last
+        self.updated = updated
+
+    def decay(self, now, half_life):
+        """Ages all weights to now (old habits fade)"""
+        if self.updated is not None and now > self.updated:
+            factor = 0.5 ** ((now - self.updated) / half_life)
+            if factor < 0.999:
+                self.tod = [weight * factor for weight in self.tod]
+                self.since = [weight * factor for weight in self.since]
+                self.total *= factor
+        self.updated = now
+
+
+class DriftPatternLearner:
+    """Per-device correction histograms and the polling decisions based on them"""
+
+    def __init__(self, slot_minutes=15, half_life_days=7.0, min_corrections=5,
+                 hot_ratio=3.0, min_slot_corrections=3.0, min_tod_corrections=8.0,
+                 hot_probability=0.3, lookahead=120.0, clock=time.time):
+        self.slot_minutes = slot_minutes
+        self.slots = 24 * 60 // slot_minutes
+        self.half_life = half_life_days * 86400
+        # Below this many (decayed) corrections a device has no pattern yet
+        self.min_corrections = min_corrections
+        # Time-of-day slot is hot at hot_ratio times the average slot weight, but
+        # never with less than min_slot_corrections in it and only once the device
+        # has min_tod_corrections in total - with 96 slots a handful of random
+        # corrections would otherwise make every slot they hit look hot
+        self.hot_ratio = hot_ratio
+        self.min_slot_corrections = min_slot_corrections
+        self.min_tod_corrections = min_tod_corrections
+        # Interval pattern is hot if a correction within lookahead seconds is this likely
+        self.hot_probability = hot_probability
+        self.lookahead = lookahead
+        self.clock = clock
+        self.devices = {}
+
+        # Savings statistics of the current run
+        self.polls = 0
+        self.dense_polls = 0
+        self.started_at = None
+        self.detections = []
+        self._last_interval = None
+        self._last_corrections = None
+
+    def record_correction(self, device, timestamp=None):
+        """Learns one correction of a device"""
+        now = self.clock() if timestamp is None else timestamp
+        pattern = self.devices.get(device)
+        if pattern is None:
+            pattern = self.devices[device] = DevicePattern(self.slots)
+        pattern.decay(now, self.half_life)
+        pattern.tod[self._slot(now)] += 1.0
+        if pattern.last is not None and now > pattern.last:
+            pattern.since[bisect.bisect_left(SINCE_EDGES, now - pattern.last)] += 1.0
+        pattern.total += 1.0
+        pattern.last = now
+
+    def hot(self, device, now=None):
+        """True if a correction of this device is likely in the near future"""
+        pattern = self.devices.get(device)
+        if pattern is None or pattern.total < self.min_corrections:
+            return False
+        now = self.clock() if now is None else now
+
+        # Time of day: this slot (or the next, when close to it) stands out -
+        # every correction adds 1 to one slot and to total, so total is their sum
+        if pattern.total >= self.min_tod_corrections:
+            threshold = max(self.hot_ratio * pattern.total / self.slots, self.min_slot_corrections)
+            slot = self._slot(now)
+            upcoming = self._slot(now + self.lookahead)
+            if max(pattern.tod[slot], pattern.tod[upcoming]) >= threshold:
+                return True
+
+        # Interval since the last correction: chance of one in the next lookahead
+        # seconds, given none so far (mass spread evenly over each bucket's width)
+        if pattern.last is None:
+            return False
+        start = now - pattern.last
+        end = start + self.lookahead
+        soon = remaining = 0.0
+        lower = 0.0
+        for upper, weight in zip(SINCE_EDGES + (SINCE_EDGES[-1] * 2,), pattern.since):
+            if weight and upper > start:
+                width = upper - lower
+                remaining += weight * (upper - max(lower, start)) / width
+                soon += weight * max(min(upper, end) - max(lower, start), 0.0) / width
+            lower = upper
+        return remaining > 0 and soon / remaining >= self.hot_probability
+
+    def next_interval(self, devices, interval, min_interval, corrections):
+        """Polling interval after one check: min_interval while any device is hot
+
+        corrections is the keeper's running correction count - each new one
+        was detected within the previous interval (its latency bound).
+        """
+        now = self.clock()
+        if self.started_at is None:
+            self.started_at = now
+        if self._last_corrections is not None and self._last_interval is not None:
+            self.detections.extend([self._last_interval] * max(corrections - self._last_corrections, 0))
+            del self.detections[:-1000]
+        self._last_corrections = corrections
+
+        if interval > min_interval and any(self.hot(device, now) for device in devices):
+            interval = min_interval
+        if interval <= min_interval:
+            self.dense_polls += 1
+        self.polls += 1
+        self._last_interval = interval
+        return interval
+
+    def savings(self, check_interval):
+        """Polls made vs. a fixed interval with the same mean correction latency bound"""
+        elapsed = (self.clock() - self.started_at) if self.started_at is not None else 0.0
+        # A fixed interval c detects every correction within c - same bound, same latency
+        equivalent = (sum(self.detections) / len(self.detections)) if self.detections else check_interval
+        equivalent = max(equivalent, check_interval)
+        fixed_polls = elapsed / equivalent if equivalent > 0 else self.polls
+        return {
+            'polls': self.polls,
+            'dense_polls': self.dense_polls,
+            'corrections': len(self.detections),
+            'equivalent_interval': equivalent,
+            'fixed_polls': int(fixed_polls),
+            'saved_polls': max(int(fixed_polls) - self.polls, 0),
+        }
+
+    def reset_stats(self):
+        """Starts a new savings window (monitoring started)"""
+        self.polls = self.dense_polls = 0
+        self.started_at = None
+        self.detections = []
+        self._last_interval = self._last_corrections = None
+
+    def save(self, path):
+        """Writes the histograms atomically (temp file + os.replace)"""
+        data = {
+            'version': 1,
+            'slot_minutes': self.slot_minutes,
+            'devices': {device: {'tod': [round(weight, 3) or 0 for weight in pattern.tod],
+                                 'since': [round(weight, 3) or 0 for weight in pattern.since],
+                                 'total': round(pattern.total, 3),
+                                 'last': pattern.last, 'updated': pattern.updated}
+                        for device, pattern in self.devices.items()},
+        }
+        try:
+            temp_path = path + '.tmp'
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                json.dump(data, f, separators=(',', ':'))
+            os.replace(temp_path, path)
+        except OSError as e:
+            logging.warning(f"Could not save drift patterns: {e}")
+
+    def load(self, path):
+        """Loads saved histograms (nothing learned yet if missing or incompatible)"""
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return False
+        if data.get('version') != 1 or data.get('slot_minutes') != self.slot_minutes:
+            return False
+        for device, values in data.get('devices', {}).items():
+            if len(values.get('tod', [])) == self.slots and \
+                    len(values.get('since', [])) == len(SINCE_EDGES) + 1:
+                self.devices[device] = DevicePattern(
+                    self.slots, values['tod'], values['since'], values.get('total', 0.0),
+                    values.get('last'), values.get('updated'))
+        return True
+
+    def _slot(self, timestamp):
+        """Time-of-day slot (local time)"""
+        local = time.localtime(timestamp)
+        return (local.tm_hour * 60 + local.tm_min) // self.slot_minutes
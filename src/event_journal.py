@@ -0,0 +1,268 @@
+#!/usr/bin/env python3
+"""
+Event Journal - structured keeper events (start/stop, config, corrections)
+- In memory: deque ring buffer with the latest records (tray history)
+- On disk: append-only JSONL, rotated by size (events.jsonl, .1, .2, ...),
+  written by a writer thread - append() never waits for the disk
+- Time-bucket index: event counts per (type, device) and bucket, so
+  "corrections per device in the last N hours" never scans the files.
+  The index is saved next to the journal; after a crash only the part of
+  the journal written since the last save is re-read.
+"""
+
+import json
+import logging
+import os
+import queue
+import threading
+import time
+from collections import Counter, deque, namedtuple
+
+JournalRecord = namedtuple('JournalRecord', 'timestamp type device before after latency message')
+
+# JSONL field names
+FIELDS = ('ts', 'type', 'device', 'before', 'after', 'latency', 'message')
+
+# Records waiting for the writer thread - beyond that they are dropped (memory view keeps them)
+QUEUE_SIZE = 10000
+
+# Ends the writer thread
+_STOP = object()
+
+
+def format_record(record):
+    """'HH:MM:SS - TYPE: message' as shown in the tray history"""
+    timestamp = time.strftime("%H:%M:%S", time.localtime(record.timestamp))
+    return f"{timestamp} - {record.type}: {record.message}"
+
+
+class EventJournal:
+    """Append-only event log with a bounded memory view and bucketed counts"""
+
+    def __init__(self, path=None, memory_size=200, max_bytes=1024 * 1024, backups=3,
+                 bucket_seconds=60, index_retention=7 * 24 * 3600, clock=time.time):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.backups = backups
+        self.bucket_seconds = bucket_seconds
+        self.index_retention = index_retention
+        self.clock = clock
+
+        self.records = deque(maxlen=memory_size)
+        self.version = 0
+        self.write_errors = 0
+        self.dropped = 0
+
+        # bucket start -> Counter({(type, device): count})
+        self.buckets = {}
+        self._file = None
+        self._lock = threading.Lock()
+        self._pending = queue.Queue(QUEUE_SIZE)
+        self._writer = None
+
+        if path:
+            self._load_index()
+
+    @property
+    def index_path(self):
+        """Sidecar file holding the bucket index"""
+        return self.path + '.index.json'
+
+    def append(self, event_type, message="", device=None, before=None, after=None, latency=None):
+        """Records one event"""
+        record = JournalRecord(self.clock(), event_type, device, before, after, latency, message)
+        with self._lock:
+            self.records.append(record)
+            self._count(record)
+            self.version += 1
+            if self.path and self._writer is None:
+                self._writer = threading.Thread(target=self._write_loop, name="event-journal", daemon=True)
+                self._writer.start()
+        if self.path:
+            try:
+                self._pending.put_nowait(record)
+            except queue.Full:
+                self.dropped += 1
+        return record
+
+    def recent(self, limit=5):
+        """Latest records, newest first (memory only)"""
+        with self._lock:
+            records = list(self.records)[-limit:]
+        return records[::-1]
+
+    def count(self, event_type, since, until=None, device=None):
+        """Events of one type between since and until (all devices if device is None)"""
+        counts = self.counts_by_device(event_type, since, until)
+        if device is not None:
+            return counts.get(device, 0)
+        return sum(counts.values())
+
+    def counts_by_device(self, event_type, since, until=None):
+        """{device: count} of one event type (bucket resolution at both ends)"""
+        until = self.clock() if until is None else until
+        first = self._bucket(since)
+        counts = Counter()
+        with self._lock:
+            if len(self.buckets) < (until - since) / self.bucket_seconds:
+                starts = [start for start in self.buckets if first <= start <= until]
+            else:
+                starts = range(int(first), int(until) + 1, self.bucket_seconds)
+            for start in starts:
+                bucket = self.buckets.get(start)
+                if not bucket:
+                    continue
+                for (record_type, device), count in bucket.items():
+                    if record_type == event_type:
+                        counts[device] += count
+        return dict(counts)
+
+    def corrections_per_device(self, hours=24.0):
+        """Corrections per device in the last `hours`"""
+        return self.counts_by_device('CORRECTION', self.clock() - hours * 3600)
+
+    def close(self):
+        """Writes what is still queued, closes the journal file and saves the index"""
+        with self._lock:
+            writer, self._writer = self._writer, None
+        if writer is not None:
+            self._pending.put(_STOP)
+            writer.join(timeout=5.0)
+        if self._file:
+            self._file.close()
+            self._file = None
+        if self.path:
+            self._save_index()
+
+    def _bucket(self, timestamp):
+        """Start of the bucket containing timestamp"""
+        return int(timestamp // self.bucket_seconds) * self.bucket_seconds
+
+    def _count(self, record):
+        """Adds a record to the bucket index (caller holds the lock)"""
+        start = self._bucket(record.timestamp)
+        bucket = self.buckets.get(start)
+        if bucket is None:
+            bucket = self.buckets[start] = Counter()
+            self._prune(start)
+        bucket[(record.type, record.device)] += 1
+
+    def _prune(self, newest):
+        """Drops buckets older than index_retention"""
+        oldest = newest - self.index_retention
+        for start in [start for start in self.buckets if start < oldest]:
+            del self.buckets[start]
+
+    def _write_loop(self):
+        """Writer thread - writes whatever is queued, one flush per batch"""
+        while True:
+            batch = [self._pending.get()]
+            while True:
+                try:
+                    batch.append(self._pending.get_nowait())
+                except queue.Empty:
+                    break
+            records = [record for record in batch if record is not _STOP]
+            if records:
+                self._write(records)
+            if len(records) < len(batch):
+                return
+
+    def _write(self, records):
+        """Appends JSONL lines, rotates when the file is full (writer thread only)"""
+        try:
+            for record in records:
+                if self._file is None:
+                    directory = os.path.dirname(self.path)
+                    if directory:
+                        os.makedirs(directory, exist_ok=True)
+                    self._file = open(self.path, 'a', encoding='utf-8')
+                line = json.dumps(dict(zip(FIELDS, record)), ensure_ascii=False) + '\n'
+                self._file.write(line)
+
+                if self._file.tell() >= self.max_bytes:
+                    self._rotate()
+            if self._file:
+                self._file.flush()
+        except OSError as e:
+            # Journal problems must never stop the keeper
+            self.write_errors += 1
+            if self.write_errors == 1:
+                logging.error(f"Could not write event journal: {e}")
+
+    def _rotate(self):
+        """events.jsonl -> .1 -> .2 ... (oldest dropped)"""
+        self._file.close()
+        self._file = None
+        for index in range(self.backups - 1, 0, -1):
+            source = f"{self.path}.{index}"
+            if os.path.exists(source):
+                os.replace(source, f"{self.path}.{index + 1}")
+        if self.backups:
+            os.replace(self.path, f"{self.path}.1")
+        else:
+            os.remove(self.path)
+        # Counts stay in the index, the new file starts at offset 0
+        self._save_index()
+
+    def _save_index(self):
+        """Writes the bucket index atomically (writer thread or after it stopped)"""
+        try:
+            offset = os.path.getsize(self.path) if os.path.exists(self.path) else 0
+            with self._lock:
+                buckets = {str(start): [[record_type, device, count]
+                                        for (record_type, device), count in bucket.items()]
+                           for start, bucket in self.buckets.items()}
+            data = {
+                'bucket_seconds': self.bucket_seconds,
+                'offset': offset,
+                'buckets': buckets,
+            }
+            temp_path = self.index_path + '.tmp'
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                json.dump(data, f)
+            os.replace(temp_path, self.index_path)
+        except OSError as e:
+            logging.warning(f"Could not save event journal index: {e}")
+
+    def _load_index(self):
+        """Loads the index, then counts what the journal got after it was saved"""
+        offset = 0
+        try:
+            with open(self.index_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get('bucket_seconds') == self.bucket_seconds:
+                for start, entries in data.get('buckets', {}).items():
+                    self.buckets[int(start)] = Counter(
+                        {(record_type, device): count for record_type, device, count in entries})
+                offset = data.get('offset', 0)
+        except (OSError, ValueError):
+            pass
+
+        try:
+            size = os.path.getsize(self.path)
+        except OSError:
+            return
+        if offset > size:
+            # Journal was replaced behind our back - counts up to now are kept
+            return
+
+        # Tail written after the last index save (crash or first start)
+        with open(self.path, 'rb') as f:
+            f.seek(offset)
+            for record in self._parse(f):
+                self._count(record)
+
+            # Latest records for the memory view (history survives restarts)
+            f.seek(max(size - 64 * 1024, 0))
+            self.records.extend(self._parse(f))
+
+    @staticmethod
+    def _parse(lines):
+        """JournalRecords of JSONL lines, damaged lines are skipped"""
+        for line in lines:
+            try:
+                values = json.loads(line)
+                yield JournalRecord(*(values.get(field) for field in FIELDS))
+            except (ValueError, AttributeError):
+                continue
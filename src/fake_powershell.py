@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""
+Fake PowerShell - stand-in for the PowerShell worker on Linux/CI
+Speaks the same framed JSON protocol as WORKER_SCRIPT in powershell_worker.py
+and keeps the recording devices in memory:
+
+    python src/fake_powershell.py --volume 80 --latency 0.01
+    PowerShellWorker(command=[sys.executable, 'src/fake_powershell.py'])
+
+Fault injection for respawn/timeout checks:
+- --crash-after N   exit after N requests
+- --hang-on OP      never answer requests with this op
+- --no-module       report AudioDeviceCmdlets as missing
+
+The extra op "drift" (args: volume, device_id) changes a volume the way
+another application would, so volume events can be exercised.
+"""
+
+import argparse
+import json
+import sys
+import time
+
+
+class FakeAudioSession:
+    """In-memory recording devices answering worker ops"""
+
+    def __init__(self, volume=100, device_names=None, emit=None):
+        names = device_names or ["Fake Microphone"]
+        self.devices = [
+            {'id': f"{{0.0.1.00000000}}.{{fake-{index}}}", 'name': name,
+             'default': index == 0, 'volume': volume}
+            for index, name in enumerate(names)
+        ]
+        self.default_index = 0
+        self.subscriptions = set()
+        self.emit = emit or (lambda frame: None)
+
+    def _device(self, device_id):
+        """Device addressed by ID, or the current default device"""
+        if not device_id:
+            return self.devices[self.default_index]
+        for device in self.devices:
+            if device['id'] == device_id:
+                return device
+        raise ValueError(f"No AudioDevice found with ID {device_id}")
+
+    def handle(self, op, args):
+        """Executes one op and returns its result"""
+        if op == 'ping':
+            return 'pong'
+        if op == 'get':
+            device = self._device(args.get('device_id'))
+            # Like the real worker: by ID -> int, default device -> "85%"
+            return device['volume'] if args.get('device_id') else f"{device['volume']}%"
+        if op == 'get_many':
+            volumes = []
+            for device_id in args.get('device_ids') or []:
+                try:
+                    volumes.append(self.handle('get', {'device_id': device_id}))
+                except ValueError:
+                    volumes.append(None)
+            return volumes
+        if op == 'ensure':
+            outcomes = []
+            for item in args.get('items') or []:
+                try:
+                    device = self._device(item.get('device_id'))
+                except ValueError:
+                    outcomes.append(None)
+                    continue
+                before = after = device['volume']
+                if abs(before - item['target']) > item['tolerance']:
+                    after = device['volume'] = int(item['target'])
+                    self._notify(device)
+                outcomes.append({'before': before, 'after': after})
+            return outcomes
+        if op in ('set', 'drift'):
+            device = self._device(args.get('device_id'))
+            device['volume'] = int(args['volume'])
+            self._notify(device)
+            return True
+        if op == 'list':
+            return [{'id': d['id'], 'name': d['name'], 'default': d['default']}
+                    for d in self.devices]
+        if op == 'subscribe':
+            device = self._device(args.get('device_id'))
+            self.subscriptions.add(device['id'])
+            return device['id']
+        if op == 'unsubscribe':
+            if args.get('device_id'):
+                self.subscriptions.discard(args['device_id'])
+            else:
+                self.subscriptions.clear()
+            return True
+        raise ValueError(f"Unknown op: {op}")
+
+    def _notify(self, device):
+        """Pushes a volume event frame for subscribed devices"""
+        if device['id'] in self.subscriptions:
+            self.emit({'event': 'volume', 'device_id': device['id'], 'volume': device['volume']})
+
+
+def main(argv=None):
+    """Runs the fake shell on stdin/stdout"""
+    parser = argparse.ArgumentParser(description="Fake PowerShell worker")
+    parser.add_argument('--volume', type=int, default=100)
+    parser.add_argument('--device', action='append', dest='devices')
+    parser.add_argument('--latency', type=float, default=0.0)
+    parser.add_argument('--crash-after', type=int, default=0)
+    parser.add_argument('--hang-on', default=None)
+    parser.add_argument('--no-module', action='store_true')
+    options = parser.parse_args(argv)
+
+    def send(frame):
+        sys.stdout.write(json.dumps(frame) + '\n')
+        sys.stdout.flush()
+
+    session = FakeAudioSession(options.volume, options.devices, emit=send)
+
+    send({'ready': True, 'module': not options.no_module})
+
+    handled = 0
+    for line in sys.stdin:
+        if not line.strip():
+            continue
+        request_id = None
+        try:
+            request = json.loads(line)
+            request_id = request.get('id')
+            op = request.get('op')
+
+            handled += 1
+            if options.crash_after and handled > options.crash_after:
+                sys.exit(3)
+            if op == options.hang_on:
+                continue
+            if options.latency:
+                time.sleep(options.latency)
+
+            result = session.handle(op, request.get('args') or {})
+            send({'id': request_id, 'ok': True, 'result': result})
+        except Exception as e:
+            send({'id': request_id, 'ok': False, 'error': str(e)})
+
+
+if __name__ == "__main__":
+    main()
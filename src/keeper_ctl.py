@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Keeper Control - command line client for a running keeper
+Talks to the control API (see control_api.py) - no GUI libraries, no
+audio backend, answers come from the keeper's cached state.
+
+    python src/keeper_ctl.py status
+    python src/keeper_ctl.py set-target 90 --device "Elgato Wave:3"
+    python src/keeper_ctl.py pause | resume | devices | metrics [--json]
+"""
+
+import argparse
+import json
+import sys
+
+from control_api import ControlError, call, control_address
+from settings_store import resolve_settings_path
+
+
+def print_status(status):
+    """Human-readable status"""
+    print(f"{'Running' if status['running'] else 'Paused'} - {status['audio_method']}, "
+          f"target {status['target_volume']}% ±{status['tolerance']}%, "
+          f"check {status['check_interval']}s, {status['correction_count']} corrections")
+    health = status.get('backend_health')
+    if health and health['state'] != 'closed':
+        print(f"  Backend circuit {health['state']} after {health['consecutive_failures']} failures, "
+              f"next try in {health['retry_in']:.1f}s")
+    for target in status['targets']:
+        volume = '?' if target['volume'] is None else f"{target['volume']}%"
+        print(f"  {target['device']}: {volume} (target {target['target_volume']}% ±{target['tolerance']}%)")
+    for line in status['history']:
+        print(f"  {line}")
+
+
+def print_devices(result):
+    """One line per cached device"""
+    for device in result['devices']:
+        print(f"{'*' if device.get('default') else ' '} {device['name']}  [{device['id']}]")
+    if result['stale']:
+        print("(device list is older than the cache TTL)")
+
+
+def main(argv=None):
+    """Runs one command against the keeper"""
+    parser = argparse.ArgumentParser(description="Control a running Microphone Volume Keeper")
+    parser.add_argument('--settings', metavar='PATH',
+                        help="settings file of the keeper (default: as the keeper resolves it)")
+    parser.add_argument('--address', help="control socket/pipe (default: derived from the settings path)")
+    parser.add_argument('--json', action='store_true', help="print the raw JSON result")
+    parser.add_argument('--timeout', type=float, default=2.0)
+    commands = parser.add_subparsers(dest='command', required=True)
+    commands.add_parser('status')
+    commands.add_parser('metrics')
+    commands.add_parser('devices')
+    commands.add_parser('pause')
+    commands.add_parser('resume')
+    set_target = commands.add_parser('set-target')
+    set_target.add_argument('volume', type=int)
+    set_target.add_argument('--device', help="only this device of the devices list (default: all of them)")
+    options = parser.parse_args(argv)
+
+    address = options.address or control_address(resolve_settings_path(options.settings))
+    params = {}
+    if options.command == 'set-target':
+        params['volume'] = options.volume
+        if options.device:
+            params['device'] = options.device
+
+    try:
+        result = call(address, options.command.replace('-', '_'), timeout=options.timeout, **params)
+    except ControlError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    except OSError as e:
+        print(f"Keeper not reachable at {address}: {e}", file=sys.stderr)
+        return 2
+
+    if options.json or options.command == 'metrics':
+        print(json.dumps(result, indent=2, ensure_ascii=False))
+    elif options.command == 'status':
+        print_status(result)
+    elif options.command == 'devices':
+        print_devices(result)
+    else:
+        print(result['message'])
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
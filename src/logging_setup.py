@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+Logging Setup - log records never touch the disk on the calling thread
+- install_queue_handler(): root logger -> QueueHandler (at import, no file yet)
+- start_file_logging(): QueueListener thread writing to a rotating file
+  (size or daily rotation with retention, optional JSON lines)
+- stop_logging(): flushes the queue and closes the file
+Records logged before the listener starts wait in the queue. The queue is
+bounded - when it is full (no listener, disk stalled) records are dropped
+and counted instead of growing without limit. If the file cannot be opened
+the listener writes to stderr, so the queue is still drained.
+"""
+
+import atexit
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import sys
+
+# Records waiting for the writer thread - beyond that they are dropped
+QUEUE_SIZE = 10000
+
+_queue = queue.Queue(QUEUE_SIZE)
+_listener = None
+_dropped = 0
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line"""
+
+    def format(self, record):
+        data = {
+            'time': self.formatTime(record, '%Y-%m-%dT%H:%M:%S'),
+            'level': record.levelname,
+            'thread': record.threadName,
+            'message': record.getMessage(),
+        }
+        if record.exc_info:
+            data['exception'] = self.formatException(record.exc_info)
+        return json.dumps(data, ensure_ascii=False)
+
+
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler that never blocks the caller - drops records on a full queue"""
+
+    def enqueue(self, record):
+        global _dropped
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            _dropped += 1
+
+
+class BoundedQueueListener(logging.handlers.QueueListener):
+    """QueueListener whose stop sentinel waits for room in the bounded queue"""
+
+    def enqueue_sentinel(self):
+        self.queue.put(self._sentinel)
+
+
+def dropped_records():
+    """Records dropped because the queue was full"""
+    return _dropped
+
+
+def install_queue_handler(level=logging.INFO):
+    """Routes the root logger through the queue (idempotent)"""
+    root = logging.getLogger()
+    if not any(isinstance(handler, logging.handlers.QueueHandler) for handler in root.handlers):
+        root.addHandler(DroppingQueueHandler(_queue))
+    root.setLevel(level)
+
+
+def start_file_logging(path, max_bytes=1024 * 1024, backups=3, rotation='size', json_lines=False):
+    """Starts the writer thread (only the first call configures the file)
+
+    Raises OSError if the file cannot be opened - the writer thread then
+    runs with stderr instead.
+    """
+    if _listener is not None:
+        return _listener
+
+    try:
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        if rotation == 'daily':
+            handler = logging.handlers.TimedRotatingFileHandler(
+                path, when='midnight', backupCount=backups, encoding='utf-8')
+        else:
+            handler = logging.handlers.RotatingFileHandler(
+                path, maxBytes=max_bytes, backupCount=backups, encoding='utf-8')
+    except OSError:
+        # Queued records still have to go somewhere
+        _start_listener(logging.StreamHandler(sys.stderr), json_lines)
+        raise
+    return _start_listener(handler, json_lines)
+
+
+def _start_listener(handler, json_lines):
+    """Starts the QueueListener thread writing to handler"""
+    global _listener
+    if json_lines:
+        handler.setFormatter(JsonFormatter())
+    else:
+        handler.setFormatter(logging.Formatter('%(asctime)s - %(levelname)s - %(message)s'))
+
+    _listener = BoundedQueueListener(_queue, handler, respect_handler_level=True)
+    _listener.start()
+    atexit.register(stop_logging)
+    return _listener
+
+
+def stop_logging():
+    """Writes everything still queued and closes the file"""
+    global _listener
+    listener, _listener = _listener, None
+    if listener is None:
+        return
+    listener.stop()
+    for handler in listener.handlers:
+        handler.close()
@@ -0,0 +1,267 @@
+#!/usr/bin/env python3
+"""
+Metrics - in-process counters and latency histograms
+- MetricsRegistry: counters, histograms and callback gauges with a
+  snapshot() dict and Prometheus text rendering
+- MetricsServer: optional local HTTP endpoint serving /metrics
+"""
+
+import bisect
+import http.server
+import logging
+import threading
+import time
+
+# Latency buckets in seconds (upper bounds) - 0.5ms .. 10s
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1,
+                   0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# For work that usually takes microseconds (checks against an in-process backend)
+FAST_BUCKETS = (0.00001, 0.000025, 0.00005, 0.0001, 0.00025) + DEFAULT_BUCKETS
+
+
+def percentile(values, q):
+    """Nearest-rank percentile of raw values, None without values"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(int(q * len(ordered)), len(ordered) - 1)]
+
+
+class Counter:
+    """Monotonic counter"""
+
+    def __init__(self, name, help_text=""):
+        self.name = name
+        self.help = help_text
+        self.value = 0
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1):
+        """Increments the counter"""
+        with self._lock:
+            self.value += amount
+
+
+class Histogram:
+    """Cumulative bucket histogram (Prometheus semantics)"""
+
+    def __init__(self, name, help_text="", buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.buckets = tuple(sorted(buckets))
+        self.counts = [0] * (len(self.buckets) + 1)  # last = +Inf
+        self.count = 0
+        self.sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value):
+        """Records one value"""
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.count += 1
+            self.sum += value
+
+    def time(self):
+        """Context manager observing the elapsed wall time"""
+        return _Timer(self)
+
+    def quantile(self, q):
+        """Estimated quantile (linear interpolation inside the bucket)
+
+        The first bucket has no lower bound worth interpolating from - a
+        quantile there is reported as its upper bound, not a made-up value.
+        """
+        with self._lock:
+            counts = list(self.counts)
+            total = self.count
+        if not total:
+            return None
+
+        rank = q * total
+        seen = 0
+        for index, count in enumerate(counts):
+            if seen + count >= rank and count:
+                if index == 0:
+                    return self.buckets[0]
+                lower = self.buckets[index - 1]
+                if index >= len(self.buckets):
+                    return lower
+                upper = self.buckets[index]
+                return lower + (upper - lower) * ((rank - seen) / count)
+            seen += count
+        return self.buckets[-1]
+
+    def snapshot(self):
+        """Count, sum, average and estimated percentiles"""
+        with self._lock:
+            count, total = self.count, self.sum
+        return {
+            'count': count,
+            'sum': total,
+            'avg': total / count if count else None,
+            'p50': self.quantile(0.5),
+            'p95': self.quantile(0.95),
+            'p99': self.quantile(0.99),
+        }
+
+
+class _Timer:
+    """with histogram.time(): ..."""
+
+    def __init__(self, histogram):
+        self.histogram = histogram
+        self.started = None
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.histogram.observe(time.perf_counter() - self.started)
+        return False
+
+
+class MetricsRegistry:
+    """Named metrics of one keeper instance"""
+
+    def __init__(self, prefix="mvk_"):
+        self.prefix = prefix
+        self.started_at = time.time()
+        self._metrics = {}
+        self._gauges = {}
+        self._lock = threading.Lock()
+
+    def counter(self, name, help_text=""):
+        """Returns (creating if needed) a counter"""
+        return self._get_or_create(name, lambda: Counter(name, help_text))
+
+    def histogram(self, name, help_text="", buckets=DEFAULT_BUCKETS):
+        """Returns (creating if needed) a histogram"""
+        return self._get_or_create(name, lambda: Histogram(name, help_text, buckets))
+
+    def gauge(self, name, callback, help_text=""):
+        """Registers a value read from callback() at snapshot time"""
+        with self._lock:
+            self._gauges[name] = (callback, help_text)
+
+    def inc(self, name, amount=1):
+        """Shortcut for counter(name).inc()"""
+        self.counter(name).inc(amount)
+
+    def observe(self, name, value):
+        """Shortcut for histogram(name).observe()"""
+        self.histogram(name).observe(value)
+
+    def snapshot(self):
+        """All metrics as plain dict values"""
+        with self._lock:
+            metrics = dict(self._metrics)
+            gauges = dict(self._gauges)
+
+        snapshot = {'uptime_seconds': time.time() - self.started_at,
+                    'counters': {}, 'histograms': {}, 'gauges': {}}
+        for name, metric in sorted(metrics.items()):
+            if isinstance(metric, Counter):
+                snapshot['counters'][name] = metric.value
+            else:
+                snapshot['histograms'][name] = metric.snapshot()
+        for name, (callback, _) in sorted(gauges.items()):
+            snapshot['gauges'][name] = self._read_gauge(callback)
+        return snapshot
+
+    def render_prometheus(self):
+        """Prometheus text exposition format"""
+        with self._lock:
+            metrics = dict(self._metrics)
+            gauges = dict(self._gauges)
+
+        lines = []
+        for name, metric in sorted(metrics.items()):
+            full_name = self.prefix + name
+            if metric.help:
+                lines.append(f"# HELP {full_name} {metric.help}")
+            if isinstance(metric, Counter):
+                lines.append(f"# TYPE {full_name} counter")
+                lines.append(f"{full_name} {metric.value}")
+                continue
+
+            lines.append(f"# TYPE {full_name} histogram")
+            with metric._lock:
+                counts, count, total = list(metric.counts), metric.count, metric.sum
+            cumulative = 0
+            for bound, bucket_count in zip(metric.buckets, counts):
+                cumulative += bucket_count
+                lines.append(f'{full_name}_bucket{{le="{bound}"}} {cumulative}')
+            lines.append(f'{full_name}_bucket{{le="+Inf"}} {count}')
+            lines.append(f"{full_name}_sum {total}")
+            lines.append(f"{full_name}_count {count}")
+
+        for name, (callback, help_text) in sorted(gauges.items()):
+            full_name = self.prefix + name
+            if help_text:
+                lines.append(f"# HELP {full_name} {help_text}")
+            lines.append(f"# TYPE {full_name} gauge")
+            lines.append(f"{full_name} {self._read_gauge(callback)}")
+
+        return "\n".join(lines) + "\n"
+
+    def _get_or_create(self, name, factory):
+        """Thread-safe metric lookup"""
+        metric = self._metrics.get(name)
+        if metric is None:
+            with self._lock:
+                metric = self._metrics.setdefault(name, factory())
+        return metric
+
+    @staticmethod
+    def _read_gauge(callback):
+        """Gauge callbacks must never break a scrape"""
+        try:
+            return float(callback())
+        except Exception:
+            return float('nan')
+
+
+class MetricsServer:
+    """Local HTTP endpoint serving the Prometheus text format on /metrics"""
+
+    def __init__(self, registry, port, host="127.0.0.1"):
+        self.registry = registry
+        self.host = host
+        self.port = port
+        self.httpd = None
+        self.thread = None
+
+    def start(self):
+        """Starts serving in a daemon thread"""
+        registry = self.registry
+
+        class Handler(http.server.BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split('?')[0] != '/metrics':
+                    self.send_error(404)
+                    return
+                body = registry.render_prometheus().encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                # Scrapes are not worth a log line
+                pass
+
+        self.httpd = http.server.ThreadingHTTPServer((self.host, self.port), Handler)
+        self.port = self.httpd.server_address[1]
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self.thread.start()
+        logging.info(f"Metrics endpoint: http://{self.host}:{self.port}/metrics")
+
+    def stop(self):
+        """Stops the HTTP server"""
+        if self.httpd:
+            self.httpd.shutdown()
+            self.httpd.server_close()
+            self.httpd = None
@@ -6,331 +6,511 @@ Advanced version with configurable settings:
 - Adjustable sampling rate
 - Adjustable target volume
 - Persistent saved settings
+- Headless daemon mode (--headless) without tkinter/pystray/PIL
 """
 
 import time
 import threading
-import tkinter as tk
-from tkinter import messagebox, ttk
-import pystray
-from PIL import Image, ImageDraw
 import logging
-import subprocess
 import json
 import os
+import sys
+import argparse
+import signal
+
+from audio_backends import BackendTimeoutError, DeviceUnavailableError, default_registry
+from circuit_breaker import CLOSED, HALF_OPEN, OPEN, STATE_VALUES, CircuitBreaker
+from control_api import ControlError, ControlServer, control_address
+from device_registry import DeviceRegistry
+from drift_patterns import DriftPatternLearner
+from event_journal import EventJournal, format_record
+from logging_setup import dropped_records, install_queue_handler, start_file_logging, stop_logging
+from metrics import FAST_BUCKETS, MetricsRegistry, MetricsServer
+from scheduling import AdaptiveInterval, EndpointScheduler
+from settings_store import SettingsStore, resolve_settings_path
+from tray_icons import BREAKER_ICON_STATUS, IconCache, icon_key
+from tray_menu import TrayMenu
+from tray_state import CoalescingRefresher, StateStore
 
 # Logging konfigurieren - NUR in Datei, KEIN Terminal-Output mehr!
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler('microphone_keeper.log')
-        # StreamHandler entfernt für Silent-Modus
-    ]
-)
-
-class SettingsDialog:
-    """Dialog for program settings"""
-
-    def __init__(self, parent, current_settings):
-        self.parent = parent
-        self.result = None
-        self.current_settings = current_settings.copy()
-
-        # Create and hide main tkinter root
-        self.root = tk.Tk()
-        self.root.withdraw()  # Hide the main window
-
-        # Create dialog
-        self.dialog = tk.Toplevel(self.root)
-        self.dialog.title("🎤 Microphone Volume Keeper - Settings")
-        self.dialog.geometry("500x400")
-        self.dialog.resizable(False, False)
-        self.dialog.grab_set()
-
-        # Center dialog
-        self.dialog.update_idletasks()
-        x = (self.dialog.winfo_screenwidth() // 2) - (500 // 2)
-        y = (self.dialog.winfo_screenheight() // 2) - (400 // 2)
-        self.dialog.geometry(f"500x400+{x}+{y}")
-
-        self.create_widgets()
-
-    def create_widgets(self):
-        """Creates the dialog widgets"""
-
-        # Main frame
-        main_frame = ttk.Frame(self.dialog, padding="20")
-        main_frame.grid(row=0, column=0, sticky=(tk.W, tk.E, tk.N, tk.S))
-
-        # Title
-        title_label = ttk.Label(main_frame, text="🎤 Microphone Volume Keeper",
-                               font=("Arial", 14, "bold"))
-        title_label.grid(row=0, column=0, columnspan=2, pady=(0, 20))
-
-        # Audio-Device Auswahl
-        ttk.Label(main_frame, text="Audio Device:", font=("Arial", 10, "bold")).grid(
-            row=1, column=0, sticky=tk.W, pady=(0, 5))
-
-        self.device_var = tk.StringVar(value=self.current_settings.get('device', 'Standard'))
-        self.device_combo = ttk.Combobox(main_frame, textvariable=self.device_var,
-                                        width=40, state="readonly")
-        self.device_combo.grid(row=2, column=0, columnspan=2, sticky=(tk.W, tk.E), pady=(0, 15))
-
-        # Load available devices
-        self.load_audio_devices()
-
-        # Ziel-Lautstärke
-        ttk.Label(main_frame, text="Target Volume:", font=("Arial", 10, "bold")).grid(
-            row=3, column=0, sticky=tk.W, pady=(0, 5))
-
-        volume_frame = ttk.Frame(main_frame)
-        volume_frame.grid(row=4, column=0, columnspan=2, sticky=(tk.W, tk.E), pady=(0, 15))
-
-        self.volume_var = tk.IntVar(value=self.current_settings.get('target_volume', 100))
-        self.volume_scale = ttk.Scale(volume_frame, from_=1, to=100,
-                                     variable=self.volume_var, orient=tk.HORIZONTAL)
-        self.volume_scale.grid(row=0, column=0, sticky=(tk.W, tk.E), padx=(0, 10))
-
-        self.volume_label = ttk.Label(volume_frame, text="100%")
-        self.volume_label.grid(row=0, column=1)
-
-        # Scale update callback
-        self.volume_scale.configure(command=self.update_volume_label)
-        self.update_volume_label(self.volume_var.get())
-
-        # Abtastrate
-        ttk.Label(main_frame, text="Sampling Rate:", font=("Arial", 10, "bold")).grid(
-            row=5, column=0, sticky=tk.W, pady=(0, 5))
-
-        rate_frame = ttk.Frame(main_frame)
-        rate_frame.grid(row=6, column=0, columnspan=2, sticky=(tk.W, tk.E), pady=(0, 15))
-
-        self.rate_var = tk.DoubleVar(value=self.current_settings.get('check_interval', 0.5))
-        self.rate_scale = ttk.Scale(rate_frame, from_=0.1, to=5.0,
-                                   variable=self.rate_var, orient=tk.HORIZONTAL)
-        self.rate_scale.grid(row=0, column=0, sticky=(tk.W, tk.E), padx=(0, 10))
-
-        self.rate_label = ttk.Label(rate_frame, text="0.5s")
-        self.rate_label.grid(row=0, column=1)
-
-        # Rate-Update-Callback
-        self.rate_scale.configure(command=self.update_rate_label)
-        self.update_rate_label(self.rate_var.get())
-
-        # Info-Text
-        info_text = ("💡 Tips:\n"
-                    "• Lower sampling rate = Faster response\n"
-                    "• Default device = Automatic detection\n"
-                    "• Settings are automatically saved")
-
-        info_label = ttk.Label(main_frame, text=info_text,
-                              font=("Arial", 9), foreground="gray")
-        info_label.grid(row=7, column=0, columnspan=2, pady=(10, 20), sticky=tk.W)
-
-        # Buttons
-        button_frame = ttk.Frame(main_frame)
-        button_frame.grid(row=8, column=0, columnspan=2, pady=(10, 0))
-
-        ttk.Button(button_frame, text="✅ OK", command=self.ok_clicked).grid(
-            row=0, column=0, padx=(0, 10))
-        ttk.Button(button_frame, text="❌ Cancel", command=self.cancel_clicked).grid(
-            row=0, column=1)
-
-        # Grid configuration
-        main_frame.columnconfigure(0, weight=1)
-        volume_frame.columnconfigure(0, weight=1)
-        rate_frame.columnconfigure(0, weight=1)
-
-    def load_audio_devices(self):
-        """Loads available audio devices"""
-        devices = ["Default (Automatic)"]
-
-        try:
-            # Versuche AudioDeviceCmdlets zu verwenden
-            result = subprocess.run([
-                'powershell', '-Command',
-                'Import-Module AudioDeviceCmdlets -ErrorAction SilentlyContinue; '
-                'Get-AudioDevice -List | Where-Object {$_.Type -eq "Recording"} | '
-                'Select-Object -ExpandProperty Name'
-            ], capture_output=True, text=True, timeout=10, encoding='utf-8',
-            creationflags=subprocess.CREATE_NO_WINDOW)
-
-            if result.returncode == 0 and result.stdout.strip():
-                device_names = [line.strip() for line in result.stdout.strip().split('\n')
-                               if line.strip()]
-                devices.extend(device_names)
-
-        except Exception as e:
-            logging.warning(f"Konnte Audio-Geräte nicht laden: {e}")
-
-        self.device_combo['values'] = devices
-
-        # Aktuelles Gerät auswählen falls vorhanden
-        current_device = self.current_settings.get('device', 'Default (Automatic)')
-        if current_device in devices:
-            self.device_var.set(current_device)
-        else:
-            self.device_var.set("Default (Automatic)")
-
-    def update_volume_label(self, value):
-        """Updates the volume label"""
-        self.volume_label.config(text=f"{int(float(value))}%")
-
-    def update_rate_label(self, value):
-        """Updates the sampling rate label"""
-        self.rate_label.config(text=f"{float(value):.1f}s")
-
-    def ok_clicked(self):
-        """OK button clicked"""
-        self.result = {
-            'device': self.device_var.get(),
-            'target_volume': int(self.volume_var.get()),
-            'check_interval': round(float(self.rate_var.get()), 1)
-        }
-        self.dialog.destroy()
-        self.root.quit()  # Beende die tkinter-Hauptschleife
-
-    def cancel_clicked(self):
-        """Cancel button clicked"""
-        self.result = None
-        self.dialog.destroy()
-        self.root.quit()  # Beende die tkinter-Hauptschleife
-
-    def show(self):
-        """Shows the dialog and waits for result"""
-        self.dialog.wait_window()
-        self.root.destroy()  # Zerstöre das Root-Fenster komplett
-        return self.result
-
+# Records go through a queue; the file (see log_* settings) is written by a
+# listener thread started once the settings are loaded
+install_queue_handler()
 
 class MicrophoneVolumeKeeperAdvanced:
     """Advanced version with configurable settings"""
 
-    def __init__(self):
+    def __init__(self, settings_path=None):
         # Default settings
         self.default_settings = {
             'device': 'Default (Automatic)',
             'target_volume': 100,
-            'check_interval': 0.5
+            'check_interval': 0.5,
+            'device_cache_ttl': 300,
+            'event_driven': True,
+            'event_fallback_interval': 10.0,
+            'audio_backend': 'auto',
+            'adaptive_interval': True,
+            'max_interval': 5.0,
+            'tolerance': 2,
+            'devices': [],
+            'metrics_port': 0,
+            'engine': 'thread',
+            'event_journal': True,
+            'log_file': 'microphone_keeper.log',
+            'log_max_bytes': 1048576,
+            'log_backups': 3,
+            'log_rotation': 'size',
+            'log_json': False,
+            'control_api': True,
+            'scale_mode': False,
+            'predictive_polling': True,
+            'breaker_failures': 3,
+            'breaker_max_backoff': 30.0
         }
 
-        # Load settings
+        # Load settings (file is watched and reloaded while running)
+        self.settings_store = SettingsStore(resolve_settings_path(settings_path), self.default_settings)
         self.settings = self.load_settings()
+        self.start_logging()
 
         # Applicable settings
         self.target_volume = self.settings['target_volume']
         self.check_interval = self.settings['check_interval']
         self.selected_device = self.settings['device']
+        self.event_driven = self.settings['event_driven']
+        self.event_fallback_interval = self.settings['event_fallback_interval']
+        self.tolerance = self.settings['tolerance']
+
+        # Multi-device mode: [{'device', 'target_volume', 'tolerance'}, ...]
+        # (empty = only the selected device above is enforced)
+        self.device_targets = [dict(target) for target in self.settings['devices']]
 
         # System variables
         self.running = False
         self.icon = None
         self.monitor_thread = None
+        self.async_engine = None
         self.audio_method = None
 
+        # Audio backends (CoreAudio, AudioDeviceCmdlets, Simulation) - see audio_backends.py
+        self.backend_registry = default_registry()
+        self.backend = None
+        self.backend_probes = []
+
+        # Device name -> endpoint ID, refreshed on device changes or after the TTL
+        self.device_registry = DeviceRegistry(
+            self.list_audio_devices, ttl=self.settings['device_cache_ttl'])
+        self.device_registry.subscribe(self.on_devices_changed)
+
+        # Repeated backend failures pause the checks with backoff instead of retrying every interval
+        self.backend_breaker = CircuitBreaker(
+            failure_threshold=self.settings['breaker_failures'],
+            max_delay=self.settings['breaker_max_backoff'],
+            on_change=self.on_breaker_change)
+
+        # Event-driven mode: backend callbacks wake the monitoring loop
+        self.volume_event = threading.Event()
+        self.pending_event_volumes = {}
+        self.first_event_at = None
+        self.unsubscribe_events = []
+        # Set by the device registry, the loop resubscribes on its next pass
+        self.devices_changed = False
+        self.unsubscribe_device_changes = None
+        # Named devices that are not connected (logged once, skipped until they return)
+        self.missing_devices = set()
+
+        # Set to end a headless run (signals, end of a replayed trace)
+        self.stop_requested = threading.Event()
+
+        # Polling mode: check_interval is the fastest rate, backs off while stable
+        self.poll_interval = AdaptiveInterval(
+            min_interval=self.check_interval,
+            max_interval=self.settings['max_interval'],
+            enabled=self.settings['adaptive_interval'])
+        # Scale mode: one due time per endpoint instead of one interval for all
+        self.endpoint_scheduler = None
+        # (inputs, list) of active_targets() - rebuilt only when an input changed
+        self.active_targets_cache = ((), None)
+
+        # Learned correction times per device: dense polling only when drift is likely
+        self.drift_patterns = None
+        self.drift_patterns_path = os.path.join(os.path.dirname(self.settings_store.path),
+                                                "microphone_keeper_patterns.json")
+        if self.settings['predictive_polling']:
+            self.drift_patterns = DriftPatternLearner()
+            self.drift_patterns.load(self.drift_patterns_path)
+
         # For intelligent logging
         self.last_volume = None
+        self.last_volumes = {}
         self.correction_count = 0
         self.last_log_time = 0
 
-        # Status history for tray menu (letzte 5 Ereignisse)
-        self.status_history = []
+        # Event journal - tray history (letzte 5 Ereignisse) and correction counts,
+        # kept as JSONL next to the settings file
+        journal_path = None
+        if self.settings['event_journal']:
+            journal_path = os.path.join(os.path.dirname(self.settings_store.path),
+                                        "microphone_keeper_events.jsonl")
+        self.journal = EventJournal(journal_path)
+        self.history_lines = ()
+        self.history_version = None
 
         # Icon status for color coding
         self.icon_status = "unknown"
 
+        # Snapshot the tray reads - published by the monitor, never blocks the UI
+        self.state = StateStore()
+        self.ui_refresher = None
+        self.icon_cache = IconCache()
+        self.icon_key = None
+        self.tray_menu = None
+
+        # Latency histograms and counters (optional /metrics endpoint)
+        self.metrics = MetricsRegistry()
+        self.metrics_server = None
+        self.register_metrics()
+
+        # Local control endpoint (keeper_ctl.py), started by run_tray/run_headless
+        self.control_server = None
+
         # Test available audio methods
         self.detect_audio_method()
+        self.publish_state()
+
+        if self.settings['metrics_port']:
+            self.start_metrics_server(self.settings['metrics_port'])
+
+    def register_metrics(self):
+        """Creates the metrics so they are exported before their first use"""
+        m = self.metrics
+        m.histogram('backend_set_seconds', "Latency of backend volume writes")
+        m.histogram('backend_ensure_seconds', "Latency of backend read-compare-set calls", FAST_BUCKETS)
+        m.histogram('tick_seconds', "Duration of one monitoring check", FAST_BUCKETS)
+        m.histogram('time_to_correction_seconds',
+                    "Drift detected (event) or last check (polling) until corrected")
+        m.counter('ticks_total', "Monitoring checks")
+        m.counter('volume_events_total', "Volume-change events received from the backend")
+        m.counter('corrections_total', "Volume corrections")
+        m.counter('backend_failures_total', "Failed backend calls")
+        m.counter('backend_timeouts_total', "Backend calls that timed out")
+        m.gauge('backend_respawns_total', lambda: self.backend.respawn_count if self.backend else 0,
+                "Restarts of the backend helper process")
+        m.gauge('monitoring_running', lambda: 1 if self.running else 0,
+                "1 while the monitoring loop runs")
+        m.gauge('backend_circuit_state', lambda: STATE_VALUES[self.backend_breaker.state],
+                "Backend circuit breaker: 0 closed, 1 half-open, 2 open")
+        m.gauge('backend_circuit_trips_total', lambda: self.backend_breaker.trips,
+                "Times the backend circuit breaker opened")
+        m.gauge('backend_checks_skipped_total', lambda: self.backend_breaker.rejected,
+                "Checks skipped while the backend circuit breaker was open")
+        m.gauge('log_records_dropped_total', dropped_records,
+                "Log records dropped because the writer queue was full")
+        m.gauge('journal_records_dropped_total', lambda: self.journal.dropped,
+                "Event journal records not written because the writer queue was full")
+
+    def record_backend_failure(self, error):
+        """Counts a failed backend call"""
+        self.metrics.inc('backend_failures_total')
+        if isinstance(error, BackendTimeoutError):
+            self.metrics.inc('backend_timeouts_total')
+        self.backend_breaker.record_failure()
+
+    def record_backend_success(self):
+        """A backend call answered - resets the breaker's count of failures in a row"""
+        self.backend_breaker.record_success()
+
+    def on_breaker_change(self, old_state, new_state):
+        """Backend circuit breaker opened/closed - journal and tray colour"""
+        if new_state == OPEN and old_state != HALF_OPEN:
+            self.add_status_event("BACKEND", f"{self.audio_method} failing - backing off")
+        elif old_state != OPEN and new_state not in (OPEN, HALF_OPEN):
+            self.add_status_event("BACKEND", f"{self.audio_method} recovered")
+        self.publish_state()
+
+    def on_devices_changed(self, devices):
+        """Device list changed - resubscribe the volume events (replugged devices get new
+        subscriptions) and check right away, an enforced device showing up again ends the backoff"""
+        self.devices_changed = True
+        if self.backend_breaker.state != CLOSED:
+            names = {device['name'] for device in devices}
+            if any(target['device'] in names or (target['device'] == "Default (Automatic)" and names)
+                   for target in self.active_targets()):
+                self.backend_breaker.probe_now()
+        self.wake_monitor()
+
+    def metrics_snapshot(self):
+        """Metrics plus the keeper state as a plain dict"""
+        snapshot = self.metrics.snapshot()
+        snapshot['state'] = {
+            'running': self.running,
+            'audio_method': self.audio_method,
+            'correction_count': self.correction_count,
+            'last_volume': self.last_volume,
+        }
+        return snapshot
 
-    def load_settings(self):
-        """Loads settings from file"""
-        settings_file = "microphone_keeper_settings.json"
-
+    def start_metrics_server(self, port):
+        """Serves the metrics in Prometheus text format on 127.0.0.1:port"""
+        try:
+            self.metrics_server = MetricsServer(self.metrics, port)
+            self.metrics_server.start()
+        except OSError as e:
+            logging.error(f"Could not start metrics endpoint on port {port}: {e}")
+            self.metrics_server = None
+
+    def stop_metrics_server(self):
+        """Stops the metrics endpoint"""
+        if self.metrics_server:
+            self.metrics_server.stop()
+            self.metrics_server = None
+
+    def start_control_api(self):
+        """Serves status/metrics/set_target/pause/resume/devices on a local socket"""
+        methods = {
+            'status': self.control_status,
+            'metrics': self.metrics_snapshot,
+            'devices': self.control_devices,
+            'set_target': self.control_set_target,
+            'pause': self.control_pause,
+            'resume': self.control_resume,
+        }
         try:
-            if os.path.exists(settings_file):
-                with open(settings_file, 'r', encoding='utf-8') as f:
-                    loaded_settings = json.load(f)
+            self.control_server = ControlServer(methods, control_address(self.settings_store.path))
+            self.control_server.start()
+        except OSError as e:
+            logging.error(f"Could not start control API: {e}")
+            self.control_server = None
+
+    def stop_control_api(self):
+        """Stops the control endpoint"""
+        if self.control_server:
+            self.control_server.stop()
+            self.control_server = None
+
+    def control_status(self):
+        """Published state as a dict (no backend call)"""
+        state = self.state.snapshot()
+        return {
+            'running': state.running,
+            'audio_method': state.audio_method,
+            'icon_status': state.icon_status,
+            'selected_device': state.selected_device,
+            'target_volume': state.target_volume,
+            'tolerance': state.tolerance,
+            'check_interval': state.check_interval,
+            'targets': [{'device': device, 'volume': volume, 'target_volume': target_volume,
+                         'tolerance': tolerance}
+                        for device, volume, target_volume, tolerance in state.targets],
+            'correction_count': state.correction_count,
+            'history': list(state.status_history),
+            'backend_health': self.backend_breaker.stats(),
+        }
+
+    def control_devices(self):
+        """Cached device list (no enumeration)"""
+        return {'devices': self.device_registry.cached_devices(),
+                'stale': self.device_registry.is_stale()}
+
+    def control_set_target(self, volume, device=None):
+        """Changes the target volume (of one device of the devices list, default: all) and saves it"""
+        if isinstance(volume, bool) or not isinstance(volume, int) or not 0 <= volume <= 100:
+            raise ControlError("volume must be an integer between 0 and 100")
+        if device is None:
+            update = {'target_volume': volume}
+            if self.device_targets:
+                # Multi-device mode enforces the per-device targets - the global one alone changes nothing
+                update['devices'] = [dict(target, target_volume=volume) for target in self.device_targets]
+            changes = self.apply_settings(update)
+        else:
+            targets = [dict(target) for target in self.device_targets]
+            matching = [target for target in targets if target['device'] == device]
+            if not matching:
+                raise ControlError(f"{device} is not in the devices list")
+            for target in matching:
+                target['target_volume'] = volume
+            changes = self.apply_settings({'devices': targets}) and [f"Target {device}: {volume}%"]
+        if changes:
+            self.save_settings()
+            self.add_status_event("CONFIG", "Control API: " + ", ".join(changes))
+            self.publish_state()
+        return {'message': ", ".join(changes) or "unchanged", 'changes': changes}
+
+    def control_pause(self):
+        """Stops monitoring"""
+        if not self.running:
+            return {'message': "already paused"}
+        self.stop_monitoring()
+        return {'message': "paused"}
 
-                # Merge with default settings
-                settings = self.default_settings.copy()
-                settings.update(loaded_settings)
+    def control_resume(self):
+        """Starts monitoring"""
+        if self.running:
+            return {'message': "already running"}
+        self.start_monitoring()
+        return {'message': "resumed"}
 
-                logging.info(f"Settings loaded: {settings}")
-                return settings
-        except Exception as e:
-            logging.warning(f"Could not load settings: {e}")
+    def start_logging(self):
+        """Starts the log writer thread (relative log_file: next to the settings file)"""
+        log_file = os.path.join(os.path.dirname(self.settings_store.path),
+                                os.path.expanduser(self.settings['log_file']))
+        try:
+            start_file_logging(log_file,
+                               max_bytes=self.settings['log_max_bytes'],
+                               backups=self.settings['log_backups'],
+                               rotation=self.settings['log_rotation'],
+                               json_lines=self.settings['log_json'])
+        except OSError as e:
+            print(f"Could not open log file {log_file}: {e}", file=sys.stderr)
 
-        # Fallback to default settings
-        return self.default_settings.copy()
+    def load_settings(self):
+        """Loads settings from file"""
+        settings = self.settings_store.load()
+        logging.info(f"Settings loaded from {self.settings_store.path}: {settings}")
+        return settings
 
     def save_settings(self):
-        """Saves current settings to file"""
-        settings_file = "microphone_keeper_settings.json"
-
+        """Saves current settings to file (atomic, debounced)"""
         current_settings = {
             'device': self.selected_device,
             'target_volume': self.target_volume,
-            'check_interval': self.check_interval
+            'check_interval': self.check_interval,
+            'device_cache_ttl': self.device_registry.ttl,
+            'event_driven': self.event_driven,
+            'event_fallback_interval': self.event_fallback_interval,
+            'audio_backend': self.settings['audio_backend'],
+            'adaptive_interval': self.poll_interval.enabled,
+            'max_interval': self.poll_interval.max_interval,
+            'tolerance': self.tolerance,
+            'devices': self.device_targets,
+            'metrics_port': self.settings['metrics_port'],
+            'engine': self.settings['engine'],
+            'event_journal': self.settings['event_journal'],
+            'log_file': self.settings['log_file'],
+            'log_max_bytes': self.settings['log_max_bytes'],
+            'log_backups': self.settings['log_backups'],
+            'log_rotation': self.settings['log_rotation'],
+            'log_json': self.settings['log_json'],
+            'control_api': self.settings['control_api'],
+            'scale_mode': self.settings['scale_mode'],
+            'predictive_polling': self.settings['predictive_polling'],
+            'breaker_failures': self.backend_breaker.failure_threshold,
+            'breaker_max_backoff': self.backend_breaker.max_delay
         }
 
-        try:
-            with open(settings_file, 'w', encoding='utf-8') as f:
-                json.dump(current_settings, f, indent=2, ensure_ascii=False)
-
-            logging.info(f"Settings saved: {current_settings}")
-            self.add_status_event("SETTINGS", "Settings saved")
+        self.settings.update(current_settings)
+        self.settings_store.save(current_settings)
+        self.add_status_event("SETTINGS", "Settings saved")
+
+    def apply_settings(self, settings):
+        """Applies target, interval and device settings live, returns the changes"""
+        changes = []
+
+        if settings.get('target_volume', self.target_volume) != self.target_volume:
+            self.target_volume = settings['target_volume']
+            changes.append(f"Target: {self.target_volume}%")
+        if settings.get('check_interval', self.check_interval) != self.check_interval:
+            self.check_interval = settings['check_interval']
+            changes.append(f"Rate: {self.check_interval}s")
+        if settings.get('adaptive_interval', self.poll_interval.enabled) != self.poll_interval.enabled:
+            changes.append(f"Adaptive: {'on' if settings['adaptive_interval'] else 'off'}")
+        if settings.get('max_interval', self.poll_interval.max_interval) != self.poll_interval.max_interval:
+            changes.append(f"Max rate: {settings['max_interval']}s")
+        if settings.get('tolerance', self.tolerance) != self.tolerance:
+            self.tolerance = settings['tolerance']
+            changes.append(f"Tolerance: ±{self.tolerance}%")
+        if settings.get('devices', self.device_targets) != self.device_targets:
+            self.device_targets = [dict(target) for target in settings['devices']]
+            changes.append(f"Devices: {len(self.device_targets)}")
+        if settings.get('device', self.selected_device) != self.selected_device:
+            self.selected_device = settings['device']
+            device_short = self.selected_device[:20] + "..." if len(self.selected_device) > 20 else self.selected_device
+            changes.append(f"Device: {device_short}")
+        if settings.get('event_fallback_interval', self.event_fallback_interval) != self.event_fallback_interval:
+            self.event_fallback_interval = settings['event_fallback_interval']
+            changes.append(f"Fallback: {self.event_fallback_interval}s")
+
+        self.device_registry.ttl = settings.get('device_cache_ttl', self.device_registry.ttl)
+        self.backend_breaker.failure_threshold = settings.get('breaker_failures',
+                                                              self.backend_breaker.failure_threshold)
+        # Like the CircuitBreaker constructor: the backoff cannot end below its first step
+        self.backend_breaker.max_delay = max(self.backend_breaker.base_delay,
+                                             settings.get('breaker_max_backoff', self.backend_breaker.max_delay))
+        self.event_driven = settings.get('event_driven', self.event_driven)
+        for key in ('audio_backend', 'engine', 'metrics_port', 'log_file', 'log_json'):
+            if key in settings and settings[key] != self.settings[key]:
+                logging.info(f"Setting '{key}' changed - takes effect after a restart")
+        self.settings.update(settings)
+
+        if changes:
+            self.poll_interval.configure(
+                min_interval=self.check_interval,
+                max_interval=settings.get('max_interval'),
+                enabled=settings.get('adaptive_interval'))
+            # Re-check right away with the new target
+            self.wake_monitor()
+        return changes
+
+    def check_settings_file(self):
+        """Applies external edits of the settings file (one stat() every few seconds)"""
+        settings = self.settings_store.check_for_changes()
+        if settings is None:
+            return False
 
-        except Exception as e:
-            logging.error(f"Could not save settings: {e}")
+        changes = self.apply_settings(settings)
+        logging.info(f"Settings file changed: {', '.join(changes) or 'no live changes'}")
+        if changes:
+            self.add_status_event("CONFIG", "Reloaded: " + ", ".join(changes))
+            self.publish_state()
+        return True
 
     def show_settings_dialog(self, icon=None, item=None):
         """Shows the settings dialog"""
+        # GUI modules are only loaded when the tray actually needs them
+        from tkinter import messagebox
+        from settings_dialog import SettingsDialog
+
         try:
             # Current status for dialog
             current_settings = {
                 'device': self.selected_device,
                 'target_volume': self.target_volume,
-                'check_interval': self.check_interval
+                'check_interval': self.check_interval,
+                'adaptive_interval': self.poll_interval.enabled,
+                'tolerance': self.tolerance,
+                'devices': [dict(target) for target in self.device_targets]
             }
 
-            # Dialog anzeigen
-            dialog = SettingsDialog(None, current_settings)
+            # Dialog anzeigen - device names from the warm cache, live updates while open
+            device_names = [device['name'] for device in self.device_registry.cached_devices()]
+            if self.device_registry.is_stale():
+                self.device_registry.invalidate("settings opened")
+            dialog = SettingsDialog(None, current_settings, devices=device_names,
+                                    subscribe_devices=self.device_registry.subscribe)
             result = dialog.show()
 
             if result:
                 # Apply new settings
-                old_settings = current_settings.copy()
-
-                self.selected_device = result['device']
-                self.target_volume = result['target_volume']
-                self.check_interval = result['check_interval']
+                changes = self.apply_settings(result)
 
                 # Einstellungen speichern
                 self.save_settings()
 
                 # Add status event
-                changes = []
-                if old_settings['target_volume'] != self.target_volume:
-                    changes.append(f"Target: {self.target_volume}%")
-                if old_settings['check_interval'] != self.check_interval:
-                    changes.append(f"Rate: {self.check_interval}s")
-                if old_settings['device'] != self.selected_device:
-                    device_short = self.selected_device[:20] + "..." if len(self.selected_device) > 20 else self.selected_device
-                    changes.append(f"Device: {device_short}")
-
                 if changes:
                     self.add_status_event("CONFIG", ", ".join(changes))
 
                 # Update menu
-                self.update_menu()
+                self.publish_state()
 
                 # Info dialog
                 messagebox.showinfo(
                     "✅ Settings Saved",
                     f"New Settings:\n\n"
                     f"🎤 Device: {self.selected_device}\n"
-                    f"🎯 Target Volume: {self.target_volume}%\n"
+                    f"🎯 Target Volume: {self.target_volume}% (±{self.tolerance}%)\n"
+                    f"🎛️ Enforced Devices: {len(self.active_targets())}\n"
                     f"⏱️ Sampling Rate: {self.check_interval}s\n\n"
                     f"Changes are active immediately!"
                 )
@@ -346,281 +526,681 @@ class MicrophoneVolumeKeeperAdvanced:
         """Detects which audio method is available"""
         logging.info("Detecting available audio methods...")
 
-        # Method 1: AudioDeviceCmdlets PowerShell module
-        if self.test_audio_device_cmdlets():
-            self.audio_method = "AudioDeviceCmdlets"
-            self.icon_status = "active"  # Grün - Echte API
-            logging.info("OK: AudioDeviceCmdlets PowerShell module available")
-            return
+        # Cheapest working backend wins, the simulation is only the fallback
+        self.backend, self.backend_probes = self.backend_registry.select(
+            preferred=self.settings['audio_backend'])
+        self.audio_method = self.backend.name
+        self.icon_status = self.backend.icon_status
 
-        # Fallback: Simulation
-        self.audio_method = "Simulation"
-        self.icon_status = "simulation"  # Gelb - Simulation
-        logging.warning("WARNING: No real audio API available - using simulation")
+        if self.icon_status == "simulation":
+            # Gelb - Simulation
+            self.backend.set_volume(self.target_volume)
+            logging.warning("WARNING: No real audio API available - using simulation")
+        else:
+            # Grün - Echte API
+            logging.info(f"OK: {self.audio_method} audio backend available")
 
-    def test_audio_device_cmdlets(self):
-        """Tests if AudioDeviceCmdlets is available"""
+    def record_trace(self, path):
+        """Writes every backend call of this run to a trace file (see backend_trace.py)"""
+        from backend_trace import RecordingBackend
+        self.backend = RecordingBackend(self.backend, path, meta={
+            'target_volume': self.target_volume,
+            'tolerance': self.settings['tolerance'],
+            'check_interval': self.check_interval,
+            'event_driven': self.settings['event_driven'],
+            'event_fallback_interval': self.settings['event_fallback_interval'],
+        })
+        self.device_registry.invalidate("trace recording")
+        logging.info(f"Recording backend trace to {path}")
+
+    def replay_trace(self, path, speed=10.0):
+        """Replaces the backend with a recorded trace, played `speed` times faster"""
+        from backend_trace import ReplayBackend
+        self.backend.close()
+        self.backend = ReplayBackend(path, speed=speed, on_finished=self.stop_requested.set,
+                                     linger=self.settings['max_interval'] + self.check_interval)
+        self.audio_method = self.backend.name
+        self.icon_status = self.backend.icon_status
+        self.device_registry.invalidate("trace replay")
+        logging.info(f"Replaying backend trace {path} ({len(self.backend.changes)} external changes, "
+                     f"{speed}x)")
+
+    def set_microphone_volume(self, volume, device=None):
+        """Sets the microphone volume"""
         try:
-            result = subprocess.run([
-                'powershell', '-Command',
-                'Get-Module -ListAvailable AudioDeviceCmdlets | Select-Object -First 1'
-            ], capture_output=True, text=True, timeout=5, encoding='utf-8',
-            creationflags=subprocess.CREATE_NO_WINDOW)
-
-            return result.returncode == 0 and 'AudioDeviceCmdlets' in result.stdout
-        except:
+            device_id = self.resolve_device_id(device)
+        except DeviceUnavailableError as e:
+            # Not connected - not the backend's fault, the breaker stays out of it
+            logging.warning(f"{self.audio_method} Set Fehler: {e}")
             return False
+        try:
+            with self.metrics.histogram('backend_set_seconds').time():
+                result = bool(self.backend.set_volume(volume, device_id))
+            self.record_backend_success()
+            return result
+
+        except DeviceUnavailableError as e:
+            logging.error(f"{self.audio_method} Set Fehler: {e}")
+            self.record_backend_failure(e)
+            self.device_registry.invalidate("endpoint not available")
+        except Exception as e:
+            logging.error(f"{self.audio_method} Set Fehler: {e}")
+            self.record_backend_failure(e)
+        return False
 
-    def get_microphone_volume(self):
-        """Gets the current microphone volume"""
-        if self.audio_method == "AudioDeviceCmdlets":
-            return self.get_volume_audio_device_cmdlets()
+    def list_audio_devices(self):
+        """Lists recording devices of the active backend"""
+        return self.backend.list_devices()
+
+    def resolve_device_id(self, device=None):
+        """Cached endpoint ID of a device (default: selected), None for the Windows default
+
+        Raises DeviceUnavailableError for a named device that is not connected - it
+        must not fall back to the default endpoint.
+        """
+        device = device or self.selected_device
+        if not device or device == "Default (Automatic)":
+            return None
+        device_id = self.device_registry.resolve(device)
+        if device_id is None:
+            raise DeviceUnavailableError(f"{device} is not connected")
+        return device_id
+
+    def connected_targets(self, targets):
+        """(target, device_id) for the targets whose device is connected"""
+        connected = []
+        missing = set()
+        for target in targets:
+            try:
+                connected.append((target, self.resolve_device_id(target['device'])))
+            except DeviceUnavailableError:
+                missing.add(target['device'])
+
+        for device in sorted(missing - self.missing_devices):
+            logging.warning(f"{device} is not connected - skipped until it is back")
+        self.missing_devices = (self.missing_devices | missing) - {target['device'] for target, _ in connected}
+        return connected
+
+    def active_targets(self):
+        """Devices to enforce with their target volume and tolerance (read-only, cached)"""
+        # device_targets is only ever replaced, never changed in place
+        key = (self.device_targets, self.selected_device, self.target_volume, self.tolerance)
+        cached_key, targets = self.active_targets_cache
+        if len(key) == len(cached_key) and all(a is b for a, b in zip(key, cached_key)):
+            return targets
+
+        if self.device_targets:
+            targets = [{'device': target['device'],
+                        'target_volume': target.get('target_volume', self.target_volume),
+                        'tolerance': target.get('tolerance', self.tolerance)}
+                       for target in self.device_targets]
         else:
-            return self.get_volume_simulation()
+            targets = [{'device': self.selected_device,
+                        'target_volume': self.target_volume,
+                        'tolerance': self.tolerance}]
+        self.active_targets_cache = (key, targets)
+        return targets
+
+    def add_status_event(self, event_type, message, device=None, before=None, after=None, latency=None):
+        """Adds an event to the journal (and with it the status history)"""
+        self.journal.append(event_type, message, device=device, before=before, after=after, latency=latency)
+
+    def status_history(self):
+        """Last 5 journal events as menu lines (formatted once per journal change)"""
+        if self.history_version != self.journal.version:
+            self.history_version = self.journal.version
+            self.history_lines = tuple(format_record(record) for record in self.journal.recent(5))
+        return self.history_lines
+
+    def publish_state(self):
+        """Publishes the current state for the tray and requests a refresh if it changed"""
+        targets = self.active_targets()
+        changed = self.state.publish(
+            running=self.running,
+            audio_method=self.audio_method,
+            # A tripped backend circuit overrides the backend's colour
+            icon_status=BREAKER_ICON_STATUS.get(self.backend_breaker.state, self.icon_status),
+            selected_device=self.selected_device,
+            target_volume=self.target_volume,
+            tolerance=self.tolerance,
+            check_interval=self.check_interval,
+            multi_device=bool(self.device_targets),
+            targets=tuple((target['device'], self.last_volumes.get(target['device']),
+                           target['target_volume'], target['tolerance']) for target in targets),
+            correction_count=self.correction_count,
+            status_history=self.status_history(),
+        )
+        if changed and self.ui_refresher:
+            self.ui_refresher.request()
+        return changed
 
-    def set_microphone_volume(self, volume):
-        """Sets the microphone volume"""
-        if self.audio_method == "AudioDeviceCmdlets":
-            return self.set_volume_audio_device_cmdlets(volume)
-        else:
-            return self.set_volume_simulation(volume)
+    def refresh_ui(self):
+        """Redraws icon and menu from the published state (refresher thread)"""
+        self.update_icon()
+        self.update_menu()
 
-    def get_volume_audio_device_cmdlets(self):
-        """AudioDeviceCmdlets method with device selection - SIMPLE FIX"""
-        try:
-            # Base command
-            if self.selected_device == "Default (Automatic)":
-                cmd = 'Import-Module AudioDeviceCmdlets -ErrorAction SilentlyContinue; Get-AudioDevice -RecordingVolume'
+    def enforce_volume(self, current_volume, target=None, detected_at=None):
+        """Corrects one volume reading, True if it was corrected or had changed"""
+        target = target or self.active_targets()[0]
+        after = current_volume
+
+        # Check if volume deviates from target
+        if abs(current_volume - target['target_volume']) > target['tolerance']:
+            # Correct volume
+            if self.set_microphone_volume(target['target_volume'], target['device']):
+                after = target['target_volume']
             else:
-                # Select specific device - Verwende ID direkt
-                cmd = f'''
-                Import-Module AudioDeviceCmdlets -ErrorAction SilentlyContinue
-                $device = Get-AudioDevice -List | Where-Object {{$_.Name -eq "{self.selected_device}" -and $_.Type -eq "Recording"}} | Select-Object -First 1
-                if ($device) {{
-                    Set-AudioDevice -ID $device.ID
-                }}
-                Get-AudioDevice -RecordingVolume
-                '''
-
-            result = subprocess.run([
-                'powershell', '-Command', cmd
-            ], capture_output=True, text=True, timeout=10, encoding='utf-8',
-            creationflags=subprocess.CREATE_NO_WINDOW)
-
-            if result.returncode == 0 and result.stdout.strip():
-                output = result.stdout.strip()
-
-                # Parse the output - search for the last line mit nur Zahlen und %
-                lines = output.split('\n')
-                for line in reversed(lines):
-                    line = line.strip()
-                    if line and line.replace('%', '').isdigit():
-                        volume_str = line.replace('%', '')
-                        return int(volume_str)
-
-                # Fallback: Try to parse entire output
-                logging.warning(f"Could not extract volume from output: '{output[:100]}...'")
+                after = None
 
-        except Exception as e:
-            logging.error(f"AudioDeviceCmdlets error: {e}")
-        return None
+        return self.record_volume(target, current_volume, after, detected_at)
 
-    def set_volume_audio_device_cmdlets(self, volume):
-        """AudioDeviceCmdlets method with device selection - CORRECTED"""
+    def ensure_volumes(self, targets, detected_at=None):
+        """Read-compare-correct for all targets in one backend call"""
+        targets, requests = self.ensure_requests(targets)
+        if not requests:
+            return False
         try:
-            if self.selected_device == "Default (Automatic)":
-                cmd = f'Import-Module AudioDeviceCmdlets -ErrorAction SilentlyContinue; Set-AudioDevice -RecordingVolume {volume}'
-            else:
-                # Select specific device - Clean command
-                cmd = f'''
-                Import-Module AudioDeviceCmdlets -ErrorAction SilentlyContinue
-                $device = Get-AudioDevice -List | Where-Object {{$_.Name -eq "{self.selected_device}" -and $_.Type -eq "Recording"}} | Select-Object -First 1
-                if ($device) {{
-                    Set-AudioDevice -ID $device.ID
-                    Set-AudioDevice -RecordingVolume {volume}
-                    Write-Output "OK"
-                }} else {{
-                    Set-AudioDevice -RecordingVolume {volume}
-                    Write-Output "OK"
-                }}
-                '''
-
-            result = subprocess.run([
-                'powershell', '-Command', cmd
-            ], capture_output=True, text=True, timeout=10, encoding='utf-8',
-            creationflags=subprocess.CREATE_NO_WINDOW)
-
-            return result.returncode == 0
-
+            with self.metrics.histogram('backend_ensure_seconds').time():
+                outcomes = self.backend.ensure_volumes(requests)
         except Exception as e:
-            logging.error(f"AudioDeviceCmdlets Set Fehler: {e}")
-        return False
+            logging.error(f"{self.audio_method} error: {e}")
+            self.record_backend_failure(e)
+            return False
 
-    def get_volume_simulation(self):
-        """Simulation for demo purposes"""
-        import random
-        if not hasattr(self, '_sim_volume'):
-            self._sim_volume = self.target_volume
+        return self.apply_ensure_outcomes(targets, requests, outcomes, detected_at)
+
+    def ensure_requests(self, targets):
+        """Connected targets and their (device_id, target_volume, tolerance) for backend.ensure_volumes"""
+        connected = self.connected_targets(targets)
+        return ([target for target, _ in connected],
+                [(device_id, target['target_volume'], target['tolerance']) for target, device_id in connected])
+
+    def apply_ensure_outcomes(self, targets, requests, outcomes, detected_at=None):
+        """Records the (before, after) outcomes of an ensure call"""
+        self.check_missing_endpoints(requests, outcomes)
+
+        activity = False
+        for target, outcome in zip(targets, outcomes):
+            if outcome is not None:
+                activity = self.record_volume(target, *outcome, detected_at) or activity
+        return activity
+
+    def check_missing_endpoints(self, requests, outcomes):
+        """Invalidates the device cache if an addressed endpoint could not be read
+
+        The check counts as failed for the circuit breaker only if no endpoint answered.
+        """
+        if any(outcome is None and request[0] for outcome, request in zip(outcomes, requests)):
+            self.metrics.inc('backend_failures_total')
+            # Endpoint vanished (unplugged/re-enumerated) - device-change signal
+            self.device_registry.invalidate("endpoint not available")
+        if any(outcome is not None for outcome in outcomes):
+            self.record_backend_success()
+        elif outcomes:
+            self.backend_breaker.record_failure()
+
+    def record_volume(self, target, current_volume, after, detected_at=None):
+        """Counts and logs one reading and its correction (after = None: set failed)
+
+        detected_at (perf_counter) is when the drift was reported by an event,
+        or the previous check in polling mode (an upper bound).
+        """
+        device = target['device']
+        target_volume = target['target_volume']
+        corrected = False
+
+        # Device name in messages only when several devices are enforced
+        prefix = f"{device}: " if self.device_targets else ""
+        last_volume = self.last_volumes.get(device)
+
+        # Intelligent logging - only on changes
+        volume_changed = (last_volume is None or
+                        abs(current_volume - last_volume) > 1)
+
+        if after is None:
+            logging.warning(f"{prefix}Could not correct volume: {current_volume}%")
+
+        elif after != current_volume:
+            self.correction_count += 1
+            corrected = True
+            self.metrics.inc('corrections_total')
+            latency = None
+            if detected_at is not None:
+                latency = time.perf_counter() - detected_at
+                self.metrics.observe('time_to_correction_seconds', latency)
+
+            if self.drift_patterns:
+                self.drift_patterns.record_correction(device)
+
+            # Every correction goes to the journal, the log stays throttled
+            self.add_status_event("CORRECTION", f"{prefix}{current_volume}% -> {after}%", device=device,
+                                  before=current_volume, after=after, latency=latency)
+
+            # Only log if important
+            current_time = time.time()
+            should_log = (
+                self.correction_count == 1 or  # Erste Correction
+                volume_changed or  # Volume changed
+                self.correction_count % 10 == 0 or  # Jede 10. Correction
+                (current_time - self.last_log_time) > 60  # Every 60 seconds
+            )
 
-        # Simulate occasional volume changes
-        if random.random() < 0.1:  # 10% Chance
-            possible_volumes = [int(self.target_volume * 0.8), int(self.target_volume * 0.75),
-                               int(self.target_volume * 0.9), self.target_volume]
-            self._sim_volume = random.choice(possible_volumes)
+            if should_log:
+                if self.correction_count == 1:
+                    msg = f"{prefix}First correction: {current_volume}% -> {target_volume}%"
+                    logging.info(msg)
+                elif self.correction_count % 10 == 0:
+                    msg = f"{prefix}Correction #{self.correction_count}: {current_volume}% -> {target_volume}% (running stable)"
+                    logging.info(msg)
+                else:
+                    msg = f"{prefix}Volume corrected: {current_volume}% -> {target_volume}%"
+                    logging.info(msg)
 
-        return self._sim_volume
+                self.last_log_time = current_time
 
-    def set_volume_simulation(self, volume):
-        """Simulation for demo purposes"""
-        self._sim_volume = volume
-        return True
+        elif volume_changed and current_volume == target_volume:
+            # Volume is correct and has changed
+            logging.info(f"{prefix}Volume is correct: {current_volume}%")
 
-    def add_status_event(self, event_type, message):
-        """Adds an event to status history"""
-        import datetime
-        timestamp = datetime.datetime.now().strftime("%H:%M:%S")
-        event = f"{timestamp} - {event_type}: {message}"
+        # Save last volume
+        self.last_volumes[device] = current_volume
+        self.last_volume = current_volume
 
-        # Add at the beginning
-        self.status_history.insert(0, event)
+        return corrected or volume_changed
 
-        # Keep only the last 5 events
-        if len(self.status_history) > 5:
-            self.status_history = self.status_history[:5]
+    def subscribe_volume_events(self, targets):
+        """Subscribes to backend volume events, True if event-driven mode is active"""
+        if not self.event_driven:
+            return False
+
+        if not self.backend.supports_events:
+            return False
+
+        # Without polling an unplugged device is only noticed again through the device list
+        self.device_registry.watch(target['device'] for target in targets
+                                   if target['device'] != "Default (Automatic)")
+        try:
+            # Missing devices are subscribed once the registry sees them again
+            for target, device_id in self.connected_targets(targets):
+                self.unsubscribe_events.append(self.backend.subscribe(self.on_volume_event, device_id))
+            return True
+        except Exception as e:
+            logging.warning(f"Volume events not available, falling back to polling: {e}")
+            self.unsubscribe_volume_events()
+            return False
+
+    def unsubscribe_volume_events(self):
+        """Drops the backend volume event subscriptions"""
+        self.device_registry.watch(())
+        unsubscribers, self.unsubscribe_events = self.unsubscribe_events, []
+        for unsubscribe in unsubscribers:
+            try:
+                unsubscribe()
+            except Exception as e:
+                logging.warning(f"Could not unsubscribe volume events: {e}")
+
+    def on_volume_event(self, device_id, volume):
+        """Backend callback - wakes the monitoring loop with the new volume"""
+        self.metrics.inc('volume_events_total')
+        # The backend is talking again - no need to wait for the backoff
+        self.backend_breaker.probe_now()
+        if not self.pending_event_volumes:
+            self.first_event_at = time.perf_counter()
+        self.pending_event_volumes[device_id] = volume
+        self.wake_monitor()
+
+    def match_volume_events(self, targets, events):
+        """Maps event volumes (by endpoint ID) to the targets they belong to"""
+        positions = {}
+        for position, target in enumerate(targets):
+            try:
+                positions.setdefault(self.resolve_device_id(target['device']), position)
+            except DeviceUnavailableError:
+                continue
+        volumes = [None] * len(targets)
+        for event_id, volume in events.items():
+            position = positions.get(event_id, positions.get(None))
+            if position is not None:
+                # Unknown IDs belong to the default endpoint, subscribed without an explicit ID
+                volumes[position] = volume
+        return volumes
+
+    def wake_monitor(self):
+        """Wakes the monitoring loop (stop, settings change)"""
+        self.volume_event.set()
+        if self.async_engine:
+            self.async_engine.wake()
 
     def monitor_volume(self):
         """Continuously monitors microphone volume"""
-        logging.info(f"Volume monitoring started (Methode: {self.audio_method}, Device: {self.selected_device})")
+        targets = self.active_targets()
+        event_driven = self.subscribe_volume_events(targets)
+        mode = "events" if event_driven else "polling"
+        devices = ", ".join(target['device'] for target in targets)
+        logging.info(f"Volume monitoring started (Methode: {self.audio_method}, Device: {devices}, Mode: {mode})")
+
+        # Check once right away instead of waiting for the first event
+        self.wake_monitor()
+        self.poll_interval.reset_stats()
+        if self.drift_patterns:
+            self.drift_patterns.reset_stats()
+        last_check_at = time.perf_counter()
 
         while self.running:
             try:
-                current_volume = self.get_microphone_volume()
-
-                if current_volume is not None:
-                    # Intelligent logging - only on changes
-                    volume_changed = (self.last_volume is None or
-                                    abs(current_volume - self.last_volume) > 1)
-
-                    # Check if volume deviates from target
-                    if abs(current_volume - self.target_volume) > 2:  # 2% Toleranz
-                        # Correct volume
-                        if self.set_microphone_volume(self.target_volume):
-                            self.correction_count += 1
-
-                            # Only log if important
-                            current_time = time.time()
-                            should_log = (
-                                self.correction_count == 1 or  # Erste Correction
-                                volume_changed or  # Volume changed
-                                self.correction_count % 10 == 0 or  # Jede 10. Correction
-                                (current_time - self.last_log_time) > 60  # Every 60 seconds
-                            )
-
-                            if should_log:
-                                if self.correction_count == 1:
-                                    msg = f"First correction: {current_volume}% -> {self.target_volume}%"
-                                    logging.info(msg)
-                                    self.add_status_event("CORRECTION", f"{current_volume}% -> {self.target_volume}%")
-                                elif self.correction_count % 10 == 0:
-                                    msg = f"Correction #{self.correction_count}: {current_volume}% -> {self.target_volume}% (running stable)"
-                                    logging.info(msg)
-                                    self.add_status_event("STABLE", f"#{self.correction_count} Correctionen")
-                                else:
-                                    msg = f"Volume corrected: {current_volume}% -> {self.target_volume}%"
-                                    logging.info(msg)
-                                    self.add_status_event("CORRECTION", f"{current_volume}% -> {self.target_volume}%")
-
-                                self.last_log_time = current_time
-                        else:
-                            logging.warning(f"Could not correct volume: {current_volume}%")
-
-                    elif volume_changed and current_volume == self.target_volume:
-                        # Volume is correct and has changed
-                        logging.info(f"Volume is correct: {current_volume}%")
-
-                    # Save last volume
-                    self.last_volume = current_volume
+                tick_started = time.thread_time()
+                volumes = None
+
+                # External edits of the settings file (amortized stat)
+                self.check_settings_file()
+
+                current_targets = self.active_targets()
+                devices_changed, self.devices_changed = self.devices_changed, False
+                check_now = False
+                if devices_changed or [t['device'] for t in current_targets] != [t['device'] for t in targets]:
+                    # Devices changed in the settings or were (re)plugged - follow them
+                    # with the subscriptions and check right away
+                    self.unsubscribe_volume_events()
+                    event_driven = self.subscribe_volume_events(current_targets)
+                    check_now = True
+                targets = current_targets
+
+                # Backend keeps failing - wait for the breaker instead of calling it every interval
+                if not self.backend_breaker.allow():
+                    self.volume_event.wait(self.backend_breaker.retry_in())
+                    self.volume_event.clear()
+                    continue
+
+                if event_driven:
+                    # After a breaker backoff the probe runs right away instead of
+                    # idling until the fallback poll
+                    if self.backend_breaker.state != HALF_OPEN and not check_now:
+                        # Stay idle until the backend reports a change - the fallback
+                        # poll catches anything a lost notification would miss
+                        self.volume_event.wait(self.event_fallback_interval)
+                        self.volume_event.clear()
+                        if not self.running:
+                            break
+                    events, self.pending_event_volumes = self.pending_event_volumes, {}
+                    if events:
+                        volumes = self.match_volume_events(targets, events)
+
+                # Drift happened at the latest when the event arrived - when
+                # polling, somewhere after the previous check (upper bound)
+                check_started = time.perf_counter()
+                detected_at = self.first_event_at if volumes is not None else last_check_at
+                self.first_event_at = None
+
+                activity = False
+                if volumes is None:
+                    # Read, compare and correct all devices in one backend round-trip
+                    activity = self.ensure_volumes(targets, detected_at)
+                else:
+                    # Volumes already known from the events - only set if needed
+                    for target, current_volume in zip(targets, volumes):
+                        if current_volume is not None:
+                            activity = self.enforce_volume(current_volume, target, detected_at) or activity
+
+                last_check_at = time.perf_counter()
+                self.metrics.observe('tick_seconds', last_check_at - check_started)
+                self.metrics.inc('ticks_total')
+                self.publish_state()
+
+                if not event_driven:
+                    interval = self.next_poll_interval(activity, targets)
+                    self.poll_interval.record_tick(interval, time.thread_time() - tick_started)
+
+                    # Stop and settings changes wake the loop early
+                    self.volume_event.wait(interval)
+                    self.volume_event.clear()
 
+            except Exception as e:
+                logging.error(f"Error in monitoring loop: {e}")
                 time.sleep(self.check_interval)
 
+        self.unsubscribe_volume_events()
+
+        if not event_driven:
+            self.log_polling_stats()
+
+    def monitor_endpoints(self):
+        """Scale mode - all endpoints on one priority-queue schedule, no thread per device"""
+        targets = self.active_targets()
+        event_driven = self.subscribe_volume_events(targets)
+        logging.info(f"Volume monitoring started (Methode: {self.audio_method}, {len(targets)} endpoints, "
+                     f"Mode: {'events' if event_driven else 'polling'}, scale mode)")
+
+        scheduler = self.endpoint_scheduler = EndpointScheduler()
+        schedule = None
+        by_name = {}
+        names_by_id = {}
+        # Previous check per endpoint - the drift happened after it (upper bound)
+        last_checked = {}
+
+        while self.running:
+            try:
+                self.check_settings_file()
+
+                current_targets = self.active_targets()
+                devices_changed, self.devices_changed = self.devices_changed, False
+                if devices_changed or [t['device'] for t in current_targets] != [t['device'] for t in targets]:
+                    # The device change also bumps refresh_count - the new schedule checks everything
+                    self.unsubscribe_volume_events()
+                    event_driven = self.subscribe_volume_events(current_targets)
+                targets = current_targets
+
+                # With events every endpoint only needs the fallback poll
+                if event_driven:
+                    current_schedule = (self.event_fallback_interval, self.event_fallback_interval, False,
+                                        targets, self.device_registry.refresh_count)
+                else:
+                    current_schedule = (self.check_interval, self.poll_interval.max_interval,
+                                        self.poll_interval.enabled, targets, self.device_registry.refresh_count)
+                if current_schedule != schedule:
+                    # Start, settings or device change (re-enumerated IDs) - check everything right away
+                    scheduler.configure(*current_schedule[:3])
+                    by_name = {target['device']: target for target in targets}
+                    names_by_id = {device_id: target['device']
+                                   for target, device_id in self.connected_targets(targets)}
+                    scheduler.sync(by_name)
+                    scheduler.wake_all()
+                    # The lookups above may have loaded the device list
+                    schedule = current_schedule[:4] + (self.device_registry.refresh_count,)
+
+                if not self.backend_breaker.allow():
+                    self.volume_event.wait(self.backend_breaker.retry_in())
+                    self.volume_event.clear()
+                    continue
+                if self.backend_breaker.state == HALF_OPEN:
+                    # Backoff is over - probe now, not when the next endpoint falls due
+                    scheduler.wake_all()
+
+                check_started = time.perf_counter()
+                checked = 0
+
+                events, self.pending_event_volumes = self.pending_event_volumes, {}
+                first_event_at, self.first_event_at = self.first_event_at, None
+                for event_id, volume in events.items():
+                    name = names_by_id.get(event_id, names_by_id.get(None))
+                    if name is not None:
+                        self.enforce_volume(volume, by_name[name], first_event_at)
+                        last_checked[name] = time.perf_counter()
+                        checked += 1
+
+                due = scheduler.pop_due()
+                if due:
+                    self.ensure_endpoints(scheduler, [by_name[name] for name in due], last_checked)
+                    checked += len(due)
+
+                if checked:
+                    self.metrics.observe('tick_seconds', time.perf_counter() - check_started)
+                    self.metrics.inc('ticks_total')
+                    self.publish_state()
+
+                next_due = scheduler.next_due()
+                timeout = self.event_fallback_interval if next_due is None else next_due - scheduler.clock()
+                if self.backend_breaker.state == OPEN:
+                    # Do not sleep past the end of the backoff - the probe runs right then
+                    timeout = min(timeout, self.backend_breaker.retry_in())
+                if timeout > 0:
+                    # Events, stop and settings changes wake the loop early
+                    self.volume_event.wait(timeout)
+                    self.volume_event.clear()
+
             except Exception as e:
                 logging.error(f"Error in monitoring loop: {e}")
                 time.sleep(self.check_interval)
 
+        self.unsubscribe_volume_events()
+        logging.info(f"Scale mode stats: {scheduler.checks} endpoint checks in {scheduler.batches} "
+                     f"backend calls ({scheduler.checks / max(scheduler.batches, 1):.1f} per call)")
+
+    def ensure_endpoints(self, scheduler, targets, last_checked):
+        """One ensure call for the due endpoints, each gets its own next due time"""
+        connected, requests = self.ensure_requests(targets)
+        outcomes = {}
+        if requests:
+            try:
+                with self.metrics.histogram('backend_ensure_seconds').time():
+                    results = self.backend.ensure_volumes(requests)
+            except Exception as e:
+                logging.error(f"{self.audio_method} error: {e}")
+                self.record_backend_failure(e)
+            else:
+                self.check_missing_endpoints(requests, results)
+                outcomes = {target['device']: outcome for target, outcome in zip(connected, results)}
+
+        now = time.perf_counter()
+        for target in targets:
+            # Missing devices keep their schedule, the registry reports when they return
+            outcome = outcomes.get(target['device'])
+            name = target['device']
+            activity = False
+            if outcome is not None:
+                activity = self.record_volume(target, *outcome, last_checked.get(name))
+            last_checked[name] = now
+            # A learned drift window keeps the endpoint at the fastest rate
+            scheduler.reschedule(name, activity or bool(self.drift_patterns and self.drift_patterns.hot(name)))
+
+    def next_poll_interval(self, activity, targets):
+        """Adaptive backoff, held at check_interval while a learned drift window is open"""
+        interval = self.poll_interval.next_interval(activity)
+        if self.drift_patterns:
+            interval = self.drift_patterns.next_interval(
+                [target['device'] for target in targets], interval, self.check_interval,
+                self.correction_count)
+        return interval
+
+    def log_polling_stats(self):
+        """Logs the adaptive polling statistics of the last run"""
+        stats = self.poll_interval.stats()
+        logging.info(f"Polling stats: {stats['ticks']} checks, "
+                     f"avg interval {stats['average_interval']:.2f}s, "
+                     f"{stats['saved_ticks']} checks saved "
+                     f"(~{stats['cpu_time_saved']:.2f}s CPU)")
+        if self.drift_patterns:
+            savings = self.drift_patterns.savings(self.check_interval)
+            logging.info(f"Predictive polling: {savings['polls']} checks ({savings['dense_polls']} dense), "
+                         f"a fixed {savings['equivalent_interval']:.2f}s interval with the same "
+                         f"correction latency needs {savings['fixed_polls']} - {savings['saved_polls']} saved")
+
     def start_monitoring(self):
         """Starts volume monitoring"""
         if not self.running:
             self.running = True
-            self.monitor_thread = threading.Thread(target=self.monitor_volume, daemon=True)
-            self.monitor_thread.start()
+            # Device list warmed and watched in the background (replugged devices),
+            # re-enumerated right away when the backend reports a device change
+            self.device_registry.start_refresher()
+            self.unsubscribe_device_changes = self.backend.subscribe_device_changes(
+                lambda: self.device_registry.invalidate("device added or removed"))
+            if hasattr(self.backend, 'start_drift'):
+                # Simulation (also wrapped for a trace) - roughly the old 10% chance per 0.5s tick
+                self.backend.start_drift(lambda: self.target_volume, mean_interval=5.0)
+            if self.settings['engine'] == 'asyncio':
+                # Optional engine - asyncio is only imported when it is selected
+                from async_engine import AsyncMonitorEngine
+                self.async_engine = AsyncMonitorEngine(self)
+                self.async_engine.start()
+            else:
+                # Scale mode keeps the single thread, but one due time per endpoint
+                loop = self.monitor_endpoints if self.settings['scale_mode'] else self.monitor_volume
+                self.monitor_thread = threading.Thread(target=loop, daemon=True)
+                self.monitor_thread.start()
             logging.info("Monitoring started")
             self.add_status_event("START", f"Monitoring started ({self.target_volume}%, {self.check_interval}s)")
-            self.update_icon()
-            self.update_menu()
+            self.publish_state()
 
     def stop_monitoring(self):
         """Stops volume monitoring"""
         self.running = False
+        if hasattr(self.backend, 'stop_drift'):
+            self.backend.stop_drift()
+        if self.unsubscribe_device_changes:
+            self.unsubscribe_device_changes()
+            self.unsubscribe_device_changes = None
+        self.wake_monitor()
+        if self.async_engine:
+            # Cancels a backend call that is still running after a short grace period
+            self.async_engine.stop()
+            self.async_engine = None
         if self.monitor_thread:
             self.monitor_thread.join(timeout=2)
         logging.info("Monitoring stopped")
         self.add_status_event("STOP", "Monitoring stopped")
-        self.update_icon()
-        self.update_menu()
-
-    def create_icon_image(self):
-        """Creates a color-coded icon for the system tray"""
-        image = Image.new('RGB', (64, 64), color='white')
-        draw = ImageDraw.Draw(image)
-
-        # Determine main color based on status
-        if not self.running:
-            main_color = 'red'  # Red - Off/Error
-        elif self.icon_status == "active":
-            main_color = 'green'  # Green - Active and productive
-        elif self.icon_status == "simulation":
-            main_color = 'orange'  # Yellow/Orange - Simulation/Mockup
-        else:
-            main_color = 'red'  # Red - Unknown/Error
-
-        # Draw microphone in main color
-        draw.ellipse([20, 15, 44, 35], fill=main_color)  # Microphone head
-        draw.rectangle([30, 35, 34, 50], fill=main_color)  # Stem
-        draw.arc([25, 45, 39, 55], start=0, end=180, fill=main_color, width=3)  # Base
-
-        # Small black outline for better visibility
-        draw.ellipse([20, 15, 44, 35], outline='black', width=1)
-        draw.rectangle([30, 35, 34, 50], outline='black', width=1)
-
-        # Status text as small dot
-        if self.running and self.correction_count > 0:
-            # Small white dot shows activity
-            draw.ellipse([50, 50, 58, 58], fill='white', outline='black')
+        self.publish_state()
 
-        return image
+    def create_icon_image(self, state=None):
+        """Color-coded icon for the system tray (each variant is drawn once)"""
+        return self.icon_cache.get(icon_key(state or self.state.snapshot()))
 
     def show_status(self, icon=None, item=None):
         """Shows the current status"""
-        current_vol = self.get_microphone_volume()
+        from tkinter import messagebox
+
+        # Last values the monitor published - no backend call on the tray thread
+        state = self.state.snapshot()
+        current_vol = state.targets[0][1] if state.targets else None
 
-        status = "🟢 Active" if self.running else "🔴 Stopped"
+        status = "🟢 Active" if state.running else "🔴 Stopped"
         method_info = {
+            'CoreAudio': '🟣 Core Audio (Native, fastest)',
             'AudioDeviceCmdlets': '🔵 AudioDeviceCmdlets (Best Quality)',
             'Simulation': '⚪ Simulation (Demo)'
         }
 
-        device_display = self.selected_device if len(self.selected_device) <= 30 else self.selected_device[:27] + "..."
+        device_display = state.selected_device if len(state.selected_device) <= 30 else state.selected_device[:27] + "..."
+
+        stats = self.poll_interval.stats()
+        rate_info = f"{state.check_interval}s"
+        if self.poll_interval.enabled:
+            rate_info += (f" (adaptive, avg {stats['average_interval']:.1f}s, "
+                          f"{stats['saved_ticks']} checks saved)")
+        if self.drift_patterns and self.drift_patterns.polls:
+            savings = self.drift_patterns.savings(self.check_interval)
+            rate_info += (f"\nPredictive: {savings['saved_polls']} checks saved vs. fixed "
+                          f"{savings['equivalent_interval']:.1f}s (same latency)")
+
+        if state.multi_device:
+            device_lines = "".join(
+                f"🎤 {device[:25]}: "
+                f"{'?' if volume is None else volume}% → {target_volume}% (±{tolerance})\n"
+                for device, volume, target_volume, tolerance in state.targets)
+        else:
+            device_lines = (f"Selected Device: {device_display}\n"
+                            f"Current Volume: {current_vol}%\n"
+                            f"Target Volume: {state.target_volume}% (±{state.tolerance}%)\n")
+
+        # From the journal's time-bucket index, survives restarts
+        corrections_24h = sum(self.journal.corrections_per_device(24).values())
 
         if current_vol is not None:
             messagebox.showinfo(
                 "🎤 Microphone Volume Keeper - Advanced",
                 f"Status: {status}\n"
-                f"Audio Method: {method_info.get(self.audio_method, self.audio_method)}\n"
-                f"Selected Device: {device_display}\n"
-                f"Current Volume: {current_vol}%\n"
-                f"Target Volume: {self.target_volume}%\n"
-                f"Sampling Rate: {self.check_interval}s\n"
-                f"Correctionen: {self.correction_count}\n\n"
+                f"Audio Method: {method_info.get(state.audio_method, state.audio_method)}\n"
+                f"{device_lines}"
+                f"Sampling Rate: {rate_info}\n"
+                f"Correctionen: {state.correction_count} (24h: {corrections_24h})\n\n"
                 f"💡 Linksklick: Status anzeigen\n"
                 f"💡 Rechtsklick: Menü mit Einstellungen"
             )
@@ -628,7 +1208,7 @@ class MicrophoneVolumeKeeperAdvanced:
             messagebox.showerror(
                 "❌ Microphone Volume Keeper",
                 f"Error: Cannot retrieve microphone volume!\n\n"
-                f"Current Method: {self.audio_method}\n"
+                f"Current Method: {state.audio_method}\n"
                 f"Selected Device: {device_display}\n\n"
                 f"Suggested Solutions:\n"
                 f"• Install AudioDeviceCmdlets:\n"
@@ -639,98 +1219,145 @@ class MicrophoneVolumeKeeperAdvanced:
 
     def toggle_monitoring(self, icon, item):
         """Starts/Stops monitoring"""
-        if self.running:
-            self.stop_monitoring()
-        else:
-            self.start_monitoring()
+        # Stopping joins the monitor thread, which may be inside a backend call -
+        # keep that off the tray thread
+        action = self.stop_monitoring if self.running else self.start_monitoring
+        threading.Thread(target=action, daemon=True).start()
 
     def update_menu(self):
-        """Updates the tray menu with status history and settings"""
-        status_text = "Stop" if self.running else "Start"
-
-        # Status icon based on icon status
-        if not self.running:
-            status_icon = "🔴"
-        elif self.icon_status == "active":
-            status_icon = "🟢"
-        elif self.icon_status == "simulation":
-            status_icon = "🟡"
-        else:
-            status_icon = "🔴"
-
-        # Create menu items
-        menu_items = [
-            pystray.MenuItem(f"📊 Show Status", self.show_status),
-            pystray.MenuItem("─" * 30, None, enabled=False),
-            pystray.MenuItem(f"{status_icon} {status_text}", self.toggle_monitoring),
-            pystray.MenuItem(f"⚙️ Settings...", self.show_settings_dialog),
-            pystray.MenuItem("─" * 30, None, enabled=False),
-            pystray.MenuItem(f"🔧 {self.audio_method}", None, enabled=False),
-            pystray.MenuItem(f"🎤 {self.selected_device[:25]}{'...' if len(self.selected_device) > 25 else ''}", None, enabled=False),
-            pystray.MenuItem(f"🎯 Target: {self.target_volume}% | ⏱️ Rate: {self.check_interval}s", None, enabled=False),
-        ]
-
-        # Add status history
-        if self.status_history:
-            menu_items.append(pystray.MenuItem("─" * 30, None, enabled=False))
-            menu_items.append(pystray.MenuItem("📋 Recent Events:", None, enabled=False))
-
-            for event in self.status_history:
-                # Shorten long events
-                display_event = event if len(event) <= 40 else event[:37] + "..."
-                menu_items.append(pystray.MenuItem(f"  {display_event}", None, enabled=False))
-
-        menu_items.extend([
-            pystray.MenuItem("─" * 30, None, enabled=False),
-            pystray.MenuItem("❌ Exit", self.quit_application)
-        ])
-
-        menu = pystray.Menu(*menu_items)
-
-        if self.icon:
-            self.icon.menu = menu
+        """Refreshes the native tray menu if a displayed field changed"""
+        if not self.icon or not self.tray_menu:
+            # Headless or tray not running yet - nothing to update
+            return
+        if self.tray_menu.refresh_needed():
+            self.icon.update_menu()
 
     def update_icon(self):
-        """Updates the tray icon"""
-        if self.icon:
-            self.icon.icon = self.create_icon_image()
+        """Updates the tray icon - skipped if the icon would look the same"""
+        if not self.icon:
+            return
+        key = icon_key(self.state.snapshot())
+        if key == self.icon_key:
+            return
+        self.icon.icon = self.icon_cache.get(key)
+        self.icon_key = key
 
     def quit_application(self, icon, item):
         """Exits the application"""
         self.stop_monitoring()
+        if self.ui_refresher:
+            self.ui_refresher.stop()
+        self.settings_store.flush()
+        self.journal.close()
+        if self.drift_patterns:
+            self.drift_patterns.save(self.drift_patterns_path)
+        self.stop_metrics_server()
+        self.stop_control_api()
+        self.device_registry.stop_refresher()
+        self.backend.close()
+        stop_logging()
         if self.icon:
             self.icon.stop()
 
     def run_tray(self):
         """Starts the system tray icon"""
+        import pystray
+
         image = self.create_icon_image()
+        self.icon_key = icon_key(self.state.snapshot())
+
+        # Menu is built once, its rows read the published state
+        self.tray_menu = TrayMenu(self.state.snapshot, self.show_status, self.toggle_monitoring,
+                                  self.show_settings_dialog, self.quit_application)
 
         self.icon = pystray.Icon(
             "microphone_keeper_advanced",
             image,
-            f"Microphone Volume Keeper Advanced"
+            f"Microphone Volume Keeper Advanced",
+            menu=self.tray_menu.build()
         )
 
         # Left click shows status
         self.icon.default_action = self.show_status
 
-        self.update_menu()
+        # Icon/menu redraws happen off the tray and monitor threads, coalesced
+        self.ui_refresher = CoalescingRefresher(self.refresh_ui)
+        self.ui_refresher.start()
 
         # Start monitoring automatically
         self.start_monitoring()
+        if self.settings['control_api']:
+            self.start_control_api()
 
         # Show tray icon
         self.icon.run()
 
 
-def main():
+    def run_headless(self):
+        """Runs only the monitoring loop until SIGINT/SIGTERM (or a replay ends)"""
+        def request_stop(signum, frame):
+            self.stop_requested.set()
+
+        signal.signal(signal.SIGINT, request_stop)
+        signal.signal(signal.SIGTERM, request_stop)
+
+        self.start_monitoring()
+        if self.settings['control_api']:
+            self.start_control_api()
+        logging.info("Running headless (no tray icon)")
+
+        # Short waits keep the main thread responsive to signals on Windows
+        while not self.stop_requested.wait(1.0):
+            pass
+
+        self.stop_monitoring()
+        if self.backend.name == "Replay":
+            logging.info(self.backend.summary())
+        self.settings_store.flush()
+        self.journal.close()
+        if self.drift_patterns:
+            self.drift_patterns.save(self.drift_patterns_path)
+        self.stop_metrics_server()
+        self.stop_control_api()
+        self.device_registry.stop_refresher()
+        self.backend.close()
+        stop_logging()
+
+
+def parse_arguments(argv=None):
+    """Parses the command line"""
+    parser = argparse.ArgumentParser(description="Microphone Volume Keeper")
+    parser.add_argument('--headless', action='store_true',
+                        help="run the monitoring loop only (no tray icon, no GUI imports)")
+    parser.add_argument('--settings', metavar='PATH',
+                        help="settings file (default: $MVK_SETTINGS or "
+                             "microphone_keeper_settings.json in the working directory)")
+    parser.add_argument('--record-trace', metavar='PATH',
+                        help="write every backend call to a gzip trace (see backend_trace.py)")
+    parser.add_argument('--replay-trace', metavar='PATH',
+                        help="use a recorded trace instead of a real backend")
+    parser.add_argument('--replay-speed', type=float, default=10.0,
+                        help="replay this many times faster than recorded (default: 10)")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
     """Main function - Silent Professional Mode"""
+    args = parse_arguments(argv)
+
     try:
         # Completely silent - no terminal output
-        keeper = MicrophoneVolumeKeeperAdvanced()
-
-        # Start system tray directly
-        keeper.run_tray()
+        keeper = MicrophoneVolumeKeeperAdvanced(settings_path=args.settings)
+        if args.replay_trace:
+            keeper.replay_trace(args.replay_trace, args.replay_speed)
+        if args.record_trace:
+            keeper.record_trace(args.record_trace)
+
+        if args.headless:
+            keeper.run_headless()
+        else:
+            # Start system tray directly
+            keeper.run_tray()
 
     except KeyboardInterrupt:
         # Silent exit
@@ -738,6 +1365,10 @@ def main():
     except Exception as e:
         # Only log critical errors
         logging.error(f"Critical Error: {e}")
+        if args.headless:
+            print(f"Critical Error: {e}", file=sys.stderr)
+            sys.exit(1)
+
         # Show errors only for critical problems
         import tkinter as tk
         from tkinter import messagebox
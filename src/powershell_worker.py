@@ -0,0 +1,417 @@
+#!/usr/bin/env python3
+"""
+PowerShell Worker - persistent AudioDeviceCmdlets session
+Keeps one PowerShell process alive instead of one process per call:
+- AudioDeviceCmdlets is imported once per session
+- Framed protocol: one JSON request per line, one JSON response per line
+- Per-request timeouts (the hung shell is killed)
+- Automatic respawn when the shell crashes or was killed
+- Volume-change events pushed by the shell (frames without "id")
+"""
+
+import base64
+import itertools
+import json
+import logging
+import queue
+import subprocess
+import threading
+import time
+
+# Only exists on Windows - 0 keeps Popen happy everywhere else (fake shell)
+CREATE_NO_WINDOW = getattr(subprocess, 'CREATE_NO_WINDOW', 0)
+
+# Script executed once by the long-lived PowerShell process.
+# Every request is a JSON line {"id", "op", "args"}, every answer a JSON line
+# {"id", "ok", "result"|"error"}. The first line written is {"ready", "module"}.
+# Subscribed endpoints push {"event": "volume", "device_id", "volume"} frames.
+WORKER_SCRIPT = r'''
+$ErrorActionPreference = 'Stop'
+$utf8 = New-Object System.Text.UTF8Encoding $false
+[Console]::InputEncoding = $utf8
+[Console]::OutputEncoding = $utf8
+$stdin = [Console]::In
+$stdout = [Console]::Out
+
+function Send-Frame($frame) {
+    $stdout.WriteLine(($frame | ConvertTo-Json -Compress -Depth 5))
+    $stdout.Flush()
+}
+
+# Endpoints addressed by ID are cached for the whole session
+$endpoints = @{}
+
+function Get-Endpoint($id) {
+    if (-not $endpoints.ContainsKey($id)) {
+        $device = Get-AudioDevice -ID $id
+        if (-not $device) { throw "No AudioDevice found with ID $id" }
+        $endpoints[$id] = $device.Device.AudioEndpointVolume
+    }
+    return $endpoints[$id]
+}
+
+function Get-EndpointVolume($id) {
+    try {
+        return [int][math]::Round((Get-Endpoint $id).MasterVolumeLevelScalar * 100)
+    } catch {
+        $endpoints.Remove($id)
+        throw
+    }
+}
+
+function Set-EndpointVolume($id, $volume) {
+    try {
+        (Get-Endpoint $id).MasterVolumeLevelScalar = [single]($volume / 100.0)
+    } catch {
+        $endpoints.Remove($id)
+        throw
+    }
+}
+
+function Get-DefaultRecordingId {
+    return (Get-AudioDevice -Recording).ID
+}
+
+# OnVolumeNotification events are queued by PowerShell and forwarded here
+function Send-VolumeEvents {
+    foreach ($evt in @(Get-Event -ErrorAction SilentlyContinue)) {
+        if ($evt.SourceIdentifier -like 'mvk.volume.*') {
+            Send-Frame @{
+                event = 'volume'
+                device_id = $evt.SourceIdentifier.Substring(11)
+                volume = [int][math]::Round($evt.SourceArgs[0].MasterVolume * 100)
+            }
+        }
+        Remove-Event -EventIdentifier $evt.EventIdentifier
+    }
+}
+
+$moduleLoaded = $true
+try { Import-Module AudioDeviceCmdlets } catch { $moduleLoaded = $false }
+Send-Frame @{ ready = $true; module = $moduleLoaded }
+
+# Read stdin asynchronously so queued volume events are sent while idle
+$pending = $stdin.ReadLineAsync()
+while ($true) {
+    if (-not $pending.Wait(100)) {
+        Send-VolumeEvents
+        continue
+    }
+    $line = $pending.Result
+    if ($null -eq $line) { break }
+    $pending = $stdin.ReadLineAsync()
+    if (-not $line.Trim()) { continue }
+    $id = $null
+    try {
+        $request = $line | ConvertFrom-Json
+        $id = $request.id
+        $a = $request.args
+        switch ($request.op) {
+            'ping' { $result = 'pong' }
+            'get' {
+                if ($a.device_id) { $result = Get-EndpointVolume $a.device_id }
+                else { $result = [string](Get-AudioDevice -RecordingVolume) }
+            }
+            'set' {
+                if ($a.device_id) { Set-EndpointVolume $a.device_id $a.volume }
+                else { Set-AudioDevice -RecordingVolume $a.volume | Out-Null }
+                $result = $true
+            }
+            'get_many' {
+                # One round-trip for all enforced devices, $null for failures
+                $volumes = New-Object System.Collections.ArrayList
+                foreach ($endpointId in @($a.device_ids)) {
+                    try {
+                        if ($endpointId) { [void]$volumes.Add((Get-EndpointVolume $endpointId)) }
+                        else { [void]$volumes.Add([string](Get-AudioDevice -RecordingVolume)) }
+                    } catch {
+                        [void]$volumes.Add($null)
+                    }
+                }
+                $result = $volumes.ToArray()
+            }
+            'ensure' {
+                # Read, compare and correct in one round-trip: {before, after} per item
+                $outcomes = New-Object System.Collections.ArrayList
+                foreach ($item in @($a.items)) {
+                    try {
+                        $endpointId = $item.device_id
+                        if (-not $endpointId) { $endpointId = Get-DefaultRecordingId }
+                        $before = Get-EndpointVolume $endpointId
+                        $after = $before
+                        if ([math]::Abs($before - $item.target) -gt $item.tolerance) {
+                            try {
+                                Set-EndpointVolume $endpointId $item.target
+                                $after = $item.target
+                            } catch {
+                                $after = $null
+                            }
+                        }
+                        [void]$outcomes.Add(@{ before = $before; after = $after })
+                    } catch {
+                        [void]$outcomes.Add($null)
+                    }
+                }
+                $result = $outcomes.ToArray()
+            }
+            'list' {
+                $result = @(Get-AudioDevice -List | Where-Object { $_.Type -eq 'Recording' } | ForEach-Object {
+                    @{ id = $_.ID; name = $_.Name; default = [bool]$_.Default }
+                })
+                $endpoints.Clear()
+            }
+            'subscribe' {
+                $endpointId = $a.device_id
+                if (-not $endpointId) { $endpointId = (Get-AudioDevice -Recording).ID }
+                $source = "mvk.volume.$endpointId"
+                if (-not (Get-EventSubscriber -SourceIdentifier $source -ErrorAction SilentlyContinue)) {
+                    Register-ObjectEvent -InputObject (Get-Endpoint $endpointId) `
+                        -EventName OnVolumeNotification -SourceIdentifier $source | Out-Null
+                }
+                $result = $endpointId
+            }
+            'unsubscribe' {
+                # One endpoint, or every subscription without device_id
+                $pattern = 'mvk.volume.*'
+                if ($a.device_id) { $pattern = "mvk.volume.$($a.device_id)" }
+                Get-EventSubscriber | Where-Object { $_.SourceIdentifier -like $pattern } | Unregister-Event
+                $result = $true
+            }
+            default { throw "Unknown op: $($request.op)" }
+        }
+        Send-Frame @{ id = $id; ok = $true; result = $result }
+    } catch {
+        Send-Frame @{ id = $id; ok = $false; error = $_.Exception.Message }
+    }
+    Send-VolumeEvents
+}
+'''
+
+
+def build_powershell_command(script=WORKER_SCRIPT):
+    """Builds the powershell command line running the worker script"""
+    # -EncodedCommand avoids every quoting problem with the multi-line script
+    encoded = base64.b64encode(script.encode('utf-16-le')).decode('ascii')
+    return ['powershell', '-NoProfile', '-NonInteractive',
+            '-ExecutionPolicy', 'Bypass', '-EncodedCommand', encoded]
+
+
+def parse_volume_output(output):
+    """Extracts a volume percentage from cmdlet output ("85%", "85" or 85)"""
+    if output is None:
+        return None
+    if isinstance(output, (int, float)) and not isinstance(output, bool):
+        return int(round(output))
+
+    # Search for the last line with only digits and %
+    for line in reversed(str(output).strip().split('\n')):
+        line = line.strip()
+        if line and line.replace('%', '').isdigit():
+            return int(line.replace('%', ''))
+    return None
+
+
+class PowerShellWorkerError(Exception):
+    """Raised when the worker cannot answer a request"""
+
+
+class PowerShellWorkerTimeout(PowerShellWorkerError):
+    """Raised when the worker did not answer within the timeout"""
+
+
+class PowerShellCommandError(PowerShellWorkerError):
+    """Raised when the shell answered but the command itself failed"""
+
+
+class PowerShellWorker:
+    """Long-lived PowerShell process speaking the framed JSON protocol"""
+
+    def __init__(self, command=None, timeout=10.0, start_timeout=15.0):
+        self.command = command or build_powershell_command()
+        self.timeout = timeout
+        self.start_timeout = start_timeout
+
+        self.process = None
+        self.module_loaded = False
+        self.respawn_count = 0
+        self.spawn_count = 0
+
+        # Called as event_handler(device_id, volume) from the reader thread
+        self.event_handler = None
+        # endpoint ID -> device_id as subscribed (None: default device)
+        self._subscriptions = {}
+
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self._responses = None
+        self._reader = None
+
+    def start(self):
+        """Starts the shell process (no-op if already running)"""
+        with self._lock:
+            self._ensure_started()
+        return self.module_loaded
+
+    def stop(self):
+        """Stops the shell process"""
+        with self._lock:
+            self._kill()
+
+    def is_alive(self):
+        """True if the shell process is running"""
+        return self.process is not None and self.process.poll() is None
+
+    def request(self, op, timeout=None, **args):
+        """Sends one request and returns its result"""
+        timeout = self.timeout if timeout is None else timeout
+
+        with self._lock:
+            try:
+                return self._roundtrip(op, args, timeout)
+            except (PowerShellWorkerTimeout, PowerShellCommandError):
+                raise
+            except PowerShellWorkerError as e:
+                # Shell crashed mid-request - respawn once and retry
+                logging.warning(f"PowerShell worker lost ({e}), respawning")
+                return self._roundtrip(op, args, timeout)
+
+    def subscribe(self, device_id=None):
+        """Subscribes to volume events of an endpoint (kept across respawns), returns its ID"""
+        endpoint_id = self.request('subscribe', device_id=device_id)
+        self._subscriptions[endpoint_id] = device_id
+        return endpoint_id
+
+    def unsubscribe(self, endpoint_id=None):
+        """Drops the volume event subscription of one endpoint (None: all of them)"""
+        if endpoint_id is None:
+            self._subscriptions.clear()
+        else:
+            self._subscriptions.pop(endpoint_id, None)
+        if self.is_alive():
+            self.request('unsubscribe', device_id=endpoint_id)
+
+    def _roundtrip(self, op, args, timeout):
+        """Writes one frame and waits for the matching response"""
+        self._ensure_started()
+
+        request_id = next(self._ids)
+        frame = json.dumps({'id': request_id, 'op': op, 'args': args})
+        try:
+            self.process.stdin.write(frame + '\n')
+            self.process.stdin.flush()
+        except (OSError, ValueError) as e:
+            self._kill()
+            raise PowerShellWorkerError(f"write failed: {e}")
+
+        deadline = time.monotonic() + timeout
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                self._kill()
+                raise PowerShellWorkerTimeout(f"'{op}' timed out after {timeout}s")
+            try:
+                response = self._responses.get(timeout=remaining)
+            except queue.Empty:
+                continue
+
+            if response is None:
+                self._kill()
+                raise PowerShellWorkerError("process exited")
+            if response.get('id') != request_id:
+                # Late answer of a request that already timed out
+                continue
+            if not response.get('ok'):
+                raise PowerShellCommandError(response.get('error') or f"'{op}' failed")
+            return response.get('result')
+
+    def _ensure_started(self):
+        """Spawns the shell if it is not running"""
+        if self.is_alive():
+            return
+
+        if self.spawn_count:
+            self.respawn_count += 1
+        self._kill()
+
+        self._responses = queue.Queue()
+        self.process = subprocess.Popen(
+            self.command,
+            stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+            text=True, encoding='utf-8', bufsize=1,
+            creationflags=CREATE_NO_WINDOW)
+        self.spawn_count += 1
+
+        self._reader = threading.Thread(
+            target=self._read_frames, args=(self.process, self._responses, self._dispatch_event),
+            daemon=True)
+        self._reader.start()
+
+        # First frame announces whether AudioDeviceCmdlets could be imported
+        try:
+            ready = self._responses.get(timeout=self.start_timeout)
+        except queue.Empty:
+            ready = None
+        if not ready or not ready.get('ready'):
+            self._kill()
+            raise PowerShellWorkerError("worker did not become ready")
+
+        self.module_loaded = bool(ready.get('module'))
+        logging.info(f"PowerShell worker started (pid {self.process.pid}, "
+                     f"module loaded: {self.module_loaded})")
+
+        # A new shell has no event registrations - restore them
+        for device_id in list(self._subscriptions.values()):
+            try:
+                self._roundtrip('subscribe', {'device_id': device_id}, self.timeout)
+            except PowerShellWorkerError as e:
+                logging.warning(f"Could not restore volume subscription: {e}")
+
+    def _dispatch_event(self, frame):
+        """Forwards an event frame to the event handler"""
+        handler = self.event_handler
+        if handler is None or frame.get('event') != 'volume':
+            return
+        try:
+            handler(frame.get('device_id'), frame.get('volume'))
+        except Exception as e:
+            logging.error(f"Volume event handler failed: {e}")
+
+    def _kill(self):
+        """Terminates the current shell process"""
+        process, self.process = self.process, None
+        if process is None:
+            return
+        try:
+            process.kill()
+            process.wait(timeout=2)
+        except Exception:
+            pass
+        for stream in (process.stdin, process.stdout):
+            try:
+                stream.close()
+            except Exception:
+                pass
+
+    @staticmethod
+    def _read_frames(process, responses, dispatch_event):
+        """Reader thread - turns stdout lines into response and event frames"""
+        try:
+            for line in process.stdout:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    frame = json.loads(line)
+                except ValueError:
+                    # Stray host output (warnings, banners) is not part of the protocol
+                    logging.debug(f"PowerShell worker: ignoring '{line[:100]}'")
+                    continue
+                if not isinstance(frame, dict):
+                    continue
+                if 'event' in frame and 'id' not in frame:
+                    dispatch_event(frame)
+                else:
+                    responses.put(frame)
+        except (OSError, ValueError):
+            pass
+        responses.put(None)
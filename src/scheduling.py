@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+"""
+Scheduling - how long the monitoring loop sleeps between checks
+- AdaptiveInterval: exponential backoff while the volume stays on target,
+  snaps back to the minimum interval after a correction or a change
+- EndpointScheduler: the same backoff per endpoint, kept in one priority
+  queue so a single loop can poll hundreds of endpoints (scale mode)
+"""
+
+import heapq
+import itertools
+import math
+import time
+
+
+class AdaptiveInterval:
+    """Polling interval between min_interval and max_interval with backoff"""
+
+    def __init__(self, min_interval=0.5, max_interval=5.0, factor=2.0,
+                 enabled=True, clock=time.monotonic):
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.factor = factor
+        self.enabled = enabled
+        self.clock = clock
+
+        self.current = min_interval
+        self.reset_stats()
+
+    def configure(self, min_interval=None, max_interval=None, enabled=None):
+        """Applies new settings and restarts at the minimum interval"""
+        if min_interval is not None:
+            self.min_interval = min_interval
+        if max_interval is not None:
+            self.max_interval = max(max_interval, self.min_interval)
+        if enabled is not None:
+            self.enabled = enabled
+        self.current = self.min_interval
+
+    def next_interval(self, activity):
+        """Interval until the next check - activity = correction or volume change"""
+        if activity or not self.enabled:
+            self.current = self.min_interval
+        else:
+            self.current = min(self.current * self.factor, self.max_interval)
+        return self.current
+
+    def reset_stats(self):
+        """Starts a new statistics window"""
+        self.started_at = self.clock()
+        self.ticks = 0
+        self.total_interval = 0.0
+        self.tick_cpu_time = 0.0
+
+    def record_tick(self, interval, cpu_time):
+        """Records one check with the interval that follows it and its CPU time"""
+        self.ticks += 1
+        self.total_interval += interval
+        self.tick_cpu_time += cpu_time
+
+    def stats(self):
+        """Average effective interval and estimated savings against fixed polling"""
+        elapsed = max(self.clock() - self.started_at, 0.0)
+        average_interval = self.total_interval / self.ticks if self.ticks else self.min_interval
+        cpu_per_tick = self.tick_cpu_time / self.ticks if self.ticks else 0.0
+
+        # Ticks a fixed check_interval (= min_interval) would have needed
+        fixed_ticks = elapsed / self.min_interval if self.min_interval > 0 else self.ticks
+        saved_ticks = max(fixed_ticks - self.ticks, 0.0)
+
+        return {
+            'ticks': self.ticks,
+            'current_interval': self.current,
+            'average_interval': average_interval,
+            'cpu_per_tick': cpu_per_tick,
+            'saved_ticks': int(saved_ticks),
+            'cpu_time_saved': saved_ticks * cpu_per_tick,
+        }
+
+
+class EndpointScheduler:
+    """Per-endpoint due times in a heap - one loop serves every endpoint
+
+    Each endpoint backs off on its own while it stays on target, so one
+    noisy device no longer keeps all others at the fastest rate. Due times
+    are rounded up to slots of min_interval (a timer wheel): endpoints
+    falling into the same slot are handed out together and checked in one
+    backend call, so there is at most one call per min_interval.
+    """
+
+    def __init__(self, min_interval=0.5, max_interval=5.0, factor=2.0,
+                 enabled=True, clock=time.monotonic):
+        self.min_interval = min_interval
+        self.max_interval = max(max_interval, min_interval)
+        self.factor = factor
+        self.enabled = enabled
+        self.clock = clock
+
+        # (due, sequence, key) - entries of removed/rescheduled keys stay in
+        # the heap and are skipped when their due time no longer matches
+        self._heap = []
+        self._due = {}
+        self._interval = {}
+        self._sequence = itertools.count()
+
+        self.checks = 0
+        self.batches = 0
+
+    def __len__(self):
+        return len(self._due)
+
+    def configure(self, min_interval=None, max_interval=None, enabled=None):
+        """Applies new settings, every endpoint restarts at the minimum interval"""
+        if min_interval is not None:
+            self.min_interval = min_interval
+        if max_interval is not None:
+            self.max_interval = max(max_interval, self.min_interval)
+        if enabled is not None:
+            self.enabled = enabled
+        for key in self._interval:
+            self._interval[key] = self.min_interval
+
+    def sync(self, keys):
+        """Schedules new keys right away and forgets keys no longer listed"""
+        keys = set(keys)
+        now = self.clock()
+        for key in [key for key in self._due if key not in keys]:
+            del self._due[key]
+            del self._interval[key]
+        for key in keys:
+            if key not in self._due:
+                self._interval[key] = self.min_interval
+                self._push(key, now)
+
+    def wake(self, key):
+        """Makes an endpoint due now (event, settings change)"""
+        if key in self._due:
+            self._interval[key] = self.min_interval
+            self._push(key, self.clock())
+
+    def wake_all(self):
+        """Makes every endpoint due now"""
+        now = self.clock()
+        for key in self._due:
+            self._interval[key] = self.min_interval
+            self._push(key, now)
+
+    def next_due(self):
+        """Earliest due time, None without endpoints"""
+        self._drop_stale()
+        return self._heap[0][0] if self._heap else None
+
+    def pop_due(self, now=None):
+        """Keys due at now, unscheduled until reschedule()"""
+        now = self.clock() if now is None else now
+        keys = []
+        while True:
+            self._drop_stale()
+            if not self._heap or self._heap[0][0] > now:
+                break
+            _, _, key = heapq.heappop(self._heap)
+            self._due[key] = None
+            keys.append(key)
+        if keys:
+            self.batches += 1
+            self.checks += len(keys)
+        return keys
+
+    def reschedule(self, key, activity, now=None):
+        """Next check of a key after it was checked - activity resets its backoff"""
+        if key not in self._due:
+            return None
+        if activity or not self.enabled:
+            interval = self.min_interval
+        else:
+            interval = min(self._interval[key] * self.factor, self.max_interval)
+        self._interval[key] = interval
+        due = (self.clock() if now is None else now) + interval
+        if self.min_interval > 0:
+            # Round up to the next slot - shared slots share one backend call
+            due = math.ceil(due / self.min_interval) * self.min_interval
+        self._push(key, due)
+        return interval
+
+    def intervals(self):
+        """Current interval per key"""
+        return dict(self._interval)
+
+    def _push(self, key, due):
+        """(Re-)schedules a key, older heap entries become stale"""
+        self._due[key] = due
+        heapq.heappush(self._heap, (due, next(self._sequence), key))
+        if len(self._heap) > 4 * len(self._due) + 64:
+            # Many wakes left stale entries behind - rebuild from the live ones
+            self._heap = [entry for entry in self._heap if self._due.get(entry[2]) == entry[0]]
+            heapq.heapify(self._heap)
+
+    def _drop_stale(self):
+        """Pops heap entries of removed or rescheduled keys"""
+        heap = self._heap
+        while heap and self._due.get(heap[0][2], -1) != heap[0][0]:
+            heapq.heappop(heap)
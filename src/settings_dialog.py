@@ -0,0 +1,332 @@
+#!/usr/bin/env python3
+"""
+Settings Dialog - tkinter dialog for the keeper settings
+Kept in its own module so tkinter is only imported when the dialog is opened
+(headless mode never loads the GUI stack).
+The device list comes from the keeper's warm device cache, so the dialog
+opens without enumerating devices and updates itself when the background
+refresh finds new ones.
+"""
+
+import tkinter as tk
+from tkinter import messagebox, ttk
+import logging
+import subprocess
+
+from powershell_worker import CREATE_NO_WINDOW
+
+# Target volume range - same as control_set_target (0 = muted is a valid target)
+VOLUME_RANGE = (0, 100)
+# Tolerance range of the spinbox (percentage points)
+TOLERANCE_RANGE = (0, 20)
+
+
+def parse_bounded_int(text, low, high, label):
+    """Whole number in [low, high] from an entry text, ValueError with a message for the user"""
+    message = f"{label} must be a whole number between {low} and {high}."
+    try:
+        value = int(str(text).strip())
+    except ValueError:
+        raise ValueError(message) from None
+    if not low <= value <= high:
+        raise ValueError(message)
+    return value
+
+
+class SettingsDialog:
+    """Dialog for program settings"""
+
+    def __init__(self, parent, current_settings, devices=None, subscribe_devices=None):
+        self.parent = parent
+        self.result = None
+        self.current_settings = current_settings.copy()
+        # devices: cached recording device names (None = ask PowerShell, blocking),
+        # subscribe_devices(callback) -> unsubscribe: live updates of that list
+        self.devices = devices
+        self.subscribe_devices = subscribe_devices
+        self.unsubscribe_devices = None
+        self.pending_devices = None
+
+        # Create and hide main tkinter root
+        self.root = tk.Tk()
+        self.root.withdraw()  # Hide the main window
+
+        # Create dialog
+        self.dialog = tk.Toplevel(self.root)
+        self.dialog.title("🎤 Microphone Volume Keeper - Settings")
+        self.dialog.geometry("500x600")
+        self.dialog.resizable(False, False)
+        self.dialog.grab_set()
+
+        # Center dialog
+        self.dialog.update_idletasks()
+        x = (self.dialog.winfo_screenwidth() // 2) - (500 // 2)
+        y = (self.dialog.winfo_screenheight() // 2) - (600 // 2)
+        self.dialog.geometry(f"500x600+{x}+{y}")
+
+        self.create_widgets()
+
+    def create_widgets(self):
+        """Creates the dialog widgets"""
+
+        # Main frame
+        main_frame = ttk.Frame(self.dialog, padding="20")
+        main_frame.grid(row=0, column=0, sticky=(tk.W, tk.E, tk.N, tk.S))
+
+        # Title
+        title_label = ttk.Label(main_frame, text="🎤 Microphone Volume Keeper",
+                               font=("Arial", 14, "bold"))
+        title_label.grid(row=0, column=0, columnspan=2, pady=(0, 20))
+
+        # Audio-Device Auswahl
+        ttk.Label(main_frame, text="Audio Device:", font=("Arial", 10, "bold")).grid(
+            row=1, column=0, sticky=tk.W, pady=(0, 5))
+
+        self.device_var = tk.StringVar(value=self.current_settings.get('device', 'Standard'))
+        self.device_combo = ttk.Combobox(main_frame, textvariable=self.device_var,
+                                        width=40, state="readonly")
+        self.device_combo.grid(row=2, column=0, columnspan=2, sticky=(tk.W, tk.E), pady=(0, 15))
+
+        # Load available devices
+        if self.devices is None:
+            self.load_audio_devices()
+        else:
+            self.set_device_list(self.devices)
+        if self.subscribe_devices:
+            self.unsubscribe_devices = self.subscribe_devices(self.on_devices_changed)
+            self.dialog.after(250, self.poll_device_updates)
+
+        # Ziel-Lautstärke
+        ttk.Label(main_frame, text="Target Volume:", font=("Arial", 10, "bold")).grid(
+            row=3, column=0, sticky=tk.W, pady=(0, 5))
+
+        volume_frame = ttk.Frame(main_frame)
+        volume_frame.grid(row=4, column=0, columnspan=2, sticky=(tk.W, tk.E), pady=(0, 15))
+
+        self.volume_var = tk.IntVar(value=self.current_settings.get('target_volume', 100))
+        self.volume_scale = ttk.Scale(volume_frame, from_=VOLUME_RANGE[0], to=VOLUME_RANGE[1],
+                                     variable=self.volume_var, orient=tk.HORIZONTAL)
+        self.volume_scale.grid(row=0, column=0, sticky=(tk.W, tk.E), padx=(0, 10))
+
+        self.volume_label = ttk.Label(volume_frame, text="100%")
+        self.volume_label.grid(row=0, column=1)
+
+        # Toleranz
+        ttk.Label(volume_frame, text="±").grid(row=0, column=2, padx=(10, 2))
+        # StringVar: an empty or mistyped spinbox is reported on OK instead of raising TclError
+        self.tolerance_var = tk.StringVar(value=str(self.current_settings.get('tolerance', 2)))
+        ttk.Spinbox(volume_frame, from_=TOLERANCE_RANGE[0], to=TOLERANCE_RANGE[1], width=3,
+                    textvariable=self.tolerance_var).grid(row=0, column=3)
+
+        # Scale update callback
+        self.volume_scale.configure(command=self.update_volume_label)
+        self.update_volume_label(self.volume_var.get())
+
+        # Abtastrate
+        ttk.Label(main_frame, text="Sampling Rate:", font=("Arial", 10, "bold")).grid(
+            row=5, column=0, sticky=tk.W, pady=(0, 5))
+
+        rate_frame = ttk.Frame(main_frame)
+        rate_frame.grid(row=6, column=0, columnspan=2, sticky=(tk.W, tk.E), pady=(0, 15))
+
+        self.rate_var = tk.DoubleVar(value=self.current_settings.get('check_interval', 0.5))
+        self.rate_scale = ttk.Scale(rate_frame, from_=0.1, to=5.0,
+                                   variable=self.rate_var, orient=tk.HORIZONTAL)
+        self.rate_scale.grid(row=0, column=0, sticky=(tk.W, tk.E), padx=(0, 10))
+
+        self.rate_label = ttk.Label(rate_frame, text="0.5s")
+        self.rate_label.grid(row=0, column=1)
+
+        # Rate-Update-Callback
+        self.rate_scale.configure(command=self.update_rate_label)
+        self.update_rate_label(self.rate_var.get())
+
+        # Adaptive Abtastrate
+        self.adaptive_var = tk.BooleanVar(value=self.current_settings.get('adaptive_interval', True))
+        ttk.Checkbutton(rate_frame, text="Slow down while volume is stable",
+                        variable=self.adaptive_var).grid(row=1, column=0, columnspan=2,
+                                                         sticky=tk.W, pady=(5, 0))
+
+        # Mehrere Geräte
+        ttk.Label(main_frame, text="Enforced Devices (multi-device mode):",
+                  font=("Arial", 10, "bold")).grid(row=7, column=0, sticky=tk.W, pady=(0, 5))
+
+        devices_frame = ttk.Frame(main_frame)
+        devices_frame.grid(row=8, column=0, columnspan=2, sticky=(tk.W, tk.E), pady=(0, 10))
+
+        self.device_targets = [dict(target) for target in self.current_settings.get('devices', [])]
+        self.targets_listbox = tk.Listbox(devices_frame, height=4)
+        self.targets_listbox.grid(row=0, column=0, rowspan=2, sticky=(tk.W, tk.E), padx=(0, 10))
+
+        ttk.Button(devices_frame, text="➕ Add", command=self.add_device_target).grid(
+            row=0, column=1, sticky=(tk.W, tk.E))
+        ttk.Button(devices_frame, text="➖ Remove", command=self.remove_device_target).grid(
+            row=1, column=1, sticky=(tk.W, tk.E))
+        devices_frame.columnconfigure(0, weight=1)
+        self.refresh_device_targets()
+
+        # Info-Text
+        info_text = ("💡 Tips:\n"
+                    "• Lower sampling rate = Faster response\n"
+                    "• Adaptive mode checks less often while stable\n"
+                    "• Default device = Automatic detection\n"
+                    "• Add devices to keep several microphones at their own volume\n"
+                    "• Settings are automatically saved")
+
+        info_label = ttk.Label(main_frame, text=info_text,
+                              font=("Arial", 9), foreground="gray")
+        info_label.grid(row=9, column=0, columnspan=2, pady=(10, 20), sticky=tk.W)
+
+        # Buttons
+        button_frame = ttk.Frame(main_frame)
+        button_frame.grid(row=10, column=0, columnspan=2, pady=(10, 0))
+
+        ttk.Button(button_frame, text="✅ OK", command=self.ok_clicked).grid(
+            row=0, column=0, padx=(0, 10))
+        ttk.Button(button_frame, text="❌ Cancel", command=self.cancel_clicked).grid(
+            row=0, column=1)
+
+        # Grid configuration
+        main_frame.columnconfigure(0, weight=1)
+        volume_frame.columnconfigure(0, weight=1)
+        rate_frame.columnconfigure(0, weight=1)
+
+    def load_audio_devices(self):
+        """Loads available audio devices"""
+        devices = ["Default (Automatic)"]
+
+        try:
+            # Versuche AudioDeviceCmdlets zu verwenden
+            result = subprocess.run([
+                'powershell', '-Command',
+                'Import-Module AudioDeviceCmdlets -ErrorAction SilentlyContinue; '
+                'Get-AudioDevice -List | Where-Object {$_.Type -eq "Recording"} | '
+                'Select-Object -ExpandProperty Name'
+            ], capture_output=True, text=True, timeout=10, encoding='utf-8',
+            creationflags=CREATE_NO_WINDOW)
+
+            if result.returncode == 0 and result.stdout.strip():
+                device_names = [line.strip() for line in result.stdout.strip().split('\n')
+                               if line.strip()]
+                devices.extend(device_names)
+
+        except Exception as e:
+            logging.warning(f"Konnte Audio-Geräte nicht laden: {e}")
+
+        self.device_combo['values'] = devices
+
+        # Aktuelles Gerät auswählen falls vorhanden
+        current_device = self.current_settings.get('device', 'Default (Automatic)')
+        if current_device in devices:
+            self.device_var.set(current_device)
+        else:
+            self.device_var.set("Default (Automatic)")
+
+    def set_device_list(self, names):
+        """Shows cached device names, keeps the selection (also a device that is unplugged right now)"""
+        devices = ["Default (Automatic)"] + [name for name in names if name != "Default (Automatic)"]
+        selected = self.device_var.get() or self.current_settings.get('device', 'Default (Automatic)')
+        if selected not in devices and selected not in ("Standard", ""):
+            devices.append(selected)
+        self.device_combo['values'] = devices
+        self.device_var.set(selected if selected in devices else "Default (Automatic)")
+
+    def on_devices_changed(self, devices):
+        """Device cache refreshed (background thread) - picked up by poll_device_updates"""
+        self.pending_devices = [device['name'] for device in devices]
+
+    def poll_device_updates(self):
+        """Applies a refreshed device list in the Tk thread"""
+        if not self.dialog.winfo_exists():
+            return
+        names, self.pending_devices = self.pending_devices, None
+        if names is not None:
+            self.set_device_list(names)
+        self.dialog.after(250, self.poll_device_updates)
+
+    def read_tolerance(self):
+        """Tolerance from the spinbox, None (after telling the user) if it is not valid"""
+        try:
+            return parse_bounded_int(self.tolerance_var.get(), *TOLERANCE_RANGE, "Tolerance")
+        except ValueError as e:
+            messagebox.showerror("Invalid tolerance", str(e), parent=self.dialog)
+            return None
+
+    def read_volume(self):
+        """Target volume from the slider, None (after telling the user) if it is out of range"""
+        try:
+            return parse_bounded_int(int(self.volume_var.get()), *VOLUME_RANGE, "Target volume")
+        except ValueError as e:
+            messagebox.showerror("Invalid target volume", str(e), parent=self.dialog)
+            return None
+
+    def add_device_target(self):
+        """Adds the selected device with the current volume and tolerance"""
+        volume = self.read_volume()
+        # One message at a time
+        tolerance = None if volume is None else self.read_tolerance()
+        if tolerance is None:
+            return
+        device = self.device_var.get()
+        self.device_targets = [t for t in self.device_targets if t['device'] != device]
+        self.device_targets.append({
+            'device': device,
+            'target_volume': volume,
+            'tolerance': tolerance
+        })
+        self.refresh_device_targets()
+
+    def remove_device_target(self):
+        """Removes the device selected in the list"""
+        selection = self.targets_listbox.curselection()
+        if selection:
+            del self.device_targets[selection[0]]
+            self.refresh_device_targets()
+
+    def refresh_device_targets(self):
+        """Shows the enforced devices in the list"""
+        self.targets_listbox.delete(0, tk.END)
+        for target in self.device_targets:
+            self.targets_listbox.insert(
+                tk.END, f"{target['device']} → {target['target_volume']}% (±{target['tolerance']})")
+
+    def update_volume_label(self, value):
+        """Updates the volume label"""
+        self.volume_label.config(text=f"{int(float(value))}%")
+
+    def update_rate_label(self, value):
+        """Updates the sampling rate label"""
+        self.rate_label.config(text=f"{float(value):.1f}s")
+
+    def ok_clicked(self):
+        """OK button clicked"""
+        volume = self.read_volume()
+        # One message at a time
+        tolerance = None if volume is None else self.read_tolerance()
+        if tolerance is None:
+            # Dialog stays open so the value can be fixed
+            return
+        self.result = {
+            'device': self.device_var.get(),
+            'target_volume': volume,
+            'check_interval': round(float(self.rate_var.get()), 1),
+            'adaptive_interval': bool(self.adaptive_var.get()),
+            'tolerance': tolerance,
+            'devices': self.device_targets
+        }
+        self.dialog.destroy()
+        self.root.quit()  # Beende die tkinter-Hauptschleife
+
+    def cancel_clicked(self):
+        """Cancel button clicked"""
+        self.result = None
+        self.dialog.destroy()
+        self.root.quit()  # Beende die tkinter-Hauptschleife
+
+    def show(self):
+        """Shows the dialog and waits for result"""
+        self.dialog.wait_window()
+        if self.unsubscribe_devices:
+            self.unsubscribe_devices()
+        self.root.destroy()  # Zerstöre das Root-Fenster komplett
+        return self.result
@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""
+Settings Store - microphone_keeper_settings.json on disk
+- Atomic writes (temp file in the same directory + os.replace), a crash
+  mid-write leaves the previous file intact
+- Debounced saves: bursts of changes end in one write
+- Cheap change detection: one os.stat() at most every check_interval seconds,
+  called from the monitoring loop; external edits are reloaded live
+"""
+
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+
+SETTINGS_FILENAME = "microphone_keeper_settings.json"
+
+# Overrides the settings path (like --settings)
+SETTINGS_ENV = "MVK_SETTINGS"
+
+
+def resolve_settings_path(path=None):
+    """--settings, then $MVK_SETTINGS, then the file in the working directory - always absolute"""
+    path = path or os.environ.get(SETTINGS_ENV) or SETTINGS_FILENAME
+    return os.path.abspath(os.path.expanduser(path))
+
+
+class SettingsStore:
+    """Loads, saves and watches one JSON settings file"""
+
+    def __init__(self, path, defaults, debounce=0.5, check_interval=2.0, clock=time.monotonic):
+        self.path = path
+        self.defaults = defaults
+        self.debounce = debounce
+        self.check_interval = check_interval
+        self.clock = clock
+
+        self.write_count = 0
+        self.reload_count = 0
+
+        self._signature = None
+        self._last_check = None
+        self._pending = None
+        self._timer = None
+        self._lock = threading.Lock()
+
+    def load(self):
+        """Settings merged over the defaults (defaults if missing or unreadable)"""
+        settings = dict(self.defaults)
+        try:
+            signature = self._stat()
+            if signature is not None:
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    settings.update(json.load(f))
+            self._signature = signature
+        except Exception as e:
+            logging.warning(f"Could not load settings: {e}")
+        return settings
+
+    def save(self, settings):
+        """Schedules a write - later saves within the debounce window replace it"""
+        with self._lock:
+            self._pending = dict(settings)
+            if self._timer is None:
+                self._timer = threading.Timer(self.debounce, self.flush)
+                self._timer.daemon = True
+                self._timer.start()
+
+    def flush(self):
+        """Writes a pending save right away"""
+        with self._lock:
+            settings, self._pending = self._pending, None
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            if settings is not None:
+                self._write(settings)
+
+    def check_for_changes(self, force=False):
+        """Reloaded settings if the file was changed by someone else, else None"""
+        now = self.clock()
+        if not force and self._last_check is not None and now - self._last_check < self.check_interval:
+            return None
+        self._last_check = now
+
+        signature = self._stat()
+        if signature is None or signature == self._signature:
+            return None
+
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                loaded = json.load(f)
+        except Exception as e:
+            # Editors may write in several steps - try again on the next check
+            logging.warning(f"Settings file changed but could not be read: {e}")
+            return None
+
+        self._signature = signature
+        self.reload_count += 1
+        settings = dict(self.defaults)
+        settings.update(loaded)
+        return settings
+
+    def _write(self, settings):
+        """Temp file + fsync + os.replace (caller holds the lock)"""
+        directory = os.path.dirname(self.path) or '.'
+        try:
+            os.makedirs(directory, exist_ok=True)
+            fd, temp_path = tempfile.mkstemp(prefix='.settings-', suffix='.tmp', dir=directory)
+            try:
+                with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                    json.dump(settings, f, indent=2, ensure_ascii=False)
+                    f.flush()
+                    os.fsync(f.fileno())
+                os.replace(temp_path, self.path)
+            except BaseException:
+                os.unlink(temp_path)
+                raise
+
+            # Our own write is not an external change
+            self._signature = self._stat()
+            self.write_count += 1
+            logging.info(f"Settings saved: {settings}")
+        except Exception as e:
+            logging.error(f"Could not save settings: {e}")
+
+    def _stat(self):
+        """(mtime_ns, size) of the file, None if it does not exist"""
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            return None
+        return (stat.st_mtime_ns, stat.st_size)
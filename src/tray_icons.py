@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Tray Icons - color-coded microphone icons, rendered once per variant
+- icon_key: the part of the state the icon shows (running, status, activity dot)
+- render_icon: draws one variant with PIL
+- IconCache: key -> image, filled lazily or up front with prerender()
+"""
+
+ICON_STATUSES = ("active", "simulation", "unknown", "backend_down", "recovering")
+
+# icon_status while the backend circuit breaker is not closed (see circuit_breaker.py)
+BREAKER_ICON_STATUS = {"open": "backend_down", "half_open": "recovering"}
+
+
+def icon_key(state):
+    """(running, icon_status, activity dot) of a KeeperState"""
+    return (state.running, state.icon_status, state.running and state.correction_count > 0)
+
+
+def render_icon(running, icon_status, activity):
+    """Creates a color-coded icon for the system tray"""
+    from PIL import Image, ImageDraw
+
+    image = Image.new('RGB', (64, 64), color='white')
+    draw = ImageDraw.Draw(image)
+
+    # Determine main color based on status
+    if not running:
+        main_color = 'red'  # Red - Off/Error
+    elif icon_status == "active":
+        main_color = 'green'  # Green - Active and productive
+    elif icon_status == "simulation":
+        main_color = 'orange'  # Yellow/Orange - Simulation/Mockup
+    elif icon_status == "backend_down":
+        main_color = 'darkred'  # Dark red - Backend failing, checks paused (backoff)
+    elif icon_status == "recovering":
+        main_color = 'mediumpurple'  # Purple - Probing whether the backend is back
+    else:
+        main_color = 'red'  # Red - Unknown/Error
+
+    # Draw microphone in main color
+    draw.ellipse([20, 15, 44, 35], fill=main_color)  # Microphone head
+    draw.rectangle([30, 35, 34, 50], fill=main_color)  # Stem
+    draw.arc([25, 45, 39, 55], start=0, end=180, fill=main_color, width=3)  # Base
+
+    # Small black outline for better visibility
+    draw.ellipse([20, 15, 44, 35], outline='black', width=1)
+    draw.rectangle([30, 35, 34, 50], outline='black', width=1)
+
+    # Status text as small dot
+    if activity:
+        # Small white dot shows activity
+        draw.ellipse([50, 50, 58, 58], fill='white', outline='black')
+
+    return image
+
+
+class IconCache:
+    """Each icon variant is drawn once and reused afterwards"""
+
+    def __init__(self, render=render_icon):
+        self.render = render
+        self.images = {}
+        self.render_count = 0
+
+    def get(self, key):
+        """Image for an icon_key() tuple"""
+        image = self.images.get(key)
+        if image is None:
+            image = self.images[key] = self.render(*key)
+            self.render_count += 1
+        return image
+
+    def prerender(self, icon_statuses=ICON_STATUSES):
+        """Draws every variant up front (stopped icons have no activity dot)"""
+        for icon_status in icon_statuses:
+            self.get((False, icon_status, False))
+            self.get((True, icon_status, False))
+            self.get((True, icon_status, True))
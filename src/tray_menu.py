@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+Tray Menu - built once, rows read the published KeeperState
+- menu_key: the state fields the menu displays
+- menu_rows: row texts for one state
+- TrayMenu: pystray menu with callable text/visibility; the native menu is
+  only refreshed when menu_key changed
+"""
+
+MAX_DEVICE_ROWS = 8
+HISTORY_ROWS = 5
+SEPARATOR = "─" * 30
+
+
+def menu_key(state):
+    """Everything the menu shows - volumes and counters are not part of it"""
+    return (state.running, state.icon_status, state.audio_method, state.multi_device,
+            state.selected_device, state.target_volume, state.check_interval,
+            tuple((device, target_volume, tolerance) for device, _, target_volume, tolerance in state.targets),
+            state.status_history)
+
+
+def menu_rows(state):
+    """Row texts for one state"""
+    status_text = "Stop" if state.running else "Start"
+
+    # Status icon based on icon status
+    if not state.running:
+        status_icon = "🔴"
+    elif state.icon_status == "active":
+        status_icon = "🟢"
+    elif state.icon_status == "simulation":
+        status_icon = "🟡"
+    else:
+        status_icon = "🔴"
+
+    if state.multi_device:
+        # One row per enforced device
+        devices = [f"🎤 {device[:20]}{'...' if len(device) > 20 else ''}: {target_volume}% ±{tolerance}"
+                   for device, _, target_volume, tolerance in state.targets]
+        if len(devices) > MAX_DEVICE_ROWS:
+            devices[MAX_DEVICE_ROWS - 1:] = [f"🎤 ... {len(devices) - MAX_DEVICE_ROWS + 1} more"]
+        devices.append(f"⏱️ Rate: {state.check_interval}s")
+    else:
+        device = state.selected_device
+        devices = [f"🎤 {device[:25]}{'...' if len(device) > 25 else ''}",
+                   f"🎯 Target: {state.target_volume}% | ⏱️ Rate: {state.check_interval}s"]
+
+    # Shorten long events
+    history = [f"  {event if len(event) <= 40 else event[:37] + '...'}"
+               for event in state.status_history[:HISTORY_ROWS]]
+
+    return {
+        'toggle': f"{status_icon} {status_text}",
+        'method': f"🔧 {state.audio_method}",
+        'devices': devices,
+        'history': history,
+    }
+
+
+class TrayMenu:
+    """Menu defined once - pystray pulls the row texts from the current state"""
+
+    def __init__(self, snapshot, show_status, toggle_monitoring, show_settings, quit_application):
+        self.snapshot = snapshot
+        self.actions = (show_status, toggle_monitoring, show_settings, quit_application)
+        self._rows_key = None
+        self._rows = None
+        self.shown_key = None
+        self.refresh_count = 0
+
+    def rows(self):
+        """Row texts, recomputed only when a displayed field changed"""
+        state = self.snapshot()
+        key = menu_key(state)
+        if key != self._rows_key:
+            self._rows, self._rows_key = menu_rows(state), key
+        return self._rows
+
+    def build(self):
+        """Creates the pystray.Menu (once per tray icon)"""
+        import pystray
+
+        show_status, toggle_monitoring, show_settings, quit_application = self.actions
+        rows = self.rows
+
+        def label(text):
+            return pystray.MenuItem(text, None, enabled=False)
+
+        def row(group, index):
+            # Slot `index` of a variable-length group, hidden while unused
+            return pystray.MenuItem(
+                lambda item: rows()[group][index] if index < len(rows()[group]) else "",
+                None, enabled=False,
+                visible=lambda item: index < len(rows()[group]))
+
+        def history_visible(item):
+            return bool(rows()['history'])
+
+        items = [
+            pystray.MenuItem("📊 Show Status", show_status),
+            label(SEPARATOR),
+            pystray.MenuItem(lambda item: rows()['toggle'], toggle_monitoring),
+            pystray.MenuItem("⚙️ Settings...", show_settings),
+            label(SEPARATOR),
+            pystray.MenuItem(lambda item: rows()['method'], None, enabled=False),
+        ]
+        # Device rows plus the rate row
+        items.extend(row('devices', index) for index in range(MAX_DEVICE_ROWS + 1))
+
+        # Status history
+        items.append(pystray.MenuItem(SEPARATOR, None, enabled=False, visible=history_visible))
+        items.append(pystray.MenuItem("📋 Recent Events:", None, enabled=False, visible=history_visible))
+        items.extend(row('history', index) for index in range(HISTORY_ROWS))
+
+        items.extend([
+            label(SEPARATOR),
+            pystray.MenuItem("❌ Exit", quit_application),
+        ])
+
+        self.shown_key = menu_key(self.snapshot())
+        return pystray.Menu(*items)
+
+    def refresh_needed(self):
+        """True once per change of a displayed field"""
+        key = menu_key(self.snapshot())
+        if key == self.shown_key:
+            return False
+        self.shown_key = key
+        self.refresh_count += 1
+        return True
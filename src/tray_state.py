@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Tray State - what the tray icon, menu and status dialog display
+- KeeperState: immutable snapshot published by the monitor after each check
+- StateStore: thread-safe holder, bumps the version only on real changes
+- CoalescingRefresher: runs UI refreshes on its own thread, bursts of
+  requests collapse into one refresh
+The UI only reads snapshots, so it never waits on audio I/O.
+"""
+
+import logging
+import threading
+from collections import namedtuple
+
+# targets: ((device, volume or None, target_volume, tolerance), ...)
+KeeperState = namedtuple('KeeperState', [
+    'version', 'running', 'audio_method', 'icon_status', 'selected_device',
+    'target_volume', 'tolerance', 'check_interval', 'multi_device', 'targets',
+    'correction_count', 'status_history',
+])
+
+EMPTY_STATE = KeeperState(
+    version=0, running=False, audio_method=None, icon_status="unknown",
+    selected_device="", target_volume=None, tolerance=None, check_interval=None,
+    multi_device=False, targets=(), correction_count=0, status_history=(),
+)
+
+
+class StateStore:
+    """Latest KeeperState - readers get the snapshot without locking"""
+
+    def __init__(self):
+        self._state = EMPTY_STATE
+        self._lock = threading.Lock()
+
+    def snapshot(self):
+        """Current state (a single reference read, safe from any thread)"""
+        return self._state
+
+    def publish(self, **fields):
+        """Replaces fields, True (and a new version) if anything changed"""
+        with self._lock:
+            current = self._state
+            updated = current._replace(**fields)
+            if updated[1:] == current[1:]:
+                return False
+            self._state = updated._replace(version=current.version + 1)
+            return True
+
+
+class CoalescingRefresher:
+    """Calls refresh() on a worker thread, at most once per min_delay"""
+
+    def __init__(self, refresh, min_delay=0.25):
+        self.refresh = refresh
+        self.min_delay = min_delay
+        self._requested = threading.Event()
+        self._stopped = threading.Event()
+        self.thread = None
+        self.refresh_count = 0
+        self.request_count = 0
+
+    def start(self):
+        """Starts the refresh thread"""
+        if self.thread and self.thread.is_alive():
+            return
+        self._stopped.clear()
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    def request(self):
+        """Asks for a refresh - never blocks the caller"""
+        self.request_count += 1
+        self._requested.set()
+
+    def stop(self):
+        """Stops the refresh thread"""
+        self._stopped.set()
+        self._requested.set()
+        if self.thread and self.thread is not threading.current_thread():
+            self.thread.join(timeout=2)
+
+    def _run(self):
+        """Waits for requests, lets bursts settle, refreshes once"""
+        while True:
+            self._requested.wait()
+            if self._stopped.is_set():
+                return
+            # Requests arriving during this delay are served by the same refresh
+            self._stopped.wait(self.min_delay)
+            self._requested.clear()
+            if self._stopped.is_set():
+                return
+            try:
+                self.refresh()
+                self.refresh_count += 1
+            except Exception as e:
+                logging.error(f"Tray refresh failed: {e}")
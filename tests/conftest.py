@@ -0,0 +1,10 @@
+import os
+import sys
+
+# The modules in src/ import each other as top-level modules
+SRC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src')
+sys.path.insert(0, os.path.abspath(SRC_DIR))
+
+# create_final_release.py lives in the repository root
+ROOT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.append(os.path.abspath(ROOT_DIR))
@@ -0,0 +1,103 @@
+import asyncio
+import json
+import threading
+import time
+
+import pytest
+
+from async_engine import AsyncCmdletsDriver, AsyncExecutorDriver, AsyncPowerShellWorker
+from audio_backends import SimulatedAudioBackend
+from powershell_worker import PowerShellWorkerTimeout
+from test_powershell_worker import fake_command
+
+
+def run(coroutine):
+    return asyncio.run(coroutine)
+
+
+def test_driver_ensures_over_the_async_shell():
+    async def scenario():
+        worker = AsyncPowerShellWorker(command=fake_command(), timeout=5.0, start_timeout=10.0)
+        driver = AsyncCmdletsDriver(worker)
+        try:
+            ids = [device['id'] for device in await worker.request('list')]
+            outcomes = await driver.ensure_volumes([(ids[0], 100, 2), (ids[1], 81, 2), ("no-such-endpoint", 100, 2)])
+            return outcomes, worker.spawn_count
+        finally:
+            await driver.close()
+
+    outcomes, spawns = run(scenario())
+    assert outcomes == [(80, 100), (80, 80), None]
+    assert spawns == 1
+
+
+def test_timeout_kills_the_async_shell():
+    async def scenario():
+        worker = AsyncPowerShellWorker(command=fake_command('--hang-on', 'get'), timeout=0.3, start_timeout=10.0)
+        try:
+            await worker.start()
+            process = worker.process
+            with pytest.raises(PowerShellWorkerTimeout):
+                await worker.request('get')
+            await process.wait()
+            # The next request starts a fresh shell
+            assert await worker.request('ping') == 'pong'
+            return worker.respawn_count
+        finally:
+            await worker.close()
+
+    assert run(scenario()) == 1
+
+
+def test_executor_driver_isolates_failing_devices():
+    import concurrent.futures
+
+    class PartlyBroken(SimulatedAudioBackend):
+        def ensure_volumes(self, requests):
+            if requests[0][0] == "broken":
+                raise OSError("endpoint gone")
+            return super().ensure_volumes(requests)
+
+    backend = PartlyBroken(volume=80, device_names=("Built-in Microphone",))
+    with concurrent.futures.ThreadPoolExecutor(max_workers=2) as executor:
+        driver = AsyncExecutorDriver(backend, executor)
+        assert run(driver.ensure_volumes([(None, 100, 2), ("broken", 100, 2)])) == [(80, 100), None]
+        with pytest.raises(OSError):
+            run(driver.ensure_volumes([("broken", 100, 2)]))
+    backend.close()
+
+
+def test_stop_cancels_a_hung_backend_call(tmp_path):
+    from microphone_volume_keeper import MicrophoneVolumeKeeperAdvanced
+
+    settings_path = tmp_path / "settings.json"
+    settings_path.write_text(json.dumps({
+        'audio_backend': 'Simulation', 'event_journal': False, 'control_api': False,
+        'engine': 'asyncio', 'log_file': str(tmp_path / "keeper.log")}))
+    keeper = MicrophoneVolumeKeeperAdvanced(settings_path=str(settings_path))
+    entered = threading.Event()
+    release = threading.Event()
+
+    class HungBackend(SimulatedAudioBackend):
+        def ensure_volumes(self, requests):
+            entered.set()
+            release.wait(10.0)
+            return super().ensure_volumes(requests)
+
+    backend = HungBackend(volume=100)
+    keeper.backend.close()
+    keeper.backend = backend
+    keeper.device_registry.invalidate("test backend")
+
+    keeper.start_monitoring()
+    try:
+        assert entered.wait(5.0)
+        engine = keeper.async_engine
+        started = time.monotonic()
+        keeper.stop_monitoring()
+        assert time.monotonic() - started < engine.stop_grace + 1.0
+        assert not engine.thread.is_alive()
+    finally:
+        release.set()
+        keeper.device_registry.stop_refresher()
+        backend.close()
@@ -0,0 +1,100 @@
+import itertools
+import shutil
+
+from audio_backends import SimulatedAudioBackend
+from backend_trace import RecordingBackend, external_changes, initial_volumes, load_trace, recorded_targets
+
+
+def test_trace_is_readable_without_close(tmp_path):
+    path = str(tmp_path / "mic.trace.gz")
+    backend = SimulatedAudioBackend(volume=80, device_names=("USB Microphone",))
+    recording = RecordingBackend(backend, path, flush_interval=0.0)
+    device_id = recording.list_devices()[0]['id']
+    recording.get_volume(device_id)
+    recording.ensure_volumes([(device_id, 100, 2)])
+
+    # Snapshot of the file as a crash would leave it - no gzip trailer
+    crashed = str(tmp_path / "crashed.trace.gz")
+    shutil.copyfile(path, crashed)
+    header, entries = load_trace(crashed)
+    assert header['backend'] == "Simulation"
+    assert [entry['op'] for entry in entries] == ['list', 'get', 'ensure']
+    assert entries[2]['r'] == [[80, 100]]
+
+    recording.close()
+    assert [entry['op'] for entry in load_trace(path)[1]] == ['list', 'get', 'ensure']
+
+
+def test_records_are_flushed_at_the_interval(tmp_path):
+    path = str(tmp_path / "mic.trace.gz")
+    now = [0.0]
+    recording = RecordingBackend(SimulatedAudioBackend(), path, clock=lambda: now[0], flush_interval=10.0)
+
+    def crash_snapshot():
+        crashed = str(tmp_path / "crashed.trace.gz")
+        shutil.copyfile(path, crashed)
+        return load_trace(crashed)[1]
+
+    now[0] = 1.0
+    recording.get_volume()
+    # Header only - the record waits for the next flush
+    assert crash_snapshot() == []
+
+    now[0] = 11.0
+    recording.get_volume()
+    assert len(crash_snapshot()) == 2
+    recording.close()
+
+
+def test_each_drift_of_the_default_device_counts_once(tmp_path):
+    path = str(tmp_path / "mic.trace.gz")
+    backend = SimulatedAudioBackend(volume=100, device_names=("Built-in Microphone", "USB Microphone"))
+    ticks = itertools.count()
+    recording = RecordingBackend(backend, path, clock=lambda: float(next(ticks)))
+    recording.list_devices()
+    recording.subscribe(lambda device_id, volume: None)
+
+    # Like the keeper: the default device is addressed as None, its events carry the endpoint ID
+    drifts = (60, 45, 80)
+    recording.ensure_volumes([(None, 100, 2)])
+    for volume in drifts:
+        backend.apply_external_change(volume)
+        recording.get_volume()
+        recording.ensure_volumes([(None, 100, 2)])
+    recording.close()
+
+    entries = load_trace(path)[1]
+    default_id = backend.devices[0]['id']
+    assert [(device_id, volume) for _, device_id, volume in external_changes(entries)] == \
+        [(default_id, volume) for volume in drifts]
+    assert initial_volumes(entries) == {default_id: 100}
+    assert recorded_targets(entries) == {default_id: 100}
+
+
+def test_recording_keeps_drift_and_device_changes(tmp_path):
+    import json
+    from microphone_volume_keeper import MicrophoneVolumeKeeperAdvanced
+
+    settings_path = tmp_path / "settings.json"
+    settings_path.write_text(json.dumps({
+        'audio_backend': 'Simulation', 'event_journal': False, 'control_api': False,
+        'log_file': str(tmp_path / "keeper.log")}))
+    keeper = MicrophoneVolumeKeeperAdvanced(settings_path=str(settings_path))
+    simulation = keeper.backend
+    keeper.record_trace(str(tmp_path / "mic.trace.gz"))
+    reasons = []
+    invalidate = keeper.device_registry.invalidate
+    keeper.device_registry.invalidate = lambda reason: (reasons.append(reason), invalidate(reason))
+
+    keeper.start_monitoring()
+    try:
+        assert simulation._drift_thread.is_alive()
+        device = dict(simulation.devices[0])
+        simulation.unplug(device['id'])
+        # Reached the registry through the recording wrapper
+        assert "device added or removed" in reasons
+    finally:
+        keeper.stop_monitoring()
+        keeper.device_registry.stop_refresher()
+    assert simulation._drift_stop.is_set()
+    keeper.backend.close()
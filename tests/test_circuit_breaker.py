@@ -0,0 +1,137 @@
+from circuit_breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+
+def make_breaker(rng=lambda: 0.5, **kwargs):
+    clock = FakeClock()
+    kwargs.setdefault('failure_threshold', 3)
+    kwargs.setdefault('base_delay', 1.0)
+    kwargs.setdefault('max_delay', 8.0)
+    return CircuitBreaker(clock=clock, rng=rng, **kwargs), clock
+
+
+def test_opens_after_threshold_failures_in_a_row():
+    breaker, clock = make_breaker()
+    breaker.record_failure()
+    breaker.record_failure()
+    assert breaker.state == CLOSED
+    breaker.record_failure()
+    assert breaker.state == OPEN
+    assert breaker.trips == 1
+    assert not breaker.allow()
+    assert breaker.rejected == 1
+    assert breaker.retry_in() == 1.0
+
+
+def test_success_resets_the_failure_count():
+    breaker, clock = make_breaker()
+    breaker.record_failure()
+    breaker.record_failure()
+    breaker.record_success()
+    breaker.record_failure()
+    breaker.record_failure()
+    assert breaker.state == CLOSED
+    assert breaker.failures == 2
+
+
+def test_half_open_probe_success_closes():
+    breaker, clock = make_breaker(failure_threshold=1)
+    breaker.record_failure()
+    clock.now += 1.0
+    assert breaker.allow()
+    assert breaker.state == HALF_OPEN
+    breaker.record_success()
+    assert breaker.state == CLOSED
+    assert breaker.failures == 0
+    assert breaker.allow()
+
+
+def test_failed_probes_double_the_delay_up_to_the_cap():
+    breaker, clock = make_breaker(failure_threshold=1)
+    delays = []
+    breaker.record_failure()
+    for _ in range(6):
+        delays.append(breaker.retry_in())
+        clock.now += breaker.retry_in()
+        assert breaker.allow()
+        breaker.record_failure()
+    assert delays == [1.0, 2.0, 4.0, 8.0, 8.0, 8.0]
+    assert breaker.trips == 7
+
+
+def test_jitter_spreads_the_delay():
+    low, _ = make_breaker(rng=lambda: 0.0, failure_threshold=1, jitter=0.2)
+    high, _ = make_breaker(rng=lambda: 1.0, failure_threshold=1, jitter=0.2)
+    low.record_failure()
+    high.record_failure()
+    assert abs(low.retry_in() - 0.8) < 1e-9
+    assert abs(high.retry_in() - 1.2) < 1e-9
+
+
+def test_probe_now_ends_the_backoff():
+    breaker, clock = make_breaker(failure_threshold=1)
+    breaker.record_failure()
+    assert not breaker.allow()
+    breaker.probe_now()
+    assert breaker.retry_in() == 0.0
+    assert breaker.allow()
+    assert breaker.state == HALF_OPEN
+
+
+def test_on_change_reports_transitions():
+    changes = []
+    breaker, clock = make_breaker(failure_threshold=1,
+                                  on_change=lambda old, new: changes.append((old, new)))
+    breaker.record_failure()
+    clock.now += 1.0
+    breaker.allow()
+    breaker.record_success()
+    assert changes == [(CLOSED, OPEN), (OPEN, HALF_OPEN), (HALF_OPEN, CLOSED)]
+
+
+def test_keeper_successful_calls_reset_the_breaker(tmp_path):
+    import json
+    from microphone_volume_keeper import MicrophoneVolumeKeeperAdvanced
+
+    settings_path = tmp_path / "settings.json"
+    settings_path.write_text(json.dumps({'audio_backend': 'Simulation', 'event_journal': False,
+                                         'control_api': False, 'log_file': str(tmp_path / "keeper.log")}))
+    keeper = MicrophoneVolumeKeeperAdvanced(settings_path=str(settings_path))
+    try:
+        keeper.backend_breaker.record_failure()
+        keeper.backend_breaker.record_failure()
+        keeper.ensure_volumes(keeper.active_targets())
+        assert keeper.backend_breaker.failures == 0
+
+        keeper.backend_breaker.record_failure()
+        assert keeper.set_microphone_volume(80)
+        assert keeper.backend_breaker.failures == 0
+    finally:
+        keeper.backend.close()
+
+
+def test_keeper_backoff_setting_is_clamped(tmp_path):
+    import json
+    from microphone_volume_keeper import MicrophoneVolumeKeeperAdvanced
+
+    settings_path = tmp_path / "settings.json"
+    settings_path.write_text(json.dumps({'audio_backend': 'Simulation', 'event_journal': False,
+                                         'control_api': False, 'log_file': str(tmp_path / "keeper.log"),
+                                         'breaker_max_backoff': 0.0}))
+    keeper = MicrophoneVolumeKeeperAdvanced(settings_path=str(settings_path))
+    try:
+        breaker = keeper.backend_breaker
+        assert breaker.max_delay == breaker.base_delay
+        keeper.apply_settings({'breaker_max_backoff': 60.0})
+        assert breaker.max_delay == 60.0
+        keeper.apply_settings({'breaker_max_backoff': -5})
+        assert breaker.max_delay == breaker.base_delay
+    finally:
+        keeper.backend.close()
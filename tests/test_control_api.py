@@ -0,0 +1,97 @@
+import json
+import socket
+
+import pytest
+
+from control_api import (INVALID_PARAMS, METHOD_NOT_FOUND, PARSE_ERROR, ControlError, ControlServer,
+                         call, control_address)
+from microphone_volume_keeper import MicrophoneVolumeKeeperAdvanced
+
+
+def make_keeper(tmp_path, **settings):
+    settings_path = tmp_path / "settings.json"
+    settings_path.write_text(json.dumps(dict({
+        'audio_backend': 'Simulation', 'event_journal': False, 'control_api': False,
+        'log_file': str(tmp_path / "keeper.log")}, **settings)))
+    return MicrophoneVolumeKeeperAdvanced(settings_path=str(settings_path))
+
+
+def test_set_target_without_device_changes_every_device(tmp_path):
+    keeper = make_keeper(tmp_path, devices=[
+        {'device': "Built-in Microphone", 'target_volume': 100, 'tolerance': 2},
+        {'device': "USB Microphone", 'target_volume': 80, 'tolerance': 5}])
+    try:
+        keeper.control_set_target(60)
+        assert [target['target_volume'] for target in keeper.active_targets()] == [60, 60]
+        assert [target['tolerance'] for target in keeper.active_targets()] == [2, 5]
+
+        keeper.control_set_target(70, device="USB Microphone")
+        assert [target['target_volume'] for target in keeper.active_targets()] == [60, 70]
+
+        keeper.settings_store.flush()
+        saved = json.loads((tmp_path / "settings.json").read_text())
+        assert [target['target_volume'] for target in saved['devices']] == [60, 70]
+    finally:
+        keeper.backend.close()
+
+
+@pytest.fixture
+def server(tmp_path):
+    if not hasattr(socket, 'AF_UNIX'):
+        pytest.skip("Unix socket transport")
+    calls = []
+
+    def set_target(volume, device=None):
+        if not isinstance(volume, int):
+            raise ControlError("volume must be an integer between 0 and 100")
+        calls.append((volume, device))
+        return {'message': f"Target: {volume}%"}
+
+    methods = {'status': lambda: {'running': True}, 'set_target': set_target}
+    # Falls back to a short path in the temp directory if tmp_path is too long for a socket
+    control = ControlServer(methods, control_address(str(tmp_path / "settings.json")))
+    control.start()
+    control.calls = calls
+    yield control
+    control.stop()
+
+
+def test_call_over_the_socket(server):
+    assert call(server.address, 'status') == {'running': True}
+    assert call(server.address, 'set_target', volume=90, device="USB Microphone") == {'message': "Target: 90%"}
+    assert server.calls == [(90, "USB Microphone")]
+    assert server.request_count == 2
+
+
+def test_errors_come_back_as_json_rpc_errors(server):
+    with pytest.raises(ControlError) as error:
+        call(server.address, 'reboot')
+    assert error.value.code == METHOD_NOT_FOUND
+    with pytest.raises(ControlError) as error:
+        call(server.address, 'set_target', volume="loud")
+    assert error.value.code == INVALID_PARAMS
+    with pytest.raises(ControlError) as error:
+        call(server.address, 'status', verbose=True)
+    assert error.value.code == INVALID_PARAMS
+
+
+def test_one_connection_serves_several_lines(server):
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.settimeout(2.0)
+        sock.connect(server.address)
+        sock.sendall(b'not json\n'
+                     b'{"jsonrpc": "2.0", "method": "status"}\n'
+                     b'{"jsonrpc": "2.0", "id": 7, "method": "status"}\n')
+        with sock.makefile('rb') as reader:
+            parse_error = json.loads(reader.readline())
+            # The notification (no id) gets no answer - the next line is request 7
+            answer = json.loads(reader.readline())
+    assert parse_error['error']['code'] == PARSE_ERROR
+    assert answer == {'jsonrpc': '2.0', 'id': 7, 'result': {'running': True}}
+
+
+def test_second_server_on_the_same_address_is_refused(server):
+    with pytest.raises(OSError):
+        ControlServer({}, server.address).start()
+    # The running one still answers
+    assert call(server.address, 'status') == {'running': True}
@@ -0,0 +1,134 @@
+import json
+import threading
+import time
+
+import device_registry
+from device_registry import DeviceRegistry
+
+
+def wait_for(condition, timeout=3.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.01)
+    return condition()
+
+
+def test_refresher_looks_for_missing_watched_devices(monkeypatch):
+    monkeypatch.setattr(device_registry, 'MISSING_RETRY', 0.05)
+    devices = [{'id': 'a', 'name': "Built-in Microphone", 'default': True}]
+    registry = DeviceRegistry(lambda: list(devices), ttl=300.0)
+    changed = threading.Event()
+    registry.subscribe(lambda devices: changed.set())
+    registry.start_refresher()
+    try:
+        assert changed.wait(2.0)
+        changed.clear()
+        registry.watch(["USB Microphone"])
+        assert registry.missing() == {"USB Microphone"}
+
+        # Comes back without anyone invalidating the cache
+        devices.append({'id': 'b', 'name': "USB Microphone", 'default': False})
+        assert changed.wait(2.0)
+        assert registry.missing() == set()
+        assert registry.resolve("USB Microphone") == 'b'
+    finally:
+        registry.stop_refresher()
+
+
+def test_invalidate_keeps_the_previous_list_visible():
+    devices = [{'id': 'a', 'name': "Built-in Microphone", 'default': True}]
+    registry = DeviceRegistry(lambda: list(devices), ttl=300.0)
+    assert registry.devices() == devices
+
+    registry.invalidate("test")
+    assert registry.is_stale()
+    assert registry.cached_devices() == devices
+
+
+def test_cached_devices_does_not_wait_for_an_enumeration():
+    entered = threading.Event()
+    release = threading.Event()
+    devices = [{'id': 'a', 'name': "Built-in Microphone", 'default': True}]
+
+    def slow_list():
+        entered.set()
+        release.wait(5.0)
+        return list(devices)
+
+    registry = DeviceRegistry(slow_list, ttl=300.0)
+    release.set()
+    registry.devices()
+    release.clear()
+    entered.clear()
+
+    registry.invalidate("test")
+    refresh = threading.Thread(target=registry.devices)
+    refresh.start()
+    try:
+        assert entered.wait(2.0)
+        started = time.monotonic()
+        assert registry.cached_devices() == devices
+        assert time.monotonic() - started < 0.5
+    finally:
+        release.set()
+        refresh.join(2.0)
+    assert not registry.is_stale()
+
+
+def test_keeper_resubscribes_after_replug(tmp_path):
+    from audio_backends import SimulatedAudioBackend
+    from microphone_volume_keeper import MicrophoneVolumeKeeperAdvanced
+
+    names = ("Built-in Microphone", "USB Microphone")
+    settings_path = tmp_path / "settings.json"
+    settings_path.write_text(json.dumps({
+        'audio_backend': 'Simulation', 'event_journal': False, 'control_api': False,
+        'event_driven': True, 'log_file': str(tmp_path / "keeper.log"),
+        'devices': [{'device': name, 'target_volume': 100, 'tolerance': 2} for name in names]}))
+    keeper = MicrophoneVolumeKeeperAdvanced(settings_path=str(settings_path))
+    backend = SimulatedAudioBackend(volume=100, device_names=names)
+    backend.start_drift = lambda reference, mean_interval=5.0: None
+    keeper.backend.close()
+    keeper.backend = backend
+    keeper.device_registry.invalidate("test backend")
+
+    keeper.start_monitoring()
+    try:
+        device = dict(backend.devices[1])
+        backend.unplug(device['id'])
+        time.sleep(0.2)
+        backend.plug(device['id'], device['name'], 30)
+        # Well before the event fallback poll
+        assert wait_for(lambda: backend.volumes[device['id']] == 100, timeout=2.0)
+    finally:
+        keeper.stop_monitoring()
+        keeper.device_registry.stop_refresher()
+        backend.close()
+
+
+def test_missing_devices_never_fall_back_to_the_default(tmp_path):
+    from audio_backends import SimulatedAudioBackend
+    from microphone_volume_keeper import MicrophoneVolumeKeeperAdvanced
+
+    settings_path = tmp_path / "settings.json"
+    settings_path.write_text(json.dumps({
+        'audio_backend': 'Simulation', 'event_journal': False, 'control_api': False,
+        'log_file': str(tmp_path / "keeper.log"),
+        'devices': [{'device': "Headset", 'target_volume': 50, 'tolerance': 2},
+                    {'device': "Webcam", 'target_volume': 100, 'tolerance': 2}]}))
+    keeper = MicrophoneVolumeKeeperAdvanced(settings_path=str(settings_path))
+    backend = SimulatedAudioBackend(volume=80, device_names=("Built-in Microphone",))
+    keeper.backend.close()
+    keeper.backend = backend
+    keeper.device_registry.invalidate("test backend")
+
+    targets = keeper.active_targets()
+    assert keeper.ensure_requests(targets) == ([], [])
+    for _ in range(3):
+        assert not keeper.ensure_volumes(targets)
+    assert keeper.correction_count == 0
+    assert backend.volumes["simulation-0"] == 80
+    assert keeper.missing_devices == {"Headset", "Webcam"}
+    backend.close()
@@ -0,0 +1,43 @@
+import random
+
+from drift_patterns import DriftPatternLearner
+
+DAY = 86400
+START = 1_700_000_000.0
+
+
+def hot_slots(learner, device, day):
+    """How many of the day's time-of-day slots are hot"""
+    step = learner.slot_minutes * 60
+    return sum(learner.hot(device, day + slot * step + step / 2) for slot in range(learner.slots))
+
+
+def test_uniform_random_drift_keeps_most_slots_cold():
+    rng = random.Random(7)
+    for corrections in (10, 30, 100, 300):
+        learner = DriftPatternLearner(clock=lambda: START)
+        timestamps = sorted(START + rng.uniform(0, 28 * DAY) for _ in range(corrections))
+        for timestamp in timestamps:
+            learner.record_correction("USB Microphone", timestamp)
+
+        # Evaluated days later - only the time-of-day histogram can make a slot hot
+        hot = hot_slots(learner, "USB Microphone", timestamps[-1] + 3 * DAY)
+        assert hot <= learner.slots // 10, (corrections, hot)
+
+
+def test_daily_reset_makes_its_slot_hot():
+    learner = DriftPatternLearner(clock=lambda: START)
+    # Another application resets the microphone every day at the same time
+    for day in range(21):
+        learner.record_correction("USB Microphone", START + day * DAY)
+
+    later = START + 24 * DAY
+    assert learner.hot("USB Microphone", later + 60)
+    assert not learner.hot("USB Microphone", later + DAY / 2)
+
+
+def test_few_corrections_have_no_time_of_day_pattern():
+    learner = DriftPatternLearner(clock=lambda: START)
+    for day in range(6):
+        learner.record_correction("USB Microphone", START + day * DAY)
+    assert not learner.hot("USB Microphone", START + 9 * DAY + 60)
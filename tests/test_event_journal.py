@@ -0,0 +1,49 @@
+import json
+import threading
+
+from event_journal import EventJournal
+
+
+def test_append_does_no_disk_io_on_the_calling_thread(tmp_path, monkeypatch):
+    journal = EventJournal(str(tmp_path / "events.jsonl"))
+    writers = []
+    write = journal._write
+
+    def record_thread(records):
+        writers.append(threading.current_thread())
+        write(records)
+
+    monkeypatch.setattr(journal, '_write', record_thread)
+    for volume in range(5):
+        journal.append('CORRECTION', f"{volume}%", device="USB Microphone", before=volume, after=100)
+    journal.close()
+
+    assert writers
+    assert threading.current_thread() not in writers
+    lines = (tmp_path / "events.jsonl").read_text(encoding='utf-8').splitlines()
+    assert [json.loads(line)['before'] for line in lines] == [0, 1, 2, 3, 4]
+
+
+def test_counts_survive_a_restart(tmp_path):
+    path = str(tmp_path / "events.jsonl")
+    journal = EventJournal(path, clock=lambda: 1000.0)
+    journal.append('CORRECTION', "80% -> 100%", device="USB Microphone")
+    journal.append('CORRECTION', "80% -> 100%", device="USB Microphone")
+    journal.close()
+
+    reopened = EventJournal(path, clock=lambda: 1000.0)
+    assert reopened.count('CORRECTION', since=0) == 2
+    assert reopened.recent(1)[0].device == "USB Microphone"
+    reopened.close()
+
+
+def test_rotation_keeps_backups(tmp_path):
+    path = str(tmp_path / "events.jsonl")
+    journal = EventJournal(path, max_bytes=200, backups=2)
+    for index in range(20):
+        journal.append('CORRECTION', f"correction {index}")
+    journal.close()
+
+    assert (tmp_path / "events.jsonl.1").exists()
+    assert not (tmp_path / "events.jsonl.3").exists()
+    assert journal.write_errors == 0
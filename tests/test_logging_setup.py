@@ -0,0 +1,80 @@
+import logging
+import queue
+import threading
+import time
+
+import pytest
+
+import logging_setup
+
+
+@pytest.fixture
+def fresh_queue(monkeypatch):
+    """Own queue and listener slot - the module ones belong to the keeper"""
+    records = queue.Queue(3)
+    monkeypatch.setattr(logging_setup, '_queue', records)
+    monkeypatch.setattr(logging_setup, '_listener', None)
+    monkeypatch.setattr(logging_setup, '_dropped', 0)
+    yield records
+    logging_setup.stop_logging()
+
+
+def make_record(message):
+    return logging.LogRecord("test", logging.INFO, __file__, 0, message, None, None)
+
+
+def test_full_queue_drops_instead_of_blocking(fresh_queue):
+    handler = logging_setup.DroppingQueueHandler(fresh_queue)
+    for index in range(5):
+        handler.handle(make_record(f"record {index}"))
+    assert fresh_queue.qsize() == 3
+    assert logging_setup.dropped_records() == 2
+
+
+def test_unopenable_log_file_falls_back_to_stderr(fresh_queue, tmp_path, capsys):
+    handler = logging_setup.DroppingQueueHandler(fresh_queue)
+    handler.handle(make_record("queued before the listener"))
+
+    # A directory cannot be opened as the log file
+    with pytest.raises(OSError):
+        logging_setup.start_file_logging(str(tmp_path))
+    handler.handle(make_record("queued after the failure"))
+    logging_setup.stop_logging()
+
+    err = capsys.readouterr().err
+    assert "queued before the listener" in err
+    assert "queued after the failure" in err
+    assert fresh_queue.empty()
+
+
+def test_logging_call_does_not_wait_for_the_file(fresh_queue):
+    release = threading.Event()
+    writers = []
+
+    class StalledHandler(logging.Handler):
+        """Stands in for a file handler whose disk does not answer"""
+
+        def emit(self, record):
+            writers.append(threading.current_thread())
+            release.wait(5.0)
+
+    logging_setup._start_listener(StalledHandler(), json_lines=False)
+    logger = logging.getLogger("test.stalled_disk")
+    logger.propagate = False
+    logger.setLevel(logging.INFO)
+    handler = logging_setup.DroppingQueueHandler(fresh_queue)
+    logger.addHandler(handler)
+    try:
+        started = time.monotonic()
+        for index in range(10):
+            logger.info(f"record {index}")
+        assert time.monotonic() - started < 0.5
+        # The writer took the first record and hangs on it, the rest wait or are dropped
+        assert logging_setup.dropped_records() > 0
+    finally:
+        release.set()
+        logger.removeHandler(handler)
+    logging_setup.stop_logging()
+
+    assert writers
+    assert threading.current_thread() not in writers
@@ -0,0 +1,80 @@
+import math
+import urllib.error
+import urllib.request
+
+import pytest
+
+from metrics import DEFAULT_BUCKETS, FAST_BUCKETS, Histogram, MetricsRegistry, MetricsServer
+
+
+def test_fast_buckets_resolve_microsecond_ticks():
+    histogram = Histogram('tick_seconds', buckets=FAST_BUCKETS)
+    for _ in range(100):
+        histogram.observe(0.000018)
+    # Inside the 10-25 µs bucket, not hundreds of µs
+    assert 0.00001 < histogram.quantile(0.5) <= 0.000025
+    assert histogram.snapshot()['avg'] == pytest.approx(0.000018)
+
+
+def test_first_bucket_reports_its_upper_bound():
+    histogram = Histogram('tick_seconds', buckets=DEFAULT_BUCKETS)
+    for _ in range(10):
+        histogram.observe(0.00002)
+    assert histogram.quantile(0.5) == DEFAULT_BUCKETS[0]
+    assert histogram.quantile(0.99) == DEFAULT_BUCKETS[0]
+
+
+def test_quantile_interpolates_and_caps_at_the_last_bucket():
+    histogram = Histogram('seconds', buckets=(1.0, 2.0))
+    histogram.observe(0.5)
+    histogram.observe(1.5)
+    histogram.observe(1.5)
+    histogram.observe(100.0)
+    assert histogram.quantile(0.5) == pytest.approx(1.5)
+    # +Inf bucket: the largest finite bound is all that is known
+    assert histogram.quantile(1.0) == 2.0
+    assert Histogram('empty').quantile(0.5) is None
+
+
+def test_registry_snapshot_and_exposition():
+    registry = MetricsRegistry()
+    registry.counter('corrections_total', "Corrections")
+    registry.inc('corrections_total', 2)
+    registry.histogram('tick_seconds', "Check duration", buckets=(0.001, 0.01))
+    registry.observe('tick_seconds', 0.0005)
+    registry.observe('tick_seconds', 0.005)
+    registry.gauge('devices', lambda: 3, "Devices")
+    registry.gauge('broken', lambda: 1 / 0)
+
+    # The first registration decides the buckets
+    assert registry.histogram('tick_seconds').buckets == (0.001, 0.01)
+
+    snapshot = registry.snapshot()
+    assert snapshot['counters'] == {'corrections_total': 2}
+    assert snapshot['histograms']['tick_seconds']['count'] == 2
+    assert snapshot['gauges']['devices'] == 3.0
+    assert math.isnan(snapshot['gauges']['broken'])
+
+    lines = registry.render_prometheus().splitlines()
+    assert "# TYPE mvk_corrections_total counter" in lines
+    assert "mvk_corrections_total 2" in lines
+    assert 'mvk_tick_seconds_bucket{le="0.001"} 1' in lines
+    assert 'mvk_tick_seconds_bucket{le="0.01"} 2' in lines
+    assert 'mvk_tick_seconds_bucket{le="+Inf"} 2' in lines
+    assert "mvk_tick_seconds_count 2" in lines
+    assert "mvk_devices 3.0" in lines
+
+
+def test_server_serves_metrics_only():
+    registry = MetricsRegistry()
+    registry.inc('ticks_total')
+    server = MetricsServer(registry, 0)
+    server.start()
+    try:
+        with urllib.request.urlopen(f"http://127.0.0.1:{server.port}/metrics", timeout=2.0) as response:
+            assert "mvk_ticks_total 1" in response.read().decode('utf-8')
+        with pytest.raises(urllib.error.HTTPError) as error:
+            urllib.request.urlopen(f"http://127.0.0.1:{server.port}/", timeout=2.0)
+        assert error.value.code == 404
+    finally:
+        server.stop()
@@ -0,0 +1,185 @@
+import json
+import os
+import queue
+import sys
+import threading
+
+import pytest
+
+from audio_backends import AudioDeviceCmdletsBackend
+from powershell_worker import PowerShellCommandError, PowerShellWorker, PowerShellWorkerTimeout
+
+FAKE_SHELL = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src', 'fake_powershell.py')
+
+DEVICES = ("Built-in Microphone", "USB Microphone")
+
+
+def fake_command(*options):
+    command = [sys.executable, FAKE_SHELL, '--volume', '80']
+    for name in DEVICES:
+        command += ['--device', name]
+    return command + list(options)
+
+
+@pytest.fixture
+def make_worker():
+    workers = []
+
+    def make(*options, timeout=5.0):
+        worker = PowerShellWorker(command=fake_command(*options), timeout=timeout, start_timeout=10.0)
+        workers.append(worker)
+        return worker
+
+    yield make
+    for worker in workers:
+        worker.stop()
+
+
+def count_requests(worker):
+    """Wraps worker.request, returns the list of ops sent"""
+    ops = []
+    request = worker.request
+
+    def counting(op, timeout=None, **args):
+        ops.append(op)
+        return request(op, timeout=timeout, **args)
+
+    worker.request = counting
+    return ops
+
+
+def test_framed_requests_and_errors(make_worker):
+    worker = make_worker()
+    assert worker.start()
+    assert worker.request('ping') == 'pong'
+    # Default device answers like the cmdlet ("80%"), by ID as a number
+    assert worker.request('get') == "80%"
+    devices = worker.request('list')
+    assert [device['name'] for device in devices] == list(DEVICES)
+    assert worker.request('get', device_id=devices[1]['id']) == 80
+
+    with pytest.raises(PowerShellCommandError):
+        worker.request('get', device_id="no-such-endpoint")
+    # A failed command does not cost the session
+    assert worker.spawn_count == 1
+
+
+def test_reader_ignores_stray_output():
+    class Process:
+        stdout = ["WARNING: profile ignored\n", "\n", json.dumps([1, 2]) + "\n",
+                  json.dumps({'id': 1, 'ok': True, 'result': 'pong'}) + "\n",
+                  json.dumps({'event': 'volume', 'device_id': 'a', 'volume': 50}) + "\n"]
+
+    responses = queue.Queue()
+    events = []
+    PowerShellWorker._read_frames(Process(), responses, events.append)
+    assert responses.get_nowait() == {'id': 1, 'ok': True, 'result': 'pong'}
+    # End of output is reported as None
+    assert responses.get_nowait() is None
+    assert events == [{'event': 'volume', 'device_id': 'a', 'volume': 50}]
+
+
+def test_timeout_kills_the_hung_shell(make_worker):
+    worker = make_worker('--hang-on', 'get', timeout=0.3)
+    worker.start()
+    process = worker.process
+
+    with pytest.raises(PowerShellWorkerTimeout):
+        worker.request('get')
+    assert process.poll() is not None
+    assert not worker.is_alive()
+
+    # The next request starts a fresh shell
+    assert worker.request('ping') == 'pong'
+    assert worker.respawn_count == 1
+
+
+def test_crashed_shell_is_respawned_and_the_request_retried(make_worker):
+    worker = make_worker('--crash-after', '2')
+    assert worker.request('ping') == 'pong'
+    assert worker.request('ping') == 'pong'
+    # Third request kills the shell - answered by the respawned one
+    assert worker.request('ping') == 'pong'
+    assert worker.respawn_count == 1
+
+
+def test_get_many_and_ensure_are_one_round_trip(make_worker):
+    backend = AudioDeviceCmdletsBackend(make_worker())
+    ids = [device['id'] for device in backend.list_devices()]
+    ops = count_requests(backend.worker)
+
+    assert backend.get_volumes(ids + ["no-such-endpoint"]) == [80, 80, None]
+    assert backend.ensure_volumes([(ids[0], 100, 2), (ids[1], 81, 2), ("no-such-endpoint", 100, 2)]) == \
+        [(80, 100), (80, 80), None]
+    assert ops == ['get_many', 'ensure']
+    assert backend.get_volume(ids[0]) == 100
+
+
+def test_volume_events_reach_only_their_subscribers(make_worker):
+    backend = AudioDeviceCmdletsBackend(make_worker())
+    ids = [device['id'] for device in backend.list_devices()]
+    received = []
+    arrived = threading.Event()
+
+    def on_first(device_id, volume):
+        received.append(('first', device_id, volume))
+        arrived.set()
+
+    unsubscribe_first = backend.subscribe(on_first, ids[0])
+    backend.subscribe(lambda device_id, volume: received.append(('second', device_id, volume)), ids[1])
+
+    backend.worker.request('drift', volume=50, device_id=ids[0])
+    assert arrived.wait(5.0)
+    assert received == [('first', ids[0], 50)]
+
+    # Dropping one subscription keeps the other endpoint's
+    unsubscribe_first()
+    received.clear()
+    backend.worker.request('drift', volume=40, device_id=ids[0])
+    backend.worker.request('drift', volume=60, device_id=ids[1])
+    # Events are pushed before the response of the request that caused them
+    assert received == [('second', ids[1], 60)]
+
+
+def test_subscriptions_survive_a_respawn(make_worker):
+    backend = AudioDeviceCmdletsBackend(make_worker('--crash-after', '3'))
+    ids = [device['id'] for device in backend.list_devices()]
+    received = []
+    backend.subscribe(lambda device_id, volume: received.append((device_id, volume)), ids[1])
+
+    backend.worker.request('ping')
+    # Crashes the shell - the retry runs on a new one with the subscription restored
+    backend.worker.request('drift', volume=30, device_id=ids[1])
+    assert backend.respawn_count == 1
+    assert received == [(ids[1], 30)]
+
+
+def test_keeper_adaptive_polling_against_the_worker(make_worker, tmp_path):
+    from microphone_volume_keeper import MicrophoneVolumeKeeperAdvanced
+
+    settings_path = tmp_path / "settings.json"
+    settings_path.write_text(json.dumps({
+        'audio_backend': 'Simulation', 'event_journal': False, 'control_api': False,
+        'log_file': str(tmp_path / "keeper.log"), 'target_volume': 100, 'tolerance': 2,
+        'check_interval': 0.5, 'max_interval': 4.0}))
+    keeper = MicrophoneVolumeKeeperAdvanced(settings_path=str(settings_path))
+    keeper.backend.close()
+    keeper.backend = AudioDeviceCmdletsBackend(make_worker())
+    keeper.audio_method = keeper.backend.name
+    keeper.device_registry.invalidate("test backend")
+    targets = keeper.active_targets()
+    ops = count_requests(keeper.backend.worker)
+
+    # Drifted device: corrected with a single ensure, interval snaps to the minimum
+    assert keeper.ensure_volumes(targets)
+    assert ops.count('ensure') == 1 and 'set' not in ops and 'get' not in ops
+    assert keeper.correction_count == 1
+    assert keeper.next_poll_interval(True, targets) == keeper.poll_interval.min_interval
+
+    # Stable readings back off up to the maximum
+    intervals = []
+    for _ in range(5):
+        intervals.append(keeper.next_poll_interval(keeper.ensure_volumes(targets), targets))
+    assert intervals == sorted(intervals)
+    assert intervals[-1] == keeper.poll_interval.max_interval
+    assert keeper.correction_count == 1
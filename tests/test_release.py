@@ -0,0 +1,119 @@
+import hashlib
+import json
+import zipfile
+
+import create_final_release
+from create_final_release import build_zip
+
+
+def make_files(tmp_path, big_size):
+    files = []
+    for index in range(20):
+        path = tmp_path / f"module_{index:02d}.py"
+        path.write_bytes(f"# module {index}\n".encode() * 2000)
+        files.append((str(path), f"src/module_{index:02d}.py"))
+    big = tmp_path / "app.exe"
+    big.write_bytes(bytes(range(256)) * (big_size // 256))
+    files.append((str(big), "dist/app.exe"))
+    return sorted(files, key=lambda file: file[1])
+
+
+def test_zip_round_trip_and_member_hashes(tmp_path, monkeypatch):
+    # Small limits: the pool and the streamed path both run
+    monkeypatch.setattr(create_final_release, 'STREAM_THRESHOLD', 64 * 1024)
+    monkeypatch.setattr(create_final_release, 'POOL_THRESHOLD', 1024)
+    files = make_files(tmp_path, 256 * 1024)
+    target = str(tmp_path / "source.zip")
+
+    sha256, size, members = build_zip(target, files)
+
+    with open(target, 'rb') as f:
+        data = f.read()
+    assert hashlib.sha256(data).hexdigest() == sha256 and len(data) == size
+    with zipfile.ZipFile(target) as zipf:
+        assert zipf.testzip() is None
+        assert zipf.namelist() == [arcname for _, arcname in files]
+        for path, arcname in files:
+            with open(path, 'rb') as f:
+                content = f.read()
+            assert zipf.read(arcname) == content
+            assert members[arcname] == hashlib.sha256(content).hexdigest()
+
+
+def test_zip_is_reproducible(tmp_path, monkeypatch):
+    monkeypatch.setattr(create_final_release, 'POOL_THRESHOLD', 1024)
+    monkeypatch.setenv('SOURCE_DATE_EPOCH', '1700000000')
+    files = make_files(tmp_path, 1024)
+    first = build_zip(str(tmp_path / "first.zip"), files)
+    second = build_zip(str(tmp_path / "second.zip"), files)
+    assert first == second
+
+
+def test_pool_and_serial_builds_are_identical(tmp_path, monkeypatch):
+    monkeypatch.setattr(create_final_release, 'STREAM_THRESHOLD', 64 * 1024)
+    files = make_files(tmp_path, 256 * 1024)
+    empty = tmp_path / "leer.txt"
+    empty.write_bytes(b"")
+    umlaut = tmp_path / "lautstärke.md"
+    umlaut.write_text("Lautstärke\n", encoding='utf-8')
+    files = sorted(files + [(str(empty), "docs/leer.txt"), (str(umlaut), "docs/lautstärke.md")],
+                   key=lambda file: file[1])
+
+    monkeypatch.setattr(create_final_release, 'POOL_THRESHOLD', 1024)
+    pooled = build_zip(str(tmp_path / "pooled.zip"), files)
+    monkeypatch.setattr(create_final_release, 'POOL_THRESHOLD', float('inf'))
+    serial = build_zip(str(tmp_path / "serial.zip"), files)
+    assert pooled == serial
+
+    with zipfile.ZipFile(str(tmp_path / "pooled.zip")) as zipf:
+        assert zipf.testzip() is None
+        assert zipf.read("docs/leer.txt") == b""
+        assert zipf.read("docs/lautstärke.md") == "Lautstärke\n".encode('utf-8')
+
+
+def build_source_zip(tmp_path, files, **options):
+    cache = create_final_release.BuildCache(str(tmp_path / "cache.json"))
+    release = create_final_release.ReleaseBuild(str(tmp_path / "releases"), cache, **options)
+    release.zip("source.zip", files)
+    release.finish()
+    return release
+
+
+def test_unchanged_inputs_are_not_rebuilt(tmp_path, monkeypatch):
+    monkeypatch.setenv('SOURCE_DATE_EPOCH', '1700000000')
+    (tmp_path / "releases").mkdir()
+    (tmp_path / "releases" / "old_build.zip").write_bytes(b"stale")
+    files = make_files(tmp_path, 1024)
+
+    assert build_source_zip(tmp_path, files).rebuilt == ["source.zip"]
+    assert sorted(p.name for p in (tmp_path / "releases").iterdir()) == ["MANIFEST.json", "SHA256SUMS",
+                                                                          "source.zip"]
+    manifest = json.loads((tmp_path / "releases" / "MANIFEST.json").read_text(encoding='utf-8'))
+    assert build_source_zip(tmp_path, files).rebuilt == []
+    assert json.loads((tmp_path / "releases" / "MANIFEST.json").read_text(encoding='utf-8')) == manifest
+
+    # One changed input: a dry run names it and writes nothing, the real run rebuilds
+    with open(files[0][0], 'ab') as f:
+        f.write(b"# changed\n")
+    dry_run = build_source_zip(tmp_path, files, dry_run=True)
+    assert dry_run.rebuilt == ["source.zip"]
+    assert json.loads((tmp_path / "releases" / "MANIFEST.json").read_text(encoding='utf-8')) == manifest
+    assert build_source_zip(tmp_path, files).rebuilt == ["source.zip"]
+
+    # A modified output is rebuilt even though the inputs are the same
+    with open(tmp_path / "releases" / "source.zip", 'ab') as f:
+        f.write(b"tampered")
+    assert build_source_zip(tmp_path, files).rebuilt == ["source.zip"]
+    assert build_source_zip(tmp_path, files, force=True).rebuilt == ["source.zip"]
+
+
+def test_stale_reason_names_the_changed_inputs(tmp_path):
+    target = tmp_path / "source.zip"
+    target.write_bytes(b"zip")
+    cache = create_final_release.BuildCache(str(tmp_path / "cache.json"))
+    cache.store("source.zip", str(target), {'a.py': "1", 'b.py': "2"}, {'sha256': "x", 'size': 3})
+
+    assert cache.stale_reason("source.zip", str(target), {'a.py': "1", 'b.py': "2"}) is None
+    assert cache.stale_reason("source.zip", str(target), {'a.py': "9", 'c.py': "3"}) == \
+        "changed: a.py; added: c.py; removed: b.py"
+    assert cache.stale_reason("other.zip", str(target), {}) == "not built yet"
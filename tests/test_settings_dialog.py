@@ -0,0 +1,42 @@
+import json
+
+import pytest
+
+pytest.importorskip("tkinter")
+
+from control_api import ControlError  # noqa: E402
+from settings_dialog import TOLERANCE_RANGE, VOLUME_RANGE, parse_bounded_int  # noqa: E402
+
+
+@pytest.mark.parametrize("text, expected", [("0", 0), (" 5 ", 5), ("20", 20), (7, 7)])
+def test_valid_tolerance(text, expected):
+    assert parse_bounded_int(text, *TOLERANCE_RANGE, "Tolerance") == expected
+
+
+@pytest.mark.parametrize("text", ["", "abc", "2.5", "-1", "21"])
+def test_invalid_tolerance_has_a_message(text):
+    with pytest.raises(ValueError, match="Tolerance must be a whole number between 0 and 20"):
+        parse_bounded_int(text, *TOLERANCE_RANGE, "Tolerance")
+
+
+def test_dialog_and_control_api_accept_the_same_volumes(tmp_path):
+    from microphone_volume_keeper import MicrophoneVolumeKeeperAdvanced
+
+    settings_path = tmp_path / "settings.json"
+    settings_path.write_text(json.dumps({
+        'audio_backend': 'Simulation', 'event_journal': False, 'control_api': False,
+        'log_file': str(tmp_path / "keeper.log")}))
+    keeper = MicrophoneVolumeKeeperAdvanced(settings_path=str(settings_path))
+    try:
+        assert parse_bounded_int(0, *VOLUME_RANGE, "Target volume") == 0
+        keeper.control_set_target(0)
+        assert keeper.target_volume == 0
+
+        for volume in (-1, 101):
+            with pytest.raises(ValueError, match="Target volume must be a whole number between 0 and 100"):
+                parse_bounded_int(volume, *VOLUME_RANGE, "Target volume")
+            with pytest.raises(ControlError):
+                keeper.control_set_target(volume)
+        assert keeper.target_volume == 0
+    finally:
+        keeper.backend.close()
@@ -0,0 +1,57 @@
+import json
+import os
+import time
+
+import settings_store
+from settings_store import SettingsStore
+
+DEFAULTS = {'target_volume': 100, 'tolerance': 2}
+
+
+def test_saves_in_the_debounce_window_end_in_one_write(tmp_path):
+    path = tmp_path / "settings.json"
+    store = SettingsStore(str(path), DEFAULTS, debounce=0.05)
+    for volume in range(90, 95):
+        store.save({'target_volume': volume})
+    assert store.write_count == 0
+
+    deadline = time.monotonic() + 2.0
+    while store.write_count == 0 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert store.write_count == 1
+    assert json.loads(path.read_text(encoding='utf-8')) == {'target_volume': 94}
+
+    # Nothing pending - flush writes nothing
+    store.flush()
+    assert store.write_count == 1
+
+
+def test_failed_write_keeps_the_previous_file(tmp_path, monkeypatch):
+    path = tmp_path / "settings.json"
+    store = SettingsStore(str(path), DEFAULTS)
+    store.save({'target_volume': 80})
+    store.flush()
+
+    def failing_fsync(fd):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(settings_store.os, 'fsync', failing_fsync)
+    store.save({'target_volume': 20})
+    store.flush()
+
+    assert json.loads(path.read_text(encoding='utf-8')) == {'target_volume': 80}
+    assert os.listdir(tmp_path) == ["settings.json"]
+    assert store.write_count == 1
+
+
+def test_only_external_edits_are_reloaded(tmp_path):
+    path = tmp_path / "settings.json"
+    store = SettingsStore(str(path), DEFAULTS)
+    assert store.load() == DEFAULTS
+    store.save({'target_volume': 80})
+    store.flush()
+    assert store.check_for_changes(force=True) is None
+
+    path.write_text(json.dumps({'tolerance': 5, 'padding': "x" * 10}), encoding='utf-8')
+    assert store.check_for_changes(force=True) == {'target_volume': 100, 'tolerance': 5, 'padding': "x" * 10}
+    assert store.reload_count == 1